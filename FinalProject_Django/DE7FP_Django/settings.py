@@ -82,6 +82,43 @@ WSGI_APPLICATION = 'DE7FP_Django.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+def database_connection_settings(prefix, engine):
+    """
+    DB 연결 재사용 설정 ({prefix}_POOL_* 환경 변수, 별칭마다 따로 지정).
+    PostgreSQL이면 워커 프로세스당 psycopg 3 커넥션 풀을 쓰고
+    (최대 연결 수 = 워커 수 * MAX_SIZE), 그 밖에는 {prefix}_CONN_MAX_AGE(기본 0)를 따른다.
+    두 방식 모두 재사용 전에 연결 상태를 확인한다 (CONN_HEALTH_CHECKS).
+    """
+    use_pool = (
+        'postgresql' in (engine or '')
+        and os.getenv(f'{prefix}_POOL_ENABLED', 'True') == 'True'
+    )
+    if not use_pool:
+        # ASGI(UvicornWorker)에서는 요청마다 다른 스레드를 쓸 수 있어 영속 연결이 스레드별로 남아
+        # 새어 나가므로 기본은 요청 단위 연결(0). 연결 재사용은 풀로 하고,
+        # WSGI로 띄울 때만 {prefix}_CONN_MAX_AGE를 명시해 영속 연결을 쓴다
+        return {
+            'CONN_MAX_AGE': int(os.getenv(f'{prefix}_CONN_MAX_AGE', '0')),
+            'CONN_HEALTH_CHECKS': True,
+        }
+    return {
+        # 풀을 쓰면 영속 연결은 꺼야 한다 (요청이 끝나면 연결을 풀에 반납)
+        'CONN_MAX_AGE': 0,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'pool': {
+                'min_size': int(os.getenv(f'{prefix}_POOL_MIN_SIZE', '1')),
+                'max_size': int(os.getenv(f'{prefix}_POOL_MAX_SIZE', '4')),
+                # 연결 최대 수명/유휴 시간(초): RDS 페일오버나 방화벽 유휴 끊김 대비
+                'max_lifetime': float(os.getenv(f'{prefix}_POOL_MAX_LIFETIME', '1800')),
+                'max_idle': float(os.getenv(f'{prefix}_POOL_MAX_IDLE', '300')),
+                # 풀이 가득 찼을 때 연결을 기다리는 최대 시간(초)
+                'timeout': float(os.getenv(f'{prefix}_POOL_TIMEOUT', '10')),
+            },
+        },
+    }
+
+
 DATABASES = {
     # 1. 메인 DB (RDS PostgreSQL), 환경 변수가 없으면 로컬 SQLite 사용
     'default': {
@@ -91,6 +128,9 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', ''),
         'HOST': os.environ.get('DB_HOST', ''),
         'PORT': os.environ.get('DB_PORT', ''),
+        **database_connection_settings(
+            'DB', os.environ.get('DB_ENGINE', 'django.db.backends.sqlite3')
+        ),
     },
     # 2. RAG용 벡터 DB (Docker PostgreSQL)
     'vectordb': {
@@ -100,12 +140,100 @@ DATABASES = {
         'PASSWORD': os.environ.get('VECTOR_DB_PASSWORD'),
         'HOST': os.environ.get('VECTOR_DB_HOST'),
         'PORT': os.environ.get('VECTOR_DB_PORT'),
+        **database_connection_settings(
+            'VECTOR_DB', os.environ.get('VECTOR_DB_ENGINE')
+        ),
     }
 }
 
 
 DATABASE_ROUTERS = ['DE7FP_Django.db_router.MultiDBRouter']
 
+# RAG 벡터 검색 튜닝 (pgvector ANN 인덱스)
+# 값이 클수록 recall은 높아지고 검색 지연은 늘어남
+RAG_HNSW_EF_SEARCH = int(os.getenv('RAG_HNSW_EF_SEARCH', '40'))
+RAG_IVFFLAT_PROBES = int(os.getenv('RAG_IVFFLAT_PROBES', '10'))
+# WHERE 조건이 붙은 검색: pgvector는 조건을 인덱스 스캔 뒤에 적용하므로 결과가 모자랄 수 있다.
+# iterative scan(pgvector 0.8+, relaxed_order/strict_order, 빈 값이면 사용 안 함)으로
+# 결과가 찰 때까지 스캔을 이어가고, ef_search도 더 크게 잡는다
+RAG_ITERATIVE_SCAN = os.getenv('RAG_ITERATIVE_SCAN', 'relaxed_order')
+RAG_FILTERED_EF_SEARCH = int(os.getenv('RAG_FILTERED_EF_SEARCH', '200'))
+# 검색 후보 수: 질문에서 위치/카테고리 조건을 찾은 경우(하이브리드)와 그렇지 않은 경우
+RAG_HYBRID_LIMIT = int(os.getenv('RAG_HYBRID_LIMIT', '10'))
+RAG_RETRIEVAL_LIMIT = int(os.getenv('RAG_RETRIEVAL_LIMIT', '30'))
+
+# LLM 프롬프트 예산
+# 참고 정보 토큰 예산(추정치), 최소 후보 수, 최상위 후보 대비 허용 거리 차이
+RAG_CONTEXT_TOKEN_BUDGET = int(os.getenv('RAG_CONTEXT_TOKEN_BUDGET', '1200'))
+RAG_CONTEXT_MIN_CANDIDATES = int(os.getenv('RAG_CONTEXT_MIN_CANDIDATES', '3'))
+RAG_CONTEXT_DISTANCE_MARGIN = float(os.getenv('RAG_CONTEXT_DISTANCE_MARGIN', '0.15'))
+RAG_CONTEXT_DESCRIPTION_CHARS = int(os.getenv('RAG_CONTEXT_DESCRIPTION_CHARS', '120'))
+# 시스템 지시문 Gemini 컨텍스트 캐시 (초)
+RAG_CONTEXT_CACHE_ENABLED = os.getenv('RAG_CONTEXT_CACHE_ENABLED', 'True') == 'True'
+RAG_CONTEXT_CACHE_TTL = int(os.getenv('RAG_CONTEXT_CACHE_TTL', '3600'))
+# 구조화 출력 검증 실패 시 재생성 횟수
+RAG_LLM_MAX_RETRIES = int(os.getenv('RAG_LLM_MAX_RETRIES', '1'))
+
+# 채팅 기록 write-behind 버퍼: N건이 모이거나 T ms가 지나면 bulk_create
+# DB 저장 실패 시 스풀 디렉터리에 남겼다가 다음 저장 때 재시도
+CHAT_HISTORY_BATCH_SIZE = int(os.getenv('CHAT_HISTORY_BATCH_SIZE', '50'))
+CHAT_HISTORY_FLUSH_INTERVAL_MS = int(os.getenv('CHAT_HISTORY_FLUSH_INTERVAL_MS', '1000'))
+CHAT_HISTORY_SPOOL_DIR = os.getenv(
+    'CHAT_HISTORY_SPOOL_DIR', os.path.join(BASE_DIR, 'spool')
+)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# 'rag' 캐시는 gunicorn 워커 간 공유가 목적이므로 운영에서는
+# DatabaseCache(createcachetable 필요)나 Redis 백엔드로 지정
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'rag': {
+        'BACKEND': os.getenv(
+            'RAG_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('RAG_CACHE_LOCATION', 'rag'),
+    },
+}
+
+# 질문 임베딩 캐시 (워커 내 LRU + 'rag' 공유 캐시)
+RAG_CACHE_ALIAS = 'rag'
+RAG_QUERY_CACHE_SIZE = int(os.getenv('RAG_QUERY_CACHE_SIZE', '1024'))
+RAG_QUERY_CACHE_TTL = int(os.getenv('RAG_QUERY_CACHE_TTL', '86400'))
+
+# 의미 기반 응답 캐시 (ChatAnswerCache, vectordb)
+# THRESHOLD: 재사용할 질문 간 최대 코사인 거리
+# WAIT_TOLERANCE: refresh_waiting 후 응답을 무효화할 대기시간 변화(분)
+RAG_SEMANTIC_CACHE_ENABLED = os.getenv('RAG_SEMANTIC_CACHE_ENABLED', 'True') == 'True'
+RAG_SEMANTIC_CACHE_THRESHOLD = float(os.getenv('RAG_SEMANTIC_CACHE_THRESHOLD', '0.05'))
+RAG_SEMANTIC_CACHE_TTL = int(os.getenv('RAG_SEMANTIC_CACHE_TTL', '1800'))
+RAG_SEMANTIC_CACHE_WAIT_TOLERANCE = int(
+    os.getenv('RAG_SEMANTIC_CACHE_WAIT_TOLERANCE', '10')
+)
+
+# 임베딩 기반 비슷한 식당 API 결과 캐시(초, 'rag' 캐시). 대기시간 재정렬이 있으므로 짧게 유지
+RAG_SIMILAR_CACHE_TTL = int(os.getenv('RAG_SIMILAR_CACHE_TTL', '600'))
+
+# 비슷한 식당 API 결과 캐시(초). 클러스터 결과 적재 후 refresh_similar_restaurants 실행
+SIMILAR_RESTAURANTS_CACHE_TTL = int(os.getenv('SIMILAR_RESTAURANTS_CACHE_TTL', '600'))
+
+# 지도 검색 원본 이벤트 보관 여부와 보관 기간(일). 대시보드는 MapSearchAggregate만 읽는다
+MAP_SEARCH_EVENT_LOG = os.getenv('MAP_SEARCH_EVENT_LOG', 'False') == 'True'
+MAP_SEARCH_EVENT_RETENTION_DAYS = int(os.getenv('MAP_SEARCH_EVENT_RETENTION_DAYS', '30'))
+
+# 워드클라우드 형태소 분석
+# KONLPY_WARMUP=True면 앱 로딩 시 Okt(JVM)를 미리 띄움 (gunicorn은 post_worker_init 훅에서 처리)
+KONLPY_WARMUP = os.getenv('KONLPY_WARMUP', 'False') == 'True'
+# 기본 불용어에 추가할 단어 (쉼표 구분)
+WORDCLOUD_EXTRA_STOP_WORDS = [
+    word.strip()
+    for word in os.getenv('WORDCLOUD_EXTRA_STOP_WORDS', '').split(',')
+    if word.strip()
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -152,3 +280,20 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Kakao Map API Key
 KAKAO_MAP_API_KEY = os.getenv('KAKAO_MAP_API_KEY', '')
+
+
+# Logging
+# RAG 요청별 토큰 사용량/지연 로그를 콘솔(gunicorn 로그)로 출력
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'RAG': {
+            'handlers': ['console'],
+            'level': os.getenv('RAG_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
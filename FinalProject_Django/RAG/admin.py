@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import EmbeddedData
+from .models import ChatAnswerCache, EmbeddedData
 
 
 @admin.register(EmbeddedData)
@@ -23,3 +23,11 @@ class EmbeddedDataAdmin(admin.ModelAdmin):
 
     # 기본 정렬 순서 (평점 높은 순)
     ordering = ('-rating',)
+
+
+@admin.register(ChatAnswerCache)
+class ChatAnswerCacheAdmin(admin.ModelAdmin):
+    list_display = ('id', 'query', 'hit_count', 'created_at')
+    search_fields = ('query',)
+    ordering = ('-created_at',)
+    exclude = ('embedding',)
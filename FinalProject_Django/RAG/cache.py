@@ -0,0 +1,147 @@
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_TRAILING_PUNCT_RE = re.compile(r"[\s?!.~,]+$")
+
+
+def normalize_query(text):
+    """
+    캐시 키용 질문 정규화.
+    전각/반각 통일(NFKC), 소문자화, 공백 정리, 끝 문장부호 제거
+    ("강남역 근처 맛집 추천해줘?" == "강남역  근처 맛집 추천해줘")
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    return _TRAILING_PUNCT_RE.sub("", text)
+
+
+class QueryEmbeddingCache:
+    """
+    질문 임베딩 2단 캐시.
+    1단: 워커 프로세스 내 LRU (TTL/크기 제한)
+    2단: Django 캐시 백엔드 (settings.RAG_CACHE_ALIAS, 워커 간 공유)
+    """
+
+    def __init__(self, namespace, max_size=1024, ttl=3600, shared_alias=None):
+        self.namespace = namespace
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared_alias = shared_alias
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits_local = 0
+        self.hits_shared = 0
+        self.misses = 0
+
+    def key(self, query):
+        digest = hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+        return f"rag:qemb:{self.namespace}:{digest}"
+
+    def get_or_embed(self, query, embed_fn):
+        """캐시에 없으면 embed_fn(query)로 임베딩하고 두 계층에 저장"""
+        key = self.key(query)
+
+        vector = self._get_local(key)
+        if vector is not None:
+            with self._lock:
+                self.hits_local += 1
+            return vector
+
+        shared = self._shared()
+        if shared is not None:
+            vector = shared.get(key)
+            if vector is not None:
+                self._set_local(key, vector)
+                with self._lock:
+                    self.hits_shared += 1
+                return vector
+
+        with self._lock:
+            self.misses += 1
+        vector = list(embed_fn(query))
+        self._set_local(key, vector)
+        if shared is not None:
+            shared.set(key, vector, timeout=self.ttl)
+        return vector
+
+    async def aget_or_embed(self, query, aembed_fn):
+        """get_or_embed의 async 버전 (aembed_fn은 코루틴 함수)"""
+        key = self.key(query)
+
+        vector = self._get_local(key)
+        if vector is not None:
+            with self._lock:
+                self.hits_local += 1
+            return vector
+
+        shared = self._shared()
+        if shared is not None:
+            vector = await shared.aget(key)
+            if vector is not None:
+                self._set_local(key, vector)
+                with self._lock:
+                    self.hits_shared += 1
+                return vector
+
+        with self._lock:
+            self.misses += 1
+        vector = list(await aembed_fn(query))
+        self._set_local(key, vector)
+        if shared is not None:
+            await shared.aset(key, vector, timeout=self.ttl)
+        return vector
+
+    def stats(self):
+        with self._lock:
+            hits = self.hits_local + self.hits_shared
+            total = hits + self.misses
+            return {
+                "hits_local": self.hits_local,
+                "hits_shared": self.hits_shared,
+                "misses": self.misses,
+                "hit_rate": round(hits / total, 4) if total else 0.0,
+                "local_size": len(self._local),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+            self.hits_local = self.hits_shared = self.misses = 0
+
+    def _shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    def _get_local(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            expires_at, vector = entry
+            if expires_at < time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return vector
+
+    def _set_local(self, key, vector):
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.ttl, vector)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_size:
+                self._local.popitem(last=False)
+
+
+query_embedding_cache = QueryEmbeddingCache(
+    namespace="text-embedding-004:retrieval_query",
+    max_size=settings.RAG_QUERY_CACHE_SIZE,
+    ttl=settings.RAG_QUERY_CACHE_TTL,
+    shared_alias=settings.RAG_CACHE_ALIAS,
+)
@@ -0,0 +1,247 @@
+import hashlib
+import logging
+import random
+import struct
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+import google.genai as genai
+from google.genai import errors, types
+
+from .models import EmbeddedData
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "text-embedding-004"
+EMBEDDING_DIMENSIONS = 768
+
+# Gemini batchEmbedContents는 요청당 최대 100개 텍스트까지 허용
+MAX_BATCH_SIZE = 100
+
+# 재시도 대상 HTTP 상태 코드 (rate limit / 일시적 서버 오류)
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# 재임베딩된 행을 upsert 할 때 갱신하는 필드 (place_id, id 제외)
+UPSERT_FIELDS = [
+    f.name for f in EmbeddedData._meta.concrete_fields
+    if f.name not in ("id", "place_id")
+]
+
+
+def build_description(name, category, address, rating):
+    """
+    임베딩할 식당 설명 텍스트.
+    대기 팀 수처럼 수시로 바뀌는 값은 넣지 않는다 (RAG.waiting에서 별도 갱신).
+    """
+    return (
+        f"맛집 이름: {name}, 카테고리: {category}. "
+        f"주소: {address}. "
+        f"평점: {rating}점."
+    )
+
+
+def description_hash(text):
+    """임베딩 대상 텍스트의 내용 해시 (변경 감지용)"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class RateLimitError(Exception):
+    """가짜 클라이언트가 429 응답을 흉내낼 때 사용하는 예외"""
+
+
+class GeminiEmbeddingClient:
+    """여러 텍스트를 한 번의 요청으로 임베딩하는 Gemini 클라이언트"""
+
+    def __init__(self, api_key, model=EMBEDDING_MODEL):
+        self.client = genai.Client(api_key=api_key)
+        self.model = model
+
+    def embed(self, texts):
+        response = self.client.models.embed_content(
+            model=self.model,
+            contents=list(texts),
+            config=types.EmbedContentConfig(
+                output_dimensionality=EMBEDDING_DIMENSIONS
+            ),
+        )
+        return [embedding.values for embedding in response.embeddings]
+
+
+class FakeEmbeddingClient:
+    """
+    오프라인 처리량 측정용 가짜 임베딩 클라이언트.
+    네트워크 지연(latency)과 rate limit 비율을 흉내내며,
+    같은 텍스트에는 항상 같은 벡터를 돌려준다.
+    """
+
+    def __init__(self, latency=0.3, rate_limit_ratio=0.0,
+                 dimensions=EMBEDDING_DIMENSIONS):
+        self.latency = latency
+        self.rate_limit_ratio = rate_limit_ratio
+        self.dimensions = dimensions
+        self.calls = 0
+
+    def embed(self, texts):
+        self.calls += 1
+        time.sleep(self.latency)
+        if random.random() < self.rate_limit_ratio:  # noqa: S311
+            raise RateLimitError("429 RESOURCE_EXHAUSTED (fake)")
+        return [self._vector(text) for text in texts]
+
+    def _vector(self, text):
+        values = []
+        seed = text.encode("utf-8")
+        counter = 0
+        while len(values) < self.dimensions:
+            digest = hashlib.sha256(seed + struct.pack(">I", counter)).digest()
+            values.extend(b / 127.5 - 1.0 for b in digest)
+            counter += 1
+        return values[: self.dimensions]
+
+
+def is_retryable(exc):
+    """rate limit 또는 일시적 서버 오류인지 판단"""
+    if isinstance(exc, RateLimitError):
+        return True
+    if isinstance(exc, errors.APIError):
+        return exc.code in RETRYABLE_STATUS_CODES
+    return isinstance(exc, (ConnectionError, TimeoutError))
+
+
+def embed_with_retry(client, texts, max_retries=5, base_delay=1.0, max_delay=60.0):
+    """지수 백오프(+jitter)로 재시도하며 텍스트 배치를 임베딩"""
+    attempt = 0
+    while True:
+        try:
+            return client.embed(texts)
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = min(max_delay, base_delay * (2 ** attempt))
+            delay *= random.uniform(0.5, 1.0)  # noqa: S311
+            attempt += 1
+            logger.warning(
+                "Embedding batch failed (%s), retry %d/%d in %.1fs",
+                e, attempt, max_retries, delay,
+            )
+            time.sleep(delay)
+
+
+@dataclass
+class PipelineStats:
+    rows: int = 0
+    embedded: int = 0
+    saved: int = 0
+    failed: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_sec(self):
+        return self.embedded / self.elapsed if self.elapsed else 0.0
+
+
+class EmbeddingPipeline:
+    """
+    임베딩 적재 파이프라인.
+    텍스트를 batch_size 단위로 묶어 최대 workers개의 요청을 동시에 보내고,
+    결과를 chunk_size 단위로 place_id 기준 upsert(bulk_create) 한다.
+    """
+
+    def __init__(self, client, batch_size=50, workers=4, chunk_size=500,
+                 max_retries=5, base_delay=1.0, write=True, on_progress=None):
+        self.client = client
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.write = write
+        self.on_progress = on_progress
+
+    def run(self, items):
+        """
+        items: (EmbeddedData 생성 인자 dict, 임베딩할 텍스트) 튜플의 iterable.
+        생성된 벡터를 embedding 필드로 채워 저장한다.
+        """
+        stats = PipelineStats()
+        buffer = []
+        batches = self._batches(items, stats)
+        pending = set()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            # 메모리 사용량을 제한하기 위해 in-flight 배치 수를 workers * 2로 제한
+            for batch in batches:
+                pending.add(self._submit(executor, batch))
+                if len(pending) >= self.workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    self._collect(done, buffer, stats)
+                    self._flush(buffer, stats, force=False)
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                self._collect(done, buffer, stats)
+                self._flush(buffer, stats, force=False)
+
+        self._flush(buffer, stats, force=True)
+        stats.elapsed = time.perf_counter() - stats.started_at
+        return stats
+
+    def _batches(self, items, stats):
+        batch = []
+        for item in items:
+            stats.rows += 1
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _submit(self, executor, batch):
+        texts = [text for _, text in batch]
+        future = executor.submit(
+            embed_with_retry, self.client, texts,
+            self.max_retries, self.base_delay,
+        )
+        future.batch = batch
+        return future
+
+    def _collect(self, done, buffer, stats):
+        for future in done:
+            batch = future.batch
+            try:
+                vectors = future.result()
+            except Exception as e:
+                stats.failed += len(batch)
+                logger.error("Embedding batch of %d dropped: %s", len(batch), e)
+                continue
+
+            for (fields, text), vector in zip(batch, vectors, strict=True):
+                buffer.append(
+                    EmbeddedData(
+                        **fields,
+                        description_hash=description_hash(text),
+                        embedding=vector,
+                    )
+                )
+            stats.embedded += len(batch)
+
+    def _flush(self, buffer, stats, force):
+        while buffer and (force or len(buffer) >= self.chunk_size):
+            chunk = buffer[: self.chunk_size]
+            del buffer[: self.chunk_size]
+            if self.write:
+                EmbeddedData.objects.bulk_create(
+                    chunk,
+                    batch_size=self.chunk_size,
+                    update_conflicts=True,
+                    unique_fields=["place_id"],
+                    update_fields=UPSERT_FIELDS,
+                )
+            stats.saved += len(chunk)
+            if self.on_progress:
+                stats.elapsed = time.perf_counter() - stats.started_at
+                self.on_progress(stats)
+
@@ -0,0 +1,224 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from main.models import ChatHistory
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class ChatHistoryBuffer:
+    """
+    ChatHistory 쓰기를 요청 경로에서 떼어내는 write-behind 버퍼.
+    add()는 프로세스 내 큐에 넣기만 하고, 백그라운드 스레드가 batch_size개가 모이거나
+    interval초가 지나면 bulk_create로 한 번에 저장한다.
+    DB에 쓰지 못한 배치는 스풀 파일(JSON Lines)에 남겨 다음 flush 때 다시 저장한다 (at-least-once).
+    """
+
+    def __init__(
+        self, batch_size=50, interval=1.0, spool_dir=None, background=True,
+        stale_after=300,
+    ):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.spool_dir = Path(spool_dir) if spool_dir else None
+        # 주인 PID가 살아 있어도 이 시간(초) 동안 손대지 않은 스풀/선점 파일은 가져온다 (PID 재사용 대비)
+        self.stale_after = stale_after
+        # False면 스레드 없이 batch_size개가 찰 때 호출한 스레드에서 저장 (테스트/커맨드용)
+        self.background = background
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+
+    def add(self, query, answer):
+        """요청 경로에서 호출. DB 왕복 없이 큐에만 넣는다"""
+        record = {"query": query, "answer": answer, "created_at": timezone.now()}
+        if self._stopping:
+            # close() 이후에는 저장할 스레드가 없으므로 바로 스풀 파일에 남긴다
+            with self._write_lock:
+                self._spool([record])
+            return
+        self._queue.put(record)
+        if self.background:
+            self._ensure_started()
+        elif self._queue.qsize() >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """큐에 남은 기록을 현재 스레드에서 바로 저장"""
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                batch.append(item)
+        for start in range(0, len(batch), self.batch_size):
+            self._write(batch[start:start + self.batch_size])
+        if not batch:
+            self._write([])
+
+    def close(self, timeout=10):
+        """종료 훅: 백그라운드 스레드를 멈추고 남은 기록을 모두 저장"""
+        with self._lock:
+            thread = self._thread
+            self._stopping = True
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+        self.flush()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None and not self._stopping:
+                self._thread = threading.Thread(
+                    target=self._run, name="chat-history-writer", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch, stop = self._collect()
+            if batch:
+                self._write(batch)
+
+    def _collect(self):
+        """batch_size개가 모이거나 interval초가 지날 때까지 모은다"""
+        batch = []
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write(self, batch):
+        with self._write_lock:
+            # 장시간 떠 있는 스레드이므로 끊긴 DB 연결은 새로 맺는다
+            close_old_connections()
+            try:
+                self._replay_spool()
+                if batch:
+                    ChatHistory.objects.bulk_create(
+                        [ChatHistory(**record) for record in batch]
+                    )
+            except Exception as e:
+                logger.warning("ChatHistory write failed, spooling %d records: %s", len(batch), e)
+                self._spool(batch)
+            finally:
+                # 다음 배치까지 연결을 붙잡지 않도록 반납 (커넥션 풀 사용 시 풀로 돌아감)
+                close_old_connections()
+
+    def _spool_path(self):
+        return self.spool_dir / f"chat_history.{os.getpid()}.jsonl"
+
+    def _spool(self, batch):
+        if not batch:
+            return
+        if self.spool_dir is None:
+            logger.error("ChatHistory records dropped (no spool dir): %d", len(batch))
+            return
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        with open(self._spool_path(), "a", encoding="utf-8") as f:
+            for record in batch:
+                f.write(json.dumps(
+                    dict(record, created_at=record["created_at"].isoformat()),
+                    ensure_ascii=False,
+                ) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _claimable(self, path, owner):
+        """owner(PID)가 쓰거나 재처리 중일 수 있는 파일이면 False"""
+        if owner == os.getpid() or not _pid_alive(owner):
+            return True
+        try:
+            age = time.time() - path.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        return age > self.stale_after
+
+    def _replay_spool(self):
+        """
+        자기 스풀 파일과 종료된 워커의 스풀 파일을 DB에 다시 저장.
+        재처리 도중 죽은 워커가 선점해 둔 파일(.replaying.<pid>)도 다시 가져온다.
+        """
+        if self.spool_dir is None or not self.spool_dir.exists():
+            return
+        candidates = [
+            (path, int(path.name.split(".")[1]))
+            for path in self.spool_dir.glob("chat_history.*.jsonl")
+        ] + [
+            (path, int(path.name.rsplit(".", 1)[1]))
+            for path in self.spool_dir.glob("chat_history.*.jsonl.replaying.*")
+        ]
+        for path, owner in sorted(candidates):
+            # 살아 있는 다른 워커는 아직 자기 파일에 쓰거나 재처리하는 중일 수 있다
+            if not self._claimable(path, owner):
+                continue
+            # rename으로 선점해 여러 워커가 같은 파일을 중복 저장하지 않게 한다
+            original = path.with_name(path.name.split(".replaying.")[0])
+            claimed = original.with_name(f"{original.name}.replaying.{os.getpid()}")
+            try:
+                path.rename(claimed)
+            except FileNotFoundError:
+                continue
+            # 선점 시각을 남겨 다른 워커의 경과 시간 판단 기준으로 쓴다
+            os.utime(claimed)
+
+            # 저장에 실패하면 선점한 이름 그대로 남겨 두고 다음 flush 때
+            # (또는 이 워커가 죽은 뒤 다른 워커가) 다시 시도한다.
+            # 원래 이름으로 되돌리면 그 사이 새로 생긴 같은 이름의 스풀 파일을 덮어쓸 수 있다
+            with open(claimed, encoding="utf-8") as f:
+                records = [json.loads(line) for line in f if line.strip()]
+            ChatHistory.objects.bulk_create([
+                ChatHistory(
+                    query=r["query"], answer=r["answer"],
+                    created_at=datetime.fromisoformat(r["created_at"]),
+                )
+                for r in records
+            ], batch_size=self.batch_size)
+            claimed.unlink()
+            logger.info("Replayed %d spooled ChatHistory records", len(records))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+chat_history_buffer = ChatHistoryBuffer(
+    batch_size=settings.CHAT_HISTORY_BATCH_SIZE,
+    interval=settings.CHAT_HISTORY_FLUSH_INTERVAL_MS / 1000,
+    spool_dir=settings.CHAT_HISTORY_SPOOL_DIR,
+)
@@ -0,0 +1,229 @@
+import logging
+import math
+from dataclasses import dataclass, field, replace
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import EmbeddedData
+from .retrieval import search_similar
+
+logger = logging.getLogger(__name__)
+
+METERS_PER_DEGREE = 111_320
+EARTH_RADIUS_M = 6_371_000
+# "강남역 근처" 같은 질문의 기본 검색 반경(m)
+DEFAULT_RADIUS_M = 1500
+# 필터 적용 결과가 이보다 적으면 조건을 하나씩 풀어서 다시 검색
+MIN_CANDIDATES = 3
+
+# 주요 역/상권 좌표 (경도, 위도)
+LANDMARKS = {
+    "강남역": (127.0276, 37.4979),
+    "강남": (127.0276, 37.4979),
+    "역삼역": (127.0366, 37.5006),
+    "역삼": (127.0366, 37.5006),
+    "신논현역": (127.0251, 37.5045),
+    "선릉역": (127.0490, 37.5045),
+    "삼성역": (127.0631, 37.5088),
+    "잠실역": (127.1000, 37.5133),
+    "잠실": (127.1000, 37.5133),
+    "홍대입구역": (126.9245, 37.5572),
+    "홍대": (126.9245, 37.5572),
+    "합정역": (126.9139, 37.5496),
+    "합정": (126.9139, 37.5496),
+    "신촌역": (126.9368, 37.5551),
+    "신촌": (126.9368, 37.5551),
+    "이태원역": (126.9946, 37.5345),
+    "이태원": (126.9946, 37.5345),
+    "명동": (126.9857, 37.5609),
+    "종각역": (126.9830, 37.5702),
+    "종로": (126.9830, 37.5702),
+    "을지로입구역": (126.9826, 37.5660),
+    "을지로": (126.9826, 37.5660),
+    "광화문": (126.9769, 37.5714),
+    "서울역": (126.9707, 37.5547),
+    "여의도": (126.9243, 37.5216),
+    "성수역": (127.0557, 37.5446),
+    "성수": (127.0557, 37.5446),
+    "건대입구역": (127.0702, 37.5404),
+    "건대": (127.0702, 37.5404),
+    "압구정역": (127.0284, 37.5270),
+    "압구정": (127.0284, 37.5270),
+    "왕십리역": (127.0371, 37.5612),
+    "사당역": (126.9816, 37.4765),
+    "판교역": (127.1114, 37.3948),
+    "판교": (127.1114, 37.3948),
+}
+
+# 주소(address) 부분 일치로 거르는 행정구
+DISTRICTS = (
+    "강남구", "강동구", "강북구", "강서구", "관악구", "광진구", "구로구", "금천구",
+    "노원구", "도봉구", "동대문구", "동작구", "마포구", "서대문구", "서초구", "성동구",
+    "성북구", "송파구", "양천구", "영등포구", "용산구", "은평구", "종로구", "중구",
+    "중랑구",
+)
+
+# 카테고리 그룹 -> 질문에서 찾을 키워드. 카카오 카테고리("음식점 > 한식 > 국밥")와 부분 일치
+CATEGORY_KEYWORDS = {
+    "한식": ("한식", "국밥", "찌개", "삼겹살", "고기", "냉면", "백반", "갈비"),
+    "일식": ("일식", "초밥", "스시", "라멘", "돈까스", "돈카츠", "우동", "오마카세"),
+    "중식": ("중식", "중국집", "짜장", "짬뽕", "마라", "딤섬"),
+    "양식": ("양식", "파스타", "피자", "스테이크", "버거", "햄버거", "이탈리안"),
+    "카페": ("카페", "커피", "디저트", "베이커리", "빵"),
+    "술집": ("술집", "이자카야", "포차", "호프", "와인바"),
+}
+
+
+@dataclass
+class QueryFilters:
+    """질문에서 뽑아낸 검색 조건"""
+    center: tuple = None  # (경도, 위도)
+    landmark: str = ""
+    radius_m: int = DEFAULT_RADIUS_M
+    districts: list = field(default_factory=list)
+    # 카테고리 부분 일치 키워드 (그룹명 포함)
+    categories: list = field(default_factory=list)
+
+    @property
+    def has_location(self):
+        return self.center is not None or bool(self.districts)
+
+    @property
+    def is_empty(self):
+        return not self.has_location and not self.categories
+
+    def describe(self):
+        parts = []
+        if self.landmark:
+            parts.append(f"{self.landmark} {self.radius_m}m")
+        parts.extend(self.districts)
+        parts.extend(self.categories)
+        return ", ".join(parts) or "없음"
+
+
+def parse_query_filters(text):
+    """질문에서 행정구, 역/상권, 음식 카테고리 조건을 찾는다"""
+    filters = QueryFilters()
+
+    remaining = text
+    for district in DISTRICTS:
+        if district in remaining:
+            filters.districts.append(district)
+            # "강남구"가 "강남" 상권으로 다시 잡히지 않도록 제거
+            remaining = remaining.replace(district, " ")
+
+    # 긴 이름부터 찾아 "강남역"이 "강남"보다 먼저 잡히도록 한다
+    for name in sorted(LANDMARKS, key=len, reverse=True):
+        if name in remaining:
+            filters.landmark = name
+            filters.center = LANDMARKS[name]
+            break
+
+    for group, keywords in CATEGORY_KEYWORDS.items():
+        matched = [kw for kw in keywords if kw in text]
+        if matched:
+            filters.categories.extend(dict.fromkeys([group, *matched]))
+
+    return filters
+
+
+def haversine_m(x1, y1, x2, y2):
+    """두 좌표(경도, 위도) 사이 거리(m)"""
+    lat1, lat2 = math.radians(y1), math.radians(y2)
+    dlat = lat2 - lat1
+    dlng = math.radians(x2 - x1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def matches_filters(restaurant, filters):
+    """후보가 조건을 모두 만족하는지 (벤치마크 정밀도 계산에도 사용)"""
+    if filters.center is not None:
+        if restaurant.x is None or restaurant.y is None:
+            return False
+        distance = haversine_m(*filters.center, restaurant.x, restaurant.y)
+        if distance > filters.radius_m:
+            return False
+    if filters.districts and not any(
+        d in restaurant.address for d in filters.districts
+    ):
+        return False
+    if filters.categories and not any(
+        c in restaurant.category for c in filters.categories
+    ):
+        return False
+    return True
+
+
+def filtered_queryset(filters):
+    """조건을 SQL 필터로 변환. 반경 조건은 좌표 범위로 먼저 좁힌다 (y, x 인덱스)"""
+    queryset = EmbeddedData.objects.all()
+
+    if filters.center is not None:
+        x, y = filters.center
+        dy = filters.radius_m / METERS_PER_DEGREE
+        dx = filters.radius_m / (METERS_PER_DEGREE * math.cos(math.radians(y)))
+        queryset = queryset.filter(
+            y__range=(y - dy, y + dy), x__range=(x - dx, x + dx)
+        )
+
+    if filters.districts:
+        district_q = Q()
+        for district in filters.districts:
+            district_q |= Q(address__contains=district)
+        queryset = queryset.filter(district_q)
+
+    if filters.categories:
+        category_q = Q()
+        for keyword in filters.categories:
+            category_q |= Q(category__contains=keyword)
+        queryset = queryset.filter(category_q)
+
+    return queryset
+
+
+def relaxations(filters):
+    """조건이 너무 좁을 때 시도할 순서: 전체 -> 카테고리 제외 -> 위치 제외"""
+    steps = [filters]
+    if filters.categories and filters.has_location:
+        steps.append(replace(filters, categories=[]))
+        steps.append(replace(filters, center=None, landmark="", districts=[]))
+    return steps
+
+
+def hybrid_search(text, query_embedding, limit=None):
+    """
+    위치/카테고리 조건으로 후보를 먼저 좁힌 뒤 벡터 유사도로 정렬한다.
+    조건을 찾지 못했거나 조건을 풀어도 후보가 부족하면 전체 벡터 검색으로 대체.
+    반환값: (식당 목록, 실제로 적용된 QueryFilters 또는 None)
+    """
+    filters = parse_query_filters(text)
+
+    if not filters.is_empty:
+        limit = limit or settings.RAG_HYBRID_LIMIT
+        for step in relaxations(filters):
+            # 사각 범위의 모서리는 반경 밖이므로 여유 있게 가져와 거리로 다시 거른다
+            fetch = limit * 2 if step.center is not None else limit
+            candidates = search_similar(
+                query_embedding, limit=fetch, queryset=filtered_queryset(step)
+            )
+            if step.center is not None:
+                candidates = [r for r in candidates if matches_filters(r, step)]
+            if len(candidates) >= MIN_CANDIDATES:
+                if step is not filters:
+                    logger.info(
+                        "Hybrid search relaxed filters [%s] -> [%s]",
+                        filters.describe(), step.describe(),
+                    )
+                return candidates[:limit], step
+        logger.warning(
+            "Hybrid search found fewer than %d candidates for [%s], "
+            "falling back to unfiltered vector search",
+            MIN_CANDIDATES, filters.describe(),
+        )
+
+    return (
+        search_similar(query_embedding, limit=settings.RAG_RETRIEVAL_LIMIT),
+        None,
+    )
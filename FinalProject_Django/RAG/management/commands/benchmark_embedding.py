@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from RAG.embeddings import EmbeddingPipeline, FakeEmbeddingClient
+
+
+class Command(BaseCommand):
+    help = "Benchmark embedding pipeline throughput offline with a fake client"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2000)
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--latency", type=float, default=0.3,
+            help="Simulated seconds per embed_content request",
+        )
+        parser.add_argument(
+            "--rate-limit-ratio", type=float, default=0.0,
+            help="Fraction of requests answered with a fake 429",
+        )
+        parser.add_argument(
+            "--baseline", action="store_true",
+            help="Also run the old one-row-per-request configuration",
+        )
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"[Benchmark] {rows} rows, latency {options['latency']}s/request"
+            )
+        )
+        self.stdout.write("-" * 50)
+
+        configs = []
+        if options["baseline"]:
+            configs.append(("baseline", 1, 1))
+        configs.append(
+            ("pipeline", options["batch_size"], options["workers"])
+        )
+
+        for label, batch_size, workers in configs:
+            client = FakeEmbeddingClient(
+                latency=options["latency"],
+                rate_limit_ratio=options["rate_limit_ratio"],
+            )
+            pipeline = EmbeddingPipeline(
+                client,
+                batch_size=batch_size,
+                workers=workers,
+                chunk_size=options["chunk_size"],
+                base_delay=0.1,
+                write=False,
+            )
+            stats = pipeline.run(self._synthetic_items(rows))
+            self.stdout.write(
+                f"{label:<10} batch={batch_size:<3} workers={workers:<3} "
+                f"requests={client.calls:<6} "
+                f"{stats.elapsed:8.2f}s {stats.rows_per_sec:10.1f} rows/s "
+                f"(failed {stats.failed})"
+            )
+
+        self.stdout.write("-" * 50)
+
+    def _synthetic_items(self, rows):
+        for i in range(rows):
+            text = (
+                f"맛집 이름: 테스트식당{i}, 카테고리: 한식. "
+                f"주소: 서울 강남구 테헤란로 {i}, 전화번호: 없음. "
+                f"평점: {3 + (i % 20) / 10}점."
+            )
+            yield {"place_id": str(i), "name": f"테스트식당{i}"}, text
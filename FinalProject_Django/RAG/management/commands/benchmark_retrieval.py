@@ -0,0 +1,104 @@
+import statistics
+import time
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from RAG import views
+from RAG.hybrid import hybrid_search, matches_filters, parse_query_filters
+from RAG.prompting import build_context
+from RAG.retrieval import search_similar
+
+SAMPLE_QUERIES = [
+    "강남역 근처 파스타 맛집 추천해줘",
+    "홍대 근처 대기 짧은 라멘집",
+    "성수 카페 어디가 좋아?",
+    "마포구 국밥 맛집",
+    "잠실역 근처 초밥 먹고 싶어",
+    "여의도 점심 한식",
+    "이태원 피자",
+    "종로 술집 추천",
+    "을지로 냉면",
+    "판교역 근처 중식",
+]
+
+
+class Command(BaseCommand):
+    help = "Compare pure vector retrieval with hybrid (location/category) retrieval"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--query", action="append", dest="queries",
+            help="Question to benchmark (repeatable, default: built-in samples)",
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        if not views.client:
+            raise CommandError("GEMINI_API_KEY가 설정되지 않았습니다.")
+
+        queries = options["queries"] or SAMPLE_QUERIES
+        self.stdout.write(f"Embedding {len(queries)} queries...")
+        embeddings = [async_to_sync(views.embed_query)(q) for q in queries]
+
+        results = {"vector": [], "hybrid": []}
+        for query, embedding in zip(queries, embeddings, strict=True):
+            intent = parse_query_filters(query)
+
+            vector = self._measure(
+                options["repeat"],
+                lambda e=embedding: search_similar(
+                    e, limit=settings.RAG_RETRIEVAL_LIMIT
+                ),
+            )
+            hybrid = self._measure(
+                options["repeat"],
+                lambda q=query, e=embedding: hybrid_search(q, e)[0],
+            )
+            for mode, (latencies, candidates) in (("vector", vector), ("hybrid", hybrid)):
+                results[mode].append((latencies, candidates, intent))
+
+            _, applied = hybrid_search(query, embedding)
+            self.stdout.write(
+                f"  {query}  [조건: {intent.describe()} / "
+                f"적용: {applied.describe() if applied else '전체 검색'}]"
+            )
+
+        self.stdout.write("-" * 78)
+        self.stdout.write(
+            f"{'mode':<8} {'mean ms':>8} {'p95 ms':>8} {'cands':>6} "
+            f"{'precision':>10} {'context chars':>14}"
+        )
+        for mode, rows in results.items():
+            self._report(mode, rows)
+
+    def _measure(self, repeat, search):
+        latencies = []
+        candidates = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            candidates = search()
+            latencies.append((time.perf_counter() - started) * 1000)
+        return latencies, candidates
+
+    def _report(self, mode, rows):
+        latencies = sorted(ms for row_latencies, _, _ in rows for ms in row_latencies)
+        p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+
+        # 정밀도: 질문에서 읽은 조건(위치/카테고리)을 만족하는 후보 비율
+        precisions = []
+        context_chars = []
+        counts = []
+        for _, candidates, intent in rows:
+            counts.append(len(candidates))
+            context_chars.append(len(build_context(candidates)[0]))
+            if candidates and not intent.is_empty:
+                matched = sum(1 for r in candidates if matches_filters(r, intent))
+                precisions.append(matched / len(candidates))
+
+        precision = statistics.mean(precisions) if precisions else 0.0
+        self.stdout.write(
+            f"{mode:<8} {statistics.mean(latencies):8.1f} {p95:8.1f} "
+            f"{statistics.mean(counts):6.1f} {precision:10.2%} "
+            f"{statistics.mean(context_chars):14.0f}"
+        )
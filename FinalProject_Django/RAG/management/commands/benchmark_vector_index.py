@@ -0,0 +1,155 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from RAG.management.commands.vector_index import create_index_sql, default_lists
+
+BENCH_TABLE = "rag_vector_index_bench"
+
+
+def vector_literal(values):
+    return "[" + ",".join(f"{v:.6f}" for v in values) + "]"
+
+
+class Command(BaseCommand):
+    help = "Compare ANN index recall/latency against exact search on a synthetic corpus"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20000)
+        parser.add_argument("--dimensions", type=int, default=768)
+        parser.add_argument("--queries", type=int, default=50)
+        parser.add_argument("--k", type=int, default=30)
+        parser.add_argument(
+            "--method", choices=["hnsw", "ivfflat", "both"], default="both"
+        )
+        parser.add_argument(
+            "--ef-search", default="40,100,200",
+            help="Comma separated hnsw.ef_search values to try",
+        )
+        parser.add_argument(
+            "--probes", default="1,10,30",
+            help="Comma separated ivfflat.probes values to try",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])  # noqa: S311
+        dims = options["dimensions"]
+        k = options["k"]
+
+        with connections["vectordb"].cursor() as cursor:
+            try:
+                self._seed_corpus(cursor, options["rows"], dims)
+                # 코퍼스 벡터에 노이즈를 더해 "비슷한 질문" 쿼리를 만든다
+                cursor.execute(
+                    f"SELECT embedding::text FROM {BENCH_TABLE} "  # noqa: S608
+                    "ORDER BY random() LIMIT %s",
+                    [options["queries"]],
+                )
+                queries = [
+                    vector_literal(
+                        float(v) + rng.gauss(0, 0.05)
+                        for v in row[0].strip("[]").split(",")
+                    )
+                    for row in cursor.fetchall()
+                ]
+
+                exact, exact_latency = self._run(
+                    cursor, queries, k, {"enable_indexscan": "off"}
+                )
+                self._report("exact (seq scan)", exact_latency, 1.0)
+
+                methods = (
+                    ["hnsw", "ivfflat"] if options["method"] == "both"
+                    else [options["method"]]
+                )
+                for method in methods:
+                    self._bench_method(cursor, method, options, queries, exact)
+            finally:
+                cursor.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+
+    def _seed_corpus(self, cursor, rows, dims):
+        self.stdout.write(f"Seeding {rows} x {dims}-dim synthetic vectors...")
+        cursor.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+        cursor.execute(
+            f"CREATE TABLE {BENCH_TABLE} "
+            f"(id bigserial PRIMARY KEY, embedding vector({int(dims)}))"
+        )
+        # g * 0: 서브쿼리를 바깥 행에 연관시켜 행마다 다른 벡터를 생성
+        cursor.execute(
+            f"""
+            INSERT INTO {BENCH_TABLE} (embedding)
+            SELECT (
+                SELECT array_agg(random() - 0.5 + g * 0)
+                FROM generate_series(1, %s)
+            )::vector
+            FROM generate_series(1, %s) AS g
+            """,  # noqa: S608
+            [dims, rows],
+        )
+        cursor.execute(f"ANALYZE {BENCH_TABLE}")
+
+    def _bench_method(self, cursor, method, options, queries, exact):
+        name = f"{BENCH_TABLE}_{method}_idx"
+        lists = default_lists(options["rows"])
+        started = time.perf_counter()
+        cursor.execute(
+            create_index_sql(
+                BENCH_TABLE, name, method, lists=lists, concurrently=False
+            )
+        )
+        build_time = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(f"\n[{method}] index built in {build_time:.1f}s")
+        )
+
+        if method == "hnsw":
+            param = "hnsw.ef_search"
+            values = options["ef_search"].split(",")
+        else:
+            param = "ivfflat.probes"
+            values = options["probes"].split(",")
+
+        for value in values:
+            results, latency = self._run(
+                cursor, queries, options["k"],
+                {param: value.strip(), "enable_seqscan": "off"},
+            )
+            recall = statistics.mean(
+                len(found & truth) / len(truth)
+                for found, truth in zip(results, exact, strict=True)
+                if truth
+            )
+            self._report(f"{param}={value.strip()}", latency, recall)
+
+        cursor.execute(f"DROP INDEX {name}")
+
+    def _run(self, cursor, queries, k, gucs):
+        results = []
+        latency = []
+        for query in queries:
+            with transaction.atomic(using="vectordb"):
+                for guc, value in gucs.items():
+                    cursor.execute(
+                        "SELECT set_config(%s, %s, true)", [guc, str(value)]
+                    )
+                started = time.perf_counter()
+                cursor.execute(
+                    f"SELECT id FROM {BENCH_TABLE} "  # noqa: S608
+                    "ORDER BY embedding <=> %s::vector LIMIT %s",
+                    [query, k],
+                )
+                ids = {row[0] for row in cursor.fetchall()}
+                latency.append((time.perf_counter() - started) * 1000)
+            results.append(ids)
+        return results, latency
+
+    def _report(self, label, latency, recall):
+        latency = sorted(latency)
+        p95 = latency[int(len(latency) * 0.95) - 1] if latency else 0
+        self.stdout.write(
+            f"{label:<22} recall@k={recall:6.3f}  "
+            f"mean={statistics.mean(latency):7.2f}ms  p95={p95:7.2f}ms"
+        )
@@ -1,56 +1,91 @@
 import os
 
-import google.genai as genai
-import psycopg
 from django.core.management.base import BaseCommand
-from google.genai import types
+from RAG import semantic_cache
+from RAG.embeddings import (
+    MAX_BATCH_SIZE,
+    EmbeddingPipeline,
+    FakeEmbeddingClient,
+    GeminiEmbeddingClient,
+    build_description,
+    description_hash,
+)
 from RAG.models import EmbeddedData
+from RAG.redshift import connect_redshift, redshift_configured
+from RAG.waiting import estimate_waiting_time
 
 
 class Command(BaseCommand):
     help = "Load restaurant data from Redshift and save to EmbeddedData"
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=50,
+            help=f"Texts per embed_content request (max {MAX_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=4,
+            help="Concurrent embedding requests",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=500,
+            help="Rows per bulk_create",
+        )
+        parser.add_argument(
+            "--max-retries", type=int, default=5,
+            help="Retries per batch on rate limit / server errors",
+        )
+        parser.add_argument(
+            "--fake", action="store_true",
+            help="Use the offline fake embedding client (no Gemini calls)",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Embed rows but do not write them to the database",
+        )
+        parser.add_argument(
+            "--full", action="store_true",
+            help="Re-embed every row even if its description hash is unchanged",
+        )
+        parser.add_argument(
+            "--keep-deleted", action="store_true",
+            help="Do not delete places that are no longer in Redshift",
+        )
+
+    def handle(self, *args, **options):
         gemini_api_key = os.getenv("GEMINI_API_KEY")
-        redshift_host = os.getenv("REDSHIFT_HOST")
-        redshift_port = os.getenv("REDSHIFT_PORT")
-        redshift_user = os.getenv("REDSHIFT_USER")
-        redshift_password = os.getenv("REDSHIFT_PASSWORD")
-        redshift_db = os.getenv("REDSHIFT_DB")
 
-        if not gemini_api_key:
+        if not gemini_api_key and not options["fake"]:
             self.stdout.write(self.style.ERROR("GEMINI_API_KEY is missing in .env!"))
             return
 
-        if not all(
-            [
-                redshift_host,
-                redshift_port,
-                redshift_user,
-                redshift_password,
-                redshift_db,
-            ]
-        ):
+        if not redshift_configured():
             self.stdout.write(
                 self.style.ERROR("Redshift connection info is missing in .env!")
             )
             return
 
-        client = genai.Client(api_key=gemini_api_key)
+        if options["fake"]:
+            client = FakeEmbeddingClient()
+        else:
+            client = GeminiEmbeddingClient(api_key=gemini_api_key)
+
+        pipeline = EmbeddingPipeline(
+            client,
+            batch_size=options["batch_size"],
+            workers=options["workers"],
+            chunk_size=options["chunk_size"],
+            max_retries=options["max_retries"],
+            write=not options["dry_run"],
+            on_progress=self._report_progress,
+        )
+
         conn = None
         cursor = None
-        count = 0
+        stats = None
 
         try:
-            conn = psycopg.connect(
-                host=redshift_host,
-                port=redshift_port,
-                user=redshift_user,
-                password=redshift_password,
-                dbname=redshift_db,
-                sslmode="require",
-                client_encoding="UTF8",
-            )
+            conn = connect_redshift()
             cursor = conn.cursor()
             self.stdout.write(self.style.SUCCESS("Connected to Redshift"))
 
@@ -66,78 +101,40 @@ class Command(BaseCommand):
             cursor.execute(query)
             rows = cursor.fetchall()
 
-            for row in rows:
-                (
-                    r_id,
-                    name,
-                    category,
-                    address,
-                    phone,
-                    rating,
-                    img_url,
-                    x,
-                    y,
-                    waiting,
-                ) = row
-
-                if EmbeddedData.objects.filter(name=name).exists():
-                    self.stdout.write(
-                        self.style.WARNING(f"Skipping {name} (Already exists)")
-                    )
-                    continue
-
-                waiting_count = int(waiting) if waiting else 0
-                estimated_time = waiting_count * 10
+            # 기존 place_id -> description_hash 매핑을 한 번의 쿼리로 가져온다
+            existing_hashes = dict(
+                EmbeddedData.objects.values_list("place_id", "description_hash")
+            )
+            seen_ids = set()
+            items = self._iter_changed_items(
+                rows, existing_hashes, seen_ids, options["full"]
+            )
 
-                desc_text = (
-                    f"맛집 이름: {name}, 카테고리: {category}. "
-                    f"현재 대기 팀: {waiting_count}팀, "
-                    f"예상 대기시간: {estimated_time}분. "
-                    f"주소: {address}, 전화번호: {phone or '없음'}. "
-                    f"평점: {rating}점."
-                )
+            stats = pipeline.run(items)
+            self.stdout.write(
+                f"Unchanged: {len(seen_ids) - stats.rows}, "
+                f"re-embedded: {stats.rows}"
+            )
 
-                embedding_vector = None
-                try:
-                    response = client.models.embed_content(
-                        model="text-embedding-004",
-                        contents=desc_text,
-                        config=types.EmbedContentConfig(output_dimensionality=768),
-                    )
-                    # google.genai SDK 응답 객체에서 실제 벡터 값 추출
-                    embedding_vector = response.embeddings[0].values
-                except Exception as e:
-                    self.stdout.write(
-                        self.style.ERROR(f"Error embedding {name}: {e}")
-                    )
-                    continue
-
-                if embedding_vector is None:
-                    continue
-
-                EmbeddedData.objects.create(
-                    place_id=r_id,
-                    name=name,
-                    address=address,
-                    category=category,
-                    phone=phone,
-                    rating=float(rating) if rating else 0.0,
-                    place_url=f"https://place.map.kakao.com/{r_id}" if r_id else "",
-                    img_url=img_url,
-                    x=float(x) if x else None,
-                    y=float(y) if y else None,
-                    # location 필드는 blank/default가 없어서 필수이므로 기본값 설정
-                    location="Unknown",
-                    description=desc_text,
-                    embedding=embedding_vector,
-                    current_waiting_team=waiting_count,
-                    estimated_waiting_time=estimated_time,
-                )
-                count += 1
+            # Redshift에서 사라진 식당 삭제 (원본이 비어 있으면 전체 삭제 방지)
+            stale_ids = set(existing_hashes) - seen_ids
+            if (
+                seen_ids
+                and stale_ids
+                and not options["keep_deleted"]
+                and not options["dry_run"]
+            ):
+                deleted, _ = EmbeddedData.objects.filter(
+                    place_id__in=stale_ids
+                ).delete()
                 self.stdout.write(
-                    self.style.SUCCESS(f"Saved: {name} (Wait: {estimated_time}min)")
+                    self.style.WARNING(f"Deleted {deleted} stale restaurants")
                 )
 
+            # 식당 정보/대기 정보가 바뀌었을 수 있으므로 응답 캐시 정리
+            if not options["dry_run"]:
+                semantic_cache.invalidate_stale()
+
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"Error processing data: {e}"))
         finally:
@@ -145,6 +142,73 @@ class Command(BaseCommand):
                 cursor.close()
             if conn:
                 conn.close()
-            self.stdout.write(
-                self.style.SUCCESS(f"Successfully loaded {count} restaurants!")
+            if stats:
+                if stats.failed:
+                    self.stdout.write(
+                        self.style.WARNING(f"Failed to embed {stats.failed} rows")
+                    )
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Successfully synced {stats.saved} restaurants! "
+                        f"({stats.elapsed:.1f}s, {stats.rows_per_sec:.1f} rows/s)"
+                    )
+                )
+
+    def _iter_changed_items(self, rows, existing_hashes, seen_ids, full):
+        """description 해시가 달라진(또는 새로운) 행만 임베딩 대상으로 넘긴다"""
+        for fields, desc_text in self._iter_items(rows):
+            place_id = fields["place_id"]
+            seen_ids.add(place_id)
+            if not full and existing_hashes.get(place_id) == description_hash(
+                desc_text
+            ):
+                continue
+            yield fields, desc_text
+
+    def _iter_items(self, rows):
+        for row in rows:
+            (
+                r_id,
+                name,
+                category,
+                address,
+                phone,
+                rating,
+                img_url,
+                x,
+                y,
+                waiting,
+            ) = row
+
+            waiting_count = int(waiting) if waiting else 0
+            estimated_time = estimate_waiting_time(waiting_count)
+
+            # 대기 정보는 임베딩 텍스트에서 제외 (refresh_waiting 커맨드가 갱신)
+            desc_text = build_description(name, category, address, rating)
+
+            fields = dict(
+                place_id=str(r_id),
+                name=name,
+                address=address,
+                category=category,
+                phone=phone,
+                rating=float(rating) if rating else 0.0,
+                place_url=f"https://place.map.kakao.com/{r_id}" if r_id else "",
+                img_url=img_url,
+                x=float(x) if x else None,
+                y=float(y) if y else None,
+                # location 필드는 blank/default가 없어서 필수이므로 기본값 설정
+                location="Unknown",
+                description=desc_text,
+                current_waiting_team=waiting_count,
+                estimated_waiting_time=estimated_time,
+            )
+            yield fields, desc_text
+
+    def _report_progress(self, stats):
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Saved {stats.saved} rows "
+                f"({stats.rows_per_sec:.1f} rows/s, failed {stats.failed})"
             )
+        )
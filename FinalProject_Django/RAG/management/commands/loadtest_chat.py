@@ -0,0 +1,169 @@
+import asyncio
+import json
+import logging
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from RAG import views
+from RAG.models import EmbeddedData
+from RAG.prompting import system_prompt_cache
+
+
+class StubGenaiClient:
+    """
+    Gemini 호출을 흉내내는 스텁 (client.aio.models.* 만 구현).
+    네트워크 대기만 asyncio.sleep으로 재현한다.
+    """
+
+    def __init__(self, embed_latency, llm_latency):
+        self.aio = SimpleNamespace(models=self)
+        self.embed_latency = embed_latency
+        self.llm_latency = llm_latency
+
+    async def embed_content(self, **kwargs):
+        await asyncio.sleep(self.embed_latency)
+        return SimpleNamespace(embeddings=[SimpleNamespace(values=[0.0] * 768)])
+
+    async def generate_content(self, **kwargs):
+        await asyncio.sleep(self.llm_latency)
+        text = json.dumps({"restaurant_ID": [1], "answer": "stub answer"})
+        return SimpleNamespace(text=text, usage_metadata=None)
+
+
+def stub_hybrid_search(text, user_embedding, limit=30):
+    # 벡터 검색 DB 왕복을 짧은 블로킹 대기로 재현
+    time.sleep(0.005)
+    restaurants = [
+        EmbeddedData(
+            place_id=str(i), name=f"식당{i}", category="한식",
+            address="서울", rating=4.0, description="",
+        )
+        for i in range(limit)
+    ]
+    return restaurants, None
+
+
+async def noop(*args, **kwargs):
+    return None
+
+
+class Command(BaseCommand):
+    help = "Load-test rag_chat_api with a stubbed LLM: sync workers vs. async"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=100)
+        parser.add_argument(
+            "--workers", type=int, default=5,
+            help="Simulated sync gunicorn workers (cpu*2+1)",
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=50,
+            help="In-flight requests for the async run",
+        )
+        parser.add_argument("--embed-latency", type=float, default=0.2)
+        parser.add_argument("--llm-latency", type=float, default=2.0)
+
+    def handle(self, *args, **options):
+        stub = StubGenaiClient(options["embed_latency"], options["llm_latency"])
+        factory = RequestFactory()
+        n = options["requests"]
+
+        patches = [
+            mock.patch.object(views, "client", stub),
+            mock.patch.object(views, "hybrid_search", stub_hybrid_search),
+            mock.patch.object(views.semantic_cache, "lookup", lambda e: None),
+            mock.patch.object(views, "store_semantic_cache", noop),
+            mock.patch.object(views, "save_chat_history", lambda *args: None),
+            # 스텁에는 컨텍스트 캐시 API가 없으므로 지시문을 직접 보내는 경로로 고정
+            mock.patch.object(system_prompt_cache, "aname", noop),
+        ]
+        for patch in patches:
+            patch.start()
+
+        # 요청별 토큰 로그가 결과 출력을 가리지 않도록 잠시 끈다
+        prompting_logger = logging.getLogger("RAG.prompting")
+        log_level = prompting_logger.level
+        prompting_logger.setLevel(logging.WARNING)
+
+        try:
+            views.query_embedding_cache.clear()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"[Load test] {n} requests, "
+                    f"LLM {options['llm_latency']}s, embed {options['embed_latency']}s"
+                )
+            )
+            self.stdout.write("-" * 50)
+
+            # 질문이 모두 달라야 임베딩 캐시가 결과를 왜곡하지 않음
+            def make_request(i):
+                return factory.post(
+                    "/api/ragchat/",
+                    data=json.dumps({"message": f"부하 테스트 질문 {i}"}),
+                    content_type="application/json",
+                )
+
+            before = self._run_sync_workers(make_request, n, options["workers"])
+            self._report(f"sync  ({options['workers']} workers)", *before)
+
+            views.query_embedding_cache.clear()
+            after = asyncio.run(
+                self._run_async(make_request, n, options["concurrency"])
+            )
+            self._report(f"async (concurrency {options['concurrency']})", *after)
+        finally:
+            for patch in patches:
+                patch.stop()
+            prompting_logger.setLevel(log_level)
+
+        self.stdout.write("-" * 50)
+
+    def _run_sync_workers(self, make_request, n, workers):
+        """
+        sync 워커 모델: 워커 하나가 요청 하나를 끝날 때까지 점유한다.
+        각 스레드가 자기 이벤트 루프에서 뷰를 끝까지 실행하는 방식으로 재현.
+        """
+        local = threading.local()
+
+        def handle(i):
+            if not hasattr(local, "loop"):
+                local.loop = asyncio.new_event_loop()
+            started = time.perf_counter()
+            response = local.loop.run_until_complete(
+                views.rag_chat_api(make_request(i))
+            )
+            return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(handle, range(n)))
+        return time.perf_counter() - started, results
+
+    async def _run_async(self, make_request, n, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def handle(i):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await views.rag_chat_api(make_request(i))
+                return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(handle(i) for i in range(n)))
+        return time.perf_counter() - started, results
+
+    def _report(self, label, elapsed, results):
+        latencies = sorted(latency for latency, _ in results)
+        errors = sum(1 for _, status in results if status != 200)
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(
+            f"{label:<26} {len(results) / elapsed:7.2f} req/s  "
+            f"total {elapsed:6.2f}s  p50 {statistics.median(latencies):5.2f}s  "
+            f"p95 {p95:5.2f}s  errors {errors}"
+        )
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+from RAG.redshift import connect_redshift, redshift_configured
+from RAG.waiting import refresh_waiting
+
+
+class Command(BaseCommand):
+    help = "Refresh realtime waiting numbers on EmbeddedData without re-embedding"
+
+    def handle(self, *args, **kwargs):
+        if not redshift_configured():
+            self.stdout.write(
+                self.style.ERROR("Redshift connection info is missing in .env!")
+            )
+            return
+
+        started = time.perf_counter()
+        conn = None
+        try:
+            conn = connect_redshift()
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT id, waiting FROM analytics.realtime_waiting")
+                waiting_map = {
+                    str(r_id): int(waiting) if waiting else 0
+                    for r_id, waiting in cursor.fetchall()
+                    if r_id
+                }
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"Error reading waiting data: {e}"))
+            return
+        finally:
+            if conn:
+                conn.close()
+
+        if not waiting_map:
+            self.stdout.write(
+                self.style.WARNING("No waiting rows from Redshift; keeping current values")
+            )
+            return
+
+        updated = refresh_waiting(waiting_map)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Refreshed waiting for {updated} restaurants "
+                f"({len(waiting_map)} waiting rows, {elapsed:.2f}s)"
+            )
+        )
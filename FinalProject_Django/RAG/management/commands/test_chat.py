@@ -1,5 +1,6 @@
 import json
 
+from asgiref.sync import async_to_sync
 from django.core.management.base import BaseCommand
 from django.test import RequestFactory
 from RAG.views import rag_chat_api  # 뷰 함수 직접 import
@@ -30,8 +31,9 @@ class Command(BaseCommand):
 
         # 2. View 함수 실행
         # views.py를 수정하지 않고, import해온 함수에 request를 넣어 실행합니다.
+        # (rag_chat_api는 async 뷰이므로 async_to_sync로 감싸서 호출)
         try:
-            response = rag_chat_api(request)
+            response = async_to_sync(rag_chat_api)(request)
 
             # 3. 결과 파싱 및 출력
             if response.status_code == 200:
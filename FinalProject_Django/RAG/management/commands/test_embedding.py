@@ -5,7 +5,9 @@ import google.genai as genai
 from django.conf import settings
 from django.core.management.base import BaseCommand
 from google.genai import types
+from RAG.embeddings import build_description, description_hash
 from RAG.models import EmbeddedData
+from RAG.waiting import estimate_waiting_time
 
 
 class Command(BaseCommand):
@@ -90,15 +92,9 @@ class Command(BaseCommand):
                         continue
 
                     waiting_count = waiting_map[str(r_id)]
-                    estimated_time = waiting_count * 10
-
-                    desc_text = (
-                        f"맛집 이름: {name}, 카테고리: {category}. "
-                        f"현재 대기 팀: {waiting_count}팀, "
-                        f"예상 대기시간: {estimated_time}분. "
-                        f"주소: {address}, 전화번호: {phone or '없음'}. "
-                        f"평점: {rating}점."
-                    )
+                    estimated_time = estimate_waiting_time(waiting_count)
+
+                    desc_text = build_description(name, category, address, rating)
 
                     # Google Gemini 임베딩 생성
                     embedding_vector = None
@@ -131,6 +127,7 @@ class Command(BaseCommand):
                         y=float(y) if y and y != '' else 0.0,
                         location="Unknown",
                         description=desc_text,
+                        description_hash=description_hash(desc_text),
                         embedding=embedding_vector,
                         current_waiting_team=waiting_count,
                         estimated_waiting_time=estimated_time,
@@ -0,0 +1,132 @@
+import math
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from RAG.models import (
+    ANSWER_CACHE_HNSW_INDEX_NAME, HNSW_INDEX_NAME, IVFFLAT_INDEX_NAME,
+    ChatAnswerCache, EmbeddedData,
+)
+
+# 인덱스 대상 -> (모델, 방식별 인덱스 이름). 응답 캐시는 행이 계속 바뀌므로 HNSW만 사용
+TARGETS = {
+    "embedding": (EmbeddedData, {
+        "hnsw": HNSW_INDEX_NAME,
+        "ivfflat": IVFFLAT_INDEX_NAME,
+    }),
+    "answer_cache": (ChatAnswerCache, {
+        "hnsw": ANSWER_CACHE_HNSW_INDEX_NAME,
+    }),
+}
+
+
+def create_index_sql(table, name, method, m=16, ef_construction=64, lists=100,
+                     concurrently=True):
+    """
+    embedding 컬럼용 코사인 ANN 인덱스 생성 SQL.
+    테이블명(RAG_embeddeddata)에 대문자가 있어 따옴표로 감싸야 PostgreSQL이 소문자로 바꾸지 않는다.
+    """
+    qn = connections["vectordb"].ops.quote_name
+    if method == "hnsw":
+        params = f"m = {int(m)}, ef_construction = {int(ef_construction)}"
+    else:
+        params = f"lists = {int(lists)}"
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}"
+        f"IF NOT EXISTS {qn(name)} ON {qn(table)} "
+        f"USING {method} (embedding vector_cosine_ops) WITH ({params})"
+    )
+
+
+def default_lists(row_count):
+    """pgvector 권장값: 100만 행 이하는 rows / 1000, 그 이상은 sqrt(rows)"""
+    if row_count > 1_000_000:
+        return int(math.sqrt(row_count))
+    return max(1, row_count // 1000)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create, drop or inspect the ANN index on EmbeddedData.embedding "
+        "or ChatAnswerCache.embedding (--target answer_cache)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["create", "drop", "status"])
+        parser.add_argument(
+            "--target", choices=list(TARGETS), default="embedding"
+        )
+        parser.add_argument(
+            "--method", choices=["hnsw", "ivfflat"], default="hnsw"
+        )
+        parser.add_argument("--m", type=int, default=16)
+        parser.add_argument("--ef-construction", type=int, default=64)
+        parser.add_argument(
+            "--lists", type=int, default=None,
+            help="IVFFlat lists (default: derived from row count)",
+        )
+        parser.add_argument(
+            "--maintenance-work-mem", default="512MB",
+            help="maintenance_work_mem used while building the index",
+        )
+
+    def handle(self, *args, **options):
+        model, index_names = TARGETS[options["target"]]
+        if options["method"] not in index_names:
+            raise CommandError(
+                f"{options['target']} supports only: {', '.join(index_names)}"
+            )
+        table = model._meta.db_table
+        name = index_names[options["method"]]
+        qn = connections["vectordb"].ops.quote_name
+
+        with connections["vectordb"].cursor() as cursor:
+            if options["action"] == "status":
+                self._status(cursor, table)
+                return
+
+            if options["action"] == "drop":
+                cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {qn(name)}")
+                self.stdout.write(self.style.SUCCESS(f"Dropped index {name}"))
+                return
+
+            lists = options["lists"]
+            if options["method"] == "ivfflat" and lists is None:
+                # IVFFlat은 데이터가 적재된 뒤 만들어야 군집이 의미가 있음
+                row_count = model.objects.count()
+                if row_count == 0:
+                    raise CommandError(
+                        f"{model.__name__} is empty; load embeddings before IVFFlat"
+                    )
+                lists = default_lists(row_count)
+
+            cursor.execute(
+                "SELECT set_config('maintenance_work_mem', %s, false)",
+                [options["maintenance_work_mem"]],
+            )
+            sql = create_index_sql(
+                table, name, options["method"],
+                m=options["m"],
+                ef_construction=options["ef_construction"],
+                lists=lists or 100,
+            )
+            self.stdout.write(sql)
+            cursor.execute(sql)
+            cursor.execute(f"ANALYZE {qn(table)}")
+
+        self.stdout.write(self.style.SUCCESS(f"Created index {name}"))
+
+    def _status(self, cursor, table):
+        cursor.execute(
+            """
+            SELECT indexname, indexdef,
+                   pg_size_pretty(pg_relation_size(indexname::regclass))
+            FROM pg_indexes
+            WHERE tablename = %s AND indexdef LIKE '%%vector_%%_ops%%'
+            """,
+            [table],
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            self.stdout.write(self.style.WARNING("No ANN index on embedding"))
+        for index_name, index_def, size in rows:
+            self.stdout.write(f"{index_name} ({size})\n  {index_def}")
@@ -1,6 +1,13 @@
 from django.db import models
+from django.utils import timezone
 from pgvector.django import VectorField
 
+# 코사인 거리 ANN 인덱스 이름. 인덱스는 manage.py vector_index 커맨드만 관리한다
+# (Meta에 선언하면 vector_index drop/create가 마이그레이션 상태와 어긋남)
+HNSW_INDEX_NAME = "rag_embedding_hnsw_idx"
+IVFFLAT_INDEX_NAME = "rag_embedding_ivfflat_idx"
+ANSWER_CACHE_HNSW_INDEX_NAME = "rag_answer_cache_hnsw_idx"
+
 
 class EmbeddedData(models.Model):
     # 기본 정보
@@ -25,11 +32,34 @@ class EmbeddedData(models.Model):
 
     # RAG 핵심
     description = models.TextField()
+    # description의 sha256. 증분 동기화 시 재임베딩 대상 판별에 사용
+    description_hash = models.CharField(max_length=64, blank=True, default="")
     embedding = VectorField(dimensions=768)
 
     # 실시간/기타
     current_waiting_team = models.IntegerField(default=0)
     estimated_waiting_time = models.IntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            # 하이브리드 검색의 위치 사전 필터 (좌표 범위)
+            models.Index(fields=["y", "x"], name="rag_embedding_geo_idx"),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.rating})"
+
+
+class ChatAnswerCache(models.Model):
+    """의미적으로 비슷한 질문에 재사용하는 RAG 응답 캐시"""
+    query = models.TextField()
+    embedding = VectorField(dimensions=768)
+    # rag_chat_api 응답 본문 (restaurant_ID, answer)
+    response = models.JSONField()
+    # 응답 생성 시점의 추천 식당별 예상 대기시간 {place_id: 분}
+    waiting_snapshot = models.JSONField(default=dict)
+    hit_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.query[:50]} ({self.hit_count} hits)"
@@ -0,0 +1,460 @@
+import hashlib
+import json
+import logging
+import math
+import time
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from google.genai import errors, types
+
+from .embeddings import build_description
+
+logger = logging.getLogger(__name__)
+
+GENERATION_MODEL = "gemini-2.5-flash"
+
+# 요청마다 바뀌지 않는 시스템 지시문 (Gemini 컨텍스트 캐시 대상)
+SYSTEM_INSTRUCTION = (
+    "당신은 '효율'과 '미식'의 균형을 완벽하게 맞추는 "
+    "스마트 맛집 가이드입니다.\n"
+    "현재 시각은 사용자 질문과 함께 주어집니다.\n\n"
+
+    "[참고 정보]는 한 줄에 식당 하나이며 "
+    "'ID | 이름 | 카테고리 | 주소 | 대기 | 평점' 순서입니다.\n"
+    "사용자의 질문과 [참고 정보]를 분석하여 최적의 맛집을 "
+    "**최소 1개에서 최대 3개까지만** 추천하세요.\n"
+    "기본 우선순위는 **'대기시간 >= 카테고리 >= 평점'**이지만, "
+    "기계적인 판단이 아닌 유연한 추천을 해야 합니다.\n\n"
+
+    "**[핵심 판단 기준: '10분의 미학']**\n"
+    "1. **대기 시간 (Primary):** "
+    "기본적으로 대기 시간이 짧을수록 좋습니다. "
+    "하지만 '0분'만 고집하지 마세요.\n"
+    "2. **가치 판단 (The Trade-off):** "
+    "**대기 시간이 10분 내외(5~15분)**라면, "
+    "평점을 확인하세요.\n"
+    "   - **Case A:** "
+    "대기 0분, 평점 3.5점 vs **대기 10분, 평점 4.5점**\n"
+    "     -> **후자(대기 10분)를 강력 추천하세요.** "
+    "10분은 맛있는 음식을 위해 충분히 투자할 만한 시간입니다.\n"
+    "   - **Case B:** "
+    "대기 0분, 평점 4.0점 vs 대기 10분, 평점 4.1점\n"
+    "     -> **전자(대기 0분)를 추천하세요.** "
+    "평점 차이가 크지 않다면 빠른 입장이 낫습니다.\n"
+    "3. **카테고리 (Filter):** "
+    "위 시간/평점 비교는 사용자가 원하는 메뉴(카테고리) 내에서 "
+    "이루어져야 합니다. 엉뚱한 메뉴를 추천하지 마세요.\n\n"
+
+    "**[추천 시나리오 로직]**\n\n"
+    "**시나리오 A: '지금', '바로' 식사 희망**\n"
+    "   - 1순위: 대기 없음(0분) + 고평점(4.0 이상)인 완벽한 곳.\n"
+    "   - 2순위: **대기 약간(10분 내외) + "
+    "초고평점(4.5 이상)인 '기다릴 가치가 있는 곳'.**\n"
+    "   - 3순위: 대기 없음 + 평점 무난(3.0 후반).\n"
+    "   - **주의:** 대기가 30분 이상 넘어가는 곳은 "
+    "사용자가 특별히 '유명한 곳'을 찾지 않는 한 "
+    "후순위로 미루세요.\n\n"
+
+    "**시나리오 B: '미래 시간'(예: 6시) 언급**\n"
+    "   - 도착 시점 기준, **'바로 입장'** 또는 "
+    "**'10분 이내 대기'**가 예상되는 곳을 찾으세요.\n"
+    "   - 여유 시간이 넉넉하다면, "
+    "평소 웨이팅이 있는 인기 맛집을 추천하며 "
+    "'가시는 동안 대기가 빠져서 금방 들어가실 수 있을 거예요'"
+    "라고 제안하세요.\n\n"
+
+    "**[응답 형식 (JSON 포맷 엄수)]**\n"
+    "반드시 아래 JSON 형식으로만 응답하세요. "
+    "다른 말은 덧붙이지 마세요.\n"
+    "{\n"
+    '  "restaurant_ID": [추천 식당 ID 리스트 (정수형, 1~3개)],\n'
+    '  "answer": "합리적인 추천 멘트. '
+    "선정 이유를 설득력 있게 설명할 것. "
+    "(예: '이곳은 10분 정도 대기가 있지만, "
+    "평점이 4.8로 워낙 좋아 기다리실 만한 가치가 있어 "
+    "1순위로 추천드려요!' 또는 "
+    "'배고프실 텐데 바로 입장 가능한 이곳은 어떠세요?').\"\n"
+    "}"
+)
+
+# 구조화 출력 스키마 (JSON 모드). restaurant_ID가 먼저 오도록 순서 고정 (스트리밍 시 버튼 먼저 표시)
+RESPONSE_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    properties={
+        "restaurant_ID": types.Schema(
+            type=types.Type.ARRAY,
+            items=types.Schema(type=types.Type.INTEGER),
+            min_items=1,
+            max_items=3,
+        ),
+        "answer": types.Schema(type=types.Type.STRING),
+    },
+    required=["restaurant_ID", "answer"],
+    property_ordering=["restaurant_ID", "answer"],
+)
+STRUCTURED_OUTPUT = {
+    "response_mime_type": "application/json",
+    "response_schema": RESPONSE_SCHEMA,
+}
+MAX_RECOMMENDATIONS = 3
+
+USAGE_KEYS = {
+    "requests": "rag:tokens:requests",
+    "prompt": "rag:tokens:prompt",
+    "cached": "rag:tokens:cached",
+    "output": "rag:tokens:output",
+}
+OUTPUT_KEYS = {
+    "responses": "rag:llm:responses",
+    "parse_failures": "rag:llm:parse_failures",
+    "invalid_ids": "rag:llm:invalid_ids",
+    "retries": "rag:llm:retries",
+    "fallbacks": "rag:llm:fallbacks",
+}
+# 한국어 기준 대략적인 글자/토큰 비율 (예산 계산용, 실제 값은 usage_metadata로 기록)
+CHARS_PER_TOKEN = 1.5
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _short_category(category):
+    """'음식점 > 한식 > 국밥' -> '한식>국밥'"""
+    parts = [p.strip() for p in category.split(">") if p.strip()]
+    if parts and parts[0] == "음식점":
+        parts = parts[1:]
+    return ">".join(parts) or category
+
+
+def compact_candidate(r):
+    """식당 한 곳을 한 줄로. description이 다른 필드의 반복이면 생략"""
+    line = (
+        f"{r.place_id} | {r.name} | {_short_category(r.category)} | {r.address} | "
+        f"{r.current_waiting_team}팀({r.estimated_waiting_time}분) | {r.rating}"
+    )
+    if r.description and r.description != build_description(
+        r.name, r.category, r.address, r.rating
+    ):
+        line += f" | {r.description[:settings.RAG_CONTEXT_DESCRIPTION_CHARS]}"
+    return line
+
+
+def build_context(similar_restaurants, budget_tokens=None):
+    """
+    검색된 식당 목록으로 LLM 참고 정보 텍스트와 백업 추천 목록 생성.
+    유사도 순으로 넣다가 토큰 예산을 넘거나, 최상위 후보보다 거리가
+    RAG_CONTEXT_DISTANCE_MARGIN 이상 먼 후보가 나오면 멈춘다 (최소 개수는 보장).
+    """
+    if budget_tokens is None:
+        budget_tokens = settings.RAG_CONTEXT_TOKEN_BUDGET
+    min_candidates = settings.RAG_CONTEXT_MIN_CANDIDATES
+
+    context_list = []
+    recommendations_info = []
+    used_tokens = 0
+    best_distance = None
+
+    for r in similar_restaurants:
+        # 대기 정보는 임베딩 텍스트가 아닌, refresh_waiting 커맨드가
+        # 주기적으로 갱신하는 컬럼에서 읽는다
+        line = compact_candidate(r)
+        tokens = estimate_tokens(line)
+
+        if len(context_list) >= min_candidates:
+            if used_tokens + tokens > budget_tokens:
+                break
+            distance = getattr(r, "distance", None)
+            if (
+                distance is not None and best_distance is not None
+                and distance - best_distance > settings.RAG_CONTEXT_DISTANCE_MARGIN
+            ):
+                break
+
+        if best_distance is None:
+            best_distance = getattr(r, "distance", None)
+        context_list.append(line)
+        recommendations_info.append({"restaurant_ID": r.place_id, "name": r.name})
+        used_tokens += tokens
+
+    return "\n".join(context_list), recommendations_info
+
+
+def build_prompt(user_message, context_text):
+    """요청마다 바뀌는 부분 (현재 시각 + 참고 정보 + 사용자 질문)"""
+    current_time_str = datetime.now().strftime("%H:%M")
+
+    return (
+        f"현재 시각: {current_time_str}\n\n"
+        f"[참고 정보]\n{context_text}\n\n"
+        f"사용자 질문: {user_message}"
+    )
+
+
+class SystemPromptCache:
+    """
+    SYSTEM_INSTRUCTION을 Gemini 컨텍스트 캐시(cachedContents)로 올려 두고 이름을 재사용한다.
+    캐시 이름은 RAG 캐시 백엔드로 워커 간 공유하며, 만료 전에 새로 만든다.
+    생성에 실패하면 (최소 토큰 수 미달, 권한 등) 일정 시간 동안 지시문을 직접 보낸다.
+    """
+
+    RETRY_AFTER = 600
+
+    def __init__(self, model, instruction, ttl):
+        self.model = model
+        self.instruction = instruction
+        self.ttl = ttl
+        digest = hashlib.sha256(f"{model}:{instruction}".encode("utf-8")).hexdigest()[:16]
+        self.key = f"rag:gemini:system_cache:{digest}"
+        self._name = None
+        self._expires_at = 0.0
+        self._disabled_until = 0.0
+
+    async def aname(self, client):
+        """사용할 캐시 이름 (사용할 수 없으면 None)"""
+        if not settings.RAG_CONTEXT_CACHE_ENABLED:
+            return None
+        now = time.monotonic()
+        if self._name and now < self._expires_at:
+            return self._name
+        if now < self._disabled_until:
+            return None
+
+        # 만료 1분 전에는 새로 만든 캐시를 쓰도록 공유 캐시 timeout을 짧게 둔다
+        shared_timeout = max(self.ttl - 60, 1)
+        shared = caches[settings.RAG_CACHE_ALIAS]
+        name = await shared.aget(self.key)
+        if name is None:
+            try:
+                cached = await client.aio.caches.create(
+                    model=self.model,
+                    config=types.CreateCachedContentConfig(
+                        display_name="rag-system-instruction",
+                        system_instruction=self.instruction,
+                        ttl=f"{self.ttl}s",
+                    ),
+                )
+            except Exception as e:
+                logger.warning("Gemini context cache unavailable: %s", e)
+                self._disabled_until = now + self.RETRY_AFTER
+                return None
+            name = cached.name
+            await shared.aset(self.key, name, timeout=shared_timeout)
+
+        self._name = name
+        self._expires_at = now + shared_timeout
+        return name
+
+    def invalidate(self):
+        self._name = None
+        self._expires_at = 0.0
+        caches[settings.RAG_CACHE_ALIAS].delete(self.key)
+
+
+system_prompt_cache = SystemPromptCache(
+    GENERATION_MODEL, SYSTEM_INSTRUCTION, settings.RAG_CONTEXT_CACHE_TTL
+)
+
+
+async def _call_with_system_prompt(call, client, contents, **kwargs):
+    """
+    컨텍스트 캐시가 있으면 cached_content로, 없으면 system_instruction으로 지시문을 보낸다.
+    캐시가 만료/삭제되어 호출이 거부되면 캐시를 버리고 지시문을 직접 보내 한 번 더 시도.
+    """
+    cache_name = await system_prompt_cache.aname(client)
+    if cache_name:
+        try:
+            return await call(
+                model=GENERATION_MODEL,
+                contents=contents,
+                config=types.GenerateContentConfig(cached_content=cache_name, **kwargs),
+            )
+        except errors.ClientError as e:
+            logger.warning("Cached system prompt rejected, sending inline: %s", e)
+            await sync_to_async(system_prompt_cache.invalidate)()
+
+    return await call(
+        model=GENERATION_MODEL,
+        contents=contents,
+        config=types.GenerateContentConfig(
+            system_instruction=SYSTEM_INSTRUCTION, **kwargs
+        ),
+    )
+
+
+async def generate(client, contents, **kwargs):
+    return await _call_with_system_prompt(
+        client.aio.models.generate_content, client, contents, **kwargs
+    )
+
+
+async def generate_stream(client, contents, **kwargs):
+    return await _call_with_system_prompt(
+        client.aio.models.generate_content_stream, client, contents, **kwargs
+    )
+
+
+async def _aincr(key, amount):
+    """
+    async 경로용 카운터 증가. DatabaseCache 등 동기 백엔드도 a* 메서드로 호출해야
+    SynchronousOnlyOperation이 나지 않는다. 통계 실패로 채팅 응답을 막지는 않는다.
+    """
+    cache = caches[settings.RAG_CACHE_ALIAS]
+    try:
+        await cache.aadd(key, 0, timeout=None)
+        try:
+            await cache.aincr(key, amount)
+        except ValueError:
+            await cache.aset(key, amount, timeout=None)
+    except Exception as e:
+        logger.warning("LLM stats counter %s not updated: %s", key, e)
+
+
+async def record_usage(usage, started, candidates, context_text, streamed=False):
+    """요청별 토큰 사용량/지연을 로그로 남기고 누적 통계에 더한다"""
+    elapsed = time.perf_counter() - started
+    prompt = getattr(usage, "prompt_token_count", None) or 0
+    cached = getattr(usage, "cached_content_token_count", None) or 0
+    output = getattr(usage, "candidates_token_count", None) or 0
+
+    logger.info(
+        "RAG generation%s: prompt=%d (cached=%d) output=%d tokens, "
+        "candidates=%d, context~%d tokens, %.2fs",
+        " (stream)" if streamed else "", prompt, cached, output,
+        candidates, estimate_tokens(context_text), elapsed,
+    )
+
+    await _aincr(USAGE_KEYS["requests"], 1)
+    await _aincr(USAGE_KEYS["prompt"], prompt)
+    await _aincr(USAGE_KEYS["cached"], cached)
+    await _aincr(USAGE_KEYS["output"], output)
+
+
+def usage_stats():
+    cache = caches[settings.RAG_CACHE_ALIAS]
+    values = {name: cache.get(key, 0) for name, key in USAGE_KEYS.items()}
+    requests = values["requests"]
+    return {
+        **values,
+        "avg_prompt": round(values["prompt"] / requests, 1) if requests else 0.0,
+        "avg_output": round(values["output"] / requests, 1) if requests else 0.0,
+    }
+
+
+class InvalidAnswer(ValueError):
+    """JSON으로는 읽혔지만 스키마/추천 ID 검증에 실패한 응답"""
+
+
+def parse_llm_response(response_text):
+    """LLM 응답을 JSON으로 파싱 (구조화 출력이 아닌 응답에 대비해 ```json 코드 펜스는 제거)"""
+    response_text = (response_text or "").strip()
+
+    if response_text.startswith("```json"):
+        response_text = response_text[7:]
+    if response_text.startswith("```"):
+        response_text = response_text[3:]
+    if response_text.endswith("```"):
+        response_text = response_text[:-3]
+
+    return json.loads(response_text.strip())
+
+
+def filter_ids(restaurant_ids, allowed_ids):
+    """검색된 후보(place_id)에 있는 ID만 순서대로, 중복 없이 최대 3개"""
+    valid = []
+    for restaurant_id in restaurant_ids or []:
+        if str(restaurant_id) in allowed_ids and restaurant_id not in valid:
+            valid.append(restaurant_id)
+    return valid[:MAX_RECOMMENDATIONS]
+
+
+def validate_response(data, allowed_ids):
+    """스키마와 추천 ID를 검증한 응답을 반환 (실패 시 InvalidAnswer)"""
+    if not isinstance(data, dict):
+        raise InvalidAnswer("응답이 JSON 객체가 아닙니다.")
+    answer = data.get("answer")
+    if not isinstance(answer, str) or not answer.strip():
+        raise InvalidAnswer("answer가 비어 있습니다.")
+    ids = data.get("restaurant_ID")
+    if not isinstance(ids, list):
+        raise InvalidAnswer("restaurant_ID가 리스트가 아닙니다.")
+    valid_ids = filter_ids(ids, allowed_ids)
+    if not valid_ids:
+        raise InvalidAnswer(f"검색 결과에 없는 ID입니다: {ids}")
+    return {"restaurant_ID": valid_ids, "answer": answer}
+
+
+def backup_response(response_text, recommendations_info, data=None):
+    """검증 실패 시 검색 상위 3개 식당으로 대체 (읽을 수 있는 answer가 있으면 그대로 사용)"""
+    backup_ids = [r["restaurant_ID"] for r in recommendations_info[:MAX_RECOMMENDATIONS]]
+    answer = response_text
+    if isinstance(data, dict) and isinstance(data.get("answer"), str) and data["answer"]:
+        answer = data["answer"]
+    return {"restaurant_ID": backup_ids, "answer": answer}
+
+
+async def check_response(response_text, allowed_ids):
+    """
+    응답 텍스트를 파싱/검증하고 결과를 통계에 기록한다.
+    반환값: (검증된 응답 또는 None, 파싱된 원본 또는 None)
+    """
+    await _aincr(OUTPUT_KEYS["responses"], 1)
+    try:
+        data = parse_llm_response(response_text)
+    except json.JSONDecodeError as e:
+        await _aincr(OUTPUT_KEYS["parse_failures"], 1)
+        logger.warning("LLM response is not valid JSON: %s", e)
+        return None, None
+    try:
+        return validate_response(data, allowed_ids), data
+    except InvalidAnswer as e:
+        await _aincr(OUTPUT_KEYS["invalid_ids"], 1)
+        logger.warning("LLM response rejected: %s", e)
+        return None, data
+
+
+async def generate_answer(
+    client, full_prompt, recommendations_info, context_text,
+    attempts=None, last_text="", last_data=None,
+):
+    """
+    구조화 출력으로 답변을 생성하고 검증한다.
+    검증에 실패하면 최대 RAG_LLM_MAX_RETRIES번까지 다시 생성하고,
+    그래도 실패하면 검색 상위 식당으로 대체한다.
+    이미 한 번 실패한 응답(스트리밍)이 있으면 last_text/last_data로 넘기고 attempts는 재시도 횟수만.
+    반환값: (응답, 검증 통과 여부)
+    """
+    if attempts is None:
+        attempts = 1 + settings.RAG_LLM_MAX_RETRIES
+    allowed_ids = {str(r["restaurant_ID"]) for r in recommendations_info}
+
+    response_text, data = last_text, last_data
+    for attempt in range(attempts):
+        if attempt or last_text:
+            await _aincr(OUTPUT_KEYS["retries"], 1)
+        started = time.perf_counter()
+        response = await generate(client, full_prompt, **STRUCTURED_OUTPUT)
+        await record_usage(
+            response.usage_metadata, started, len(recommendations_info), context_text
+        )
+        response_text = response.text
+        validated, data = await check_response(response_text, allowed_ids)
+        if validated is not None:
+            return validated, True
+
+    await _aincr(OUTPUT_KEYS["fallbacks"], 1)
+    return backup_response(response_text, recommendations_info, data), False
+
+
+def output_stats():
+    cache = caches[settings.RAG_CACHE_ALIAS]
+    values = {name: cache.get(key, 0) for name, key in OUTPUT_KEYS.items()}
+    responses = values["responses"]
+    failures = values["parse_failures"] + values["invalid_ids"]
+    return {
+        **values,
+        "failure_rate": round(failures / responses, 4) if responses else 0.0,
+    }
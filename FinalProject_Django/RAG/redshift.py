@@ -0,0 +1,29 @@
+import os
+
+import psycopg
+
+REDSHIFT_ENV_VARS = (
+    "REDSHIFT_HOST",
+    "REDSHIFT_PORT",
+    "REDSHIFT_USER",
+    "REDSHIFT_PASSWORD",
+    "REDSHIFT_DB",
+)
+
+
+def redshift_configured():
+    """Redshift 접속 정보가 .env에 모두 있는지 확인"""
+    return all(os.getenv(name) for name in REDSHIFT_ENV_VARS)
+
+
+def connect_redshift():
+    """Redshift 연결 생성 (호출한 쪽에서 close 해야 함)"""
+    return psycopg.connect(
+        host=os.getenv("REDSHIFT_HOST"),
+        port=os.getenv("REDSHIFT_PORT"),
+        user=os.getenv("REDSHIFT_USER"),
+        password=os.getenv("REDSHIFT_PASSWORD"),
+        dbname=os.getenv("REDSHIFT_DB"),
+        sslmode="require",
+        client_encoding="UTF8",
+    )
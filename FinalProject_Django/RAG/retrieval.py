@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.db import connections, transaction
+from pgvector.django import CosineDistance
+
+from .models import EmbeddedData
+
+
+def set_ann_search_params(cursor, limit, filtered=False):
+    """
+    현재 트랜잭션에만 적용되는 ANN 검색 파라미터 설정.
+    HNSW는 ef_search보다 많은 결과를 돌려주지 않으므로 limit 이상으로 맞춘다.
+    filtered=True면 (WHERE 조건이 인덱스 스캔 뒤에 적용되는 검색)
+    ef_search를 키우고 iterative scan으로 조건을 만족하는 행이 찰 때까지 스캔한다.
+    """
+    ef_search = max(settings.RAG_HNSW_EF_SEARCH, limit)
+    params = {"ivfflat.probes": settings.RAG_IVFFLAT_PROBES}
+    if filtered:
+        ef_search = max(settings.RAG_FILTERED_EF_SEARCH, limit)
+        if settings.RAG_ITERATIVE_SCAN:
+            params["hnsw.iterative_scan"] = settings.RAG_ITERATIVE_SCAN
+        if settings.RAG_ITERATIVE_SCAN == "relaxed_order":
+            # IVFFlat은 relaxed_order만 지원
+            params["ivfflat.iterative_scan"] = "relaxed_order"
+    params["hnsw.ef_search"] = ef_search
+
+    cursor.execute(
+        "SELECT " + ", ".join(["set_config(%s, %s, true)"] * len(params)),
+        [str(value) for item in params.items() for value in item],
+    )
+
+
+def search_similar(query_embedding, limit=30, queryset=None):
+    """코사인 거리 기준 상위 limit개 식당 검색 (ANN 인덱스 사용)"""
+    if queryset is None:
+        queryset = EmbeddedData.objects.all()
+    filtered = bool(queryset.query.where)
+
+    with transaction.atomic(using="vectordb"):
+        with connections["vectordb"].cursor() as cursor:
+            set_ann_search_params(cursor, limit, filtered=filtered)
+        results = list(
+            queryset.annotate(
+                distance=CosineDistance("embedding", query_embedding)
+            ).order_by("distance")[:limit]
+        )
+    if filtered and settings.RAG_ITERATIVE_SCAN == "relaxed_order":
+        # relaxed_order는 순서가 조금 어긋날 수 있어 거리로 다시 정렬
+        results.sort(key=lambda r: r.distance)
+    return results
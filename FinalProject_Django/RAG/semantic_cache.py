@@ -0,0 +1,115 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from pgvector.django import CosineDistance
+
+from .models import ChatAnswerCache, EmbeddedData
+from .retrieval import set_ann_search_params
+
+HITS_KEY = "rag:semantic:hits"
+MISSES_KEY = "rag:semantic:misses"
+
+
+def _incr(key):
+    cache = caches[settings.RAG_CACHE_ALIAS]
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def _waiting_map(place_ids):
+    return dict(
+        EmbeddedData.objects.filter(place_id__in=place_ids).values_list(
+            "place_id", "estimated_waiting_time"
+        )
+    )
+
+
+def lookup(query_embedding):
+    """
+    코사인 거리가 임계값 이내인 최근 응답이 있으면 그 응답을 반환한다.
+    대기 정보가 바뀐 응답은 refresh_waiting 주기마다 invalidate_stale()로 지워진다.
+    """
+    if not settings.RAG_SEMANTIC_CACHE_ENABLED:
+        return None
+
+    cutoff = timezone.now() - timedelta(seconds=settings.RAG_SEMANTIC_CACHE_TTL)
+    with transaction.atomic(using="vectordb"):
+        with connections["vectordb"].cursor() as cursor:
+            # created_at 조건은 HNSW 스캔 뒤에 적용되므로 iterative scan으로 만료되지 않은 행을 찾는다
+            set_ann_search_params(cursor, 1, filtered=True)
+        entry = (
+            ChatAnswerCache.objects.filter(created_at__gte=cutoff)
+            .annotate(distance=CosineDistance("embedding", query_embedding))
+            .order_by("distance")
+            .first()
+        )
+
+    if entry is None or entry.distance > settings.RAG_SEMANTIC_CACHE_THRESHOLD:
+        _incr(MISSES_KEY)
+        return None
+
+    ChatAnswerCache.objects.filter(pk=entry.pk).update(hit_count=F("hit_count") + 1)
+    _incr(HITS_KEY)
+    return entry.response
+
+
+def store(query, query_embedding, response):
+    """LLM 응답과 추천 식당의 현재 대기시간 스냅샷을 저장"""
+    if not settings.RAG_SEMANTIC_CACHE_ENABLED:
+        return None
+
+    place_ids = [str(pid) for pid in response.get("restaurant_ID", [])]
+    return ChatAnswerCache.objects.create(
+        query=query,
+        embedding=query_embedding,
+        response=response,
+        waiting_snapshot=_waiting_map(place_ids),
+    )
+
+
+def invalidate_stale():
+    """
+    대기 정보 갱신 직후 호출.
+    만료(TTL)된 응답과, 추천 식당의 대기시간이 허용치 이상 바뀐 응답을 삭제한다.
+    반환값: 삭제된 응답 수
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.RAG_SEMANTIC_CACHE_TTL)
+    deleted, _ = ChatAnswerCache.objects.filter(created_at__lt=cutoff).delete()
+
+    entries = list(ChatAnswerCache.objects.values_list("pk", "waiting_snapshot"))
+    place_ids = {pid for _, snapshot in entries for pid in snapshot}
+    current = _waiting_map(place_ids)
+    tolerance = settings.RAG_SEMANTIC_CACHE_WAIT_TOLERANCE
+
+    stale_pks = [
+        pk
+        for pk, snapshot in entries
+        if any(
+            abs(current.get(pid, 0) - minutes) > tolerance
+            for pid, minutes in snapshot.items()
+        )
+    ]
+    if stale_pks:
+        stale_deleted, _ = ChatAnswerCache.objects.filter(pk__in=stale_pks).delete()
+        deleted += stale_deleted
+    return deleted
+
+
+def stats():
+    cache = caches[settings.RAG_CACHE_ALIAS]
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else 0.0,
+        "threshold": settings.RAG_SEMANTIC_CACHE_THRESHOLD,
+    }
@@ -0,0 +1,105 @@
+from django.conf import settings
+from django.core.cache import caches
+from main.models import Restaurant
+
+from .models import EmbeddedData
+from .retrieval import search_similar
+
+# 재정렬할 때 임베딩 유사도 상위 limit * RERANK_POOL개를 후보로 가져온다
+RERANK_POOL = 4
+# 재정렬 점수 = 유사도 + REC_WEIGHT * rec_balanced(후보 내 정규화) - WAIT_WEIGHT * 대기(정규화)
+REC_WEIGHT = 0.2
+WAIT_WEIGHT = 0.1
+# 이 시간(분) 이상 대기는 같은 감점
+WAIT_CAP_MINUTES = 60
+MAX_LIMIT = 20
+
+
+def place_id_for(restaurant_id):
+    """
+    Restaurant.restaurant_ID -> EmbeddedData.place_id.
+    둘 다 카카오 장소 ID이며 place_id는 embedding 커맨드가 str(id)로 저장한다.
+    숫자가 아니면 ValueError
+    """
+    return str(int(str(restaurant_id).strip()))
+
+
+def restaurant_id_for(place_id):
+    """EmbeddedData.place_id -> Restaurant.restaurant_ID (숫자가 아니면 None)"""
+    try:
+        return int(place_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def rerank(candidates, rec_scores):
+    """
+    유사도 순 후보를 rec_balanced(높을수록 가산)와 예상 대기시간(길수록 감점)으로 다시 정렬.
+    candidates: similar_row() 목록, rec_scores: restaurant_ID -> rec_balanced
+    """
+    known = [score for score in rec_scores.values() if score is not None]
+    low, high = (min(known), max(known)) if known else (0, 0)
+    span = (high - low) or 1
+
+    def score(row):
+        rec = rec_scores.get(row["restaurant_ID"])
+        rec_norm = (rec - low) / span if rec is not None else 0
+        wait_norm = min(row["estimated_waiting_time"], WAIT_CAP_MINUTES) / WAIT_CAP_MINUTES
+        return row["similarity"] + REC_WEIGHT * rec_norm - WAIT_WEIGHT * wait_norm
+
+    for row in candidates:
+        row["rec_balanced"] = rec_scores.get(row["restaurant_ID"])
+    return sorted(candidates, key=score, reverse=True)
+
+
+def similar_row(r):
+    return {
+        "restaurant_ID": restaurant_id_for(r.place_id) or r.place_id,
+        "name": r.name,
+        "category": r.category,
+        "rating": r.rating,
+        "image_url": r.img_url,
+        "similarity": round(1 - r.distance, 4),
+        "estimated_waiting_time": r.estimated_waiting_time,
+    }
+
+
+def similar_places(restaurant_id, limit=5, rerank_results=False):
+    """
+    식당 자신의 임베딩으로 k-NN 검색 (HNSW/IVFFlat 인덱스).
+    rerank_results면 후보를 넉넉히 가져와 rec_balanced/대기시간으로 다시 정렬한다.
+    결과는 식당별로 RAG_SIMILAR_CACHE_TTL초 동안 캐시. 임베딩이 없으면 EmbeddedData.DoesNotExist
+    """
+    place_id = place_id_for(restaurant_id)
+    cache = caches[settings.RAG_CACHE_ALIAS]
+    key = f"rag:similar:{place_id}:{limit}:{int(rerank_results)}"
+    results = cache.get(key)
+    if results is not None:
+        return results
+
+    embedding = EmbeddedData.objects.filter(place_id=place_id).values_list(
+        "embedding", flat=True
+    ).first()
+    if embedding is None:
+        raise EmbeddedData.DoesNotExist(place_id)
+
+    fetch = limit * RERANK_POOL if rerank_results else limit
+    neighbors = search_similar(
+        embedding, limit=fetch,
+        queryset=EmbeddedData.objects.exclude(place_id=place_id),
+    )
+    results = [similar_row(r) for r in neighbors]
+
+    if rerank_results:
+        rec_scores = dict(
+            Restaurant.objects.filter(
+                restaurant_ID__in=[
+                    row["restaurant_ID"] for row in results
+                    if isinstance(row["restaurant_ID"], int)
+                ]
+            ).values_list("restaurant_ID", "rec_balanced")
+        )
+        results = rerank(results, rec_scores)[:limit]
+
+    cache.set(key, results, settings.RAG_SIMILAR_CACHE_TTL)
+    return results
@@ -0,0 +1,138 @@
+import json
+import re
+
+_IDS_RE = re.compile(r'"restaurant_ID"\s*:\s*(\[[^\]]*\])')
+_ANSWER_START_RE = re.compile(r'"answer"\s*:\s*"')
+_SIMPLE_ESCAPES = {
+    '"': '"', "\\": "\\", "/": "/",
+    "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t",
+}
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+# 잘못된 \u 이스케이프나 짝이 없는 서로게이트 대신 내보낼 문자
+REPLACEMENT_CHAR = "\ufffd"
+
+
+def _hex_prefix(digits):
+    """
+    \\u 뒤에 온 (최대 4자) 문자열 검사.
+    반환값: 완성된 코드 포인트, 아직 모자라면 -1, 16진수가 아니면 None
+    """
+    if not all(c in _HEX_DIGITS for c in digits):
+        return None
+    if len(digits) < 4:
+        return -1
+    return int(digits, 16)
+
+
+def sse_event(event, data):
+    """Server-Sent Events 한 건을 직렬화"""
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+class StreamingAnswerParser:
+    """
+    LLM이 스트리밍하는 JSON 응답({"restaurant_ID": [...], "answer": "..."})을
+    조각 단위로 읽어 이벤트로 바꾼다.
+    - restaurant_ID 배열이 완성되면 ('ids', {...}) 한 번
+    - answer 문자열이 도착하는 대로 JSON 이스케이프를 풀어 ('token', {...})
+    ```json 코드 펜스는 정규식 매칭이라 별도 처리 없이 건너뛴다.
+    전체 원문은 self.text에 남아 최종 파싱(parse_llm_response)에 사용한다.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._ids_sent = False
+        self._answer_pos = None  # answer 문자열 내부에서 다음에 읽을 위치
+        self._answer_done = False
+
+    def feed(self, chunk):
+        self.text += chunk
+        events = []
+
+        if not self._ids_sent:
+            match = _IDS_RE.search(self.text)
+            if match:
+                try:
+                    ids = json.loads(match.group(1))
+                except json.JSONDecodeError:
+                    ids = None
+                if ids is not None:
+                    self._ids_sent = True
+                    events.append(("ids", {"restaurant_ID": ids}))
+
+        if self._answer_pos is None:
+            match = _ANSWER_START_RE.search(self.text)
+            if match:
+                self._answer_pos = match.end()
+
+        if self._answer_pos is not None and not self._answer_done:
+            decoded = self._decode_answer()
+            if decoded:
+                events.append(("token", {"text": decoded}))
+
+        return events
+
+    def _decode_answer(self):
+        """answer 문자열에서 지금까지 도착한 부분을 디코딩 (불완전한 이스케이프는 대기)"""
+        out = []
+        text = self.text
+        pos = self._answer_pos
+
+        while pos < len(text):
+            ch = text[pos]
+            if ch == '"':
+                self._answer_done = True
+                pos += 1
+                break
+            if ch != "\\":
+                out.append(ch)
+                pos += 1
+                continue
+
+            if pos + 1 >= len(text):
+                break
+            esc = text[pos + 1]
+            if esc == "u":
+                code = _hex_prefix(text[pos + 2:pos + 6])
+                if code == -1:
+                    break
+                if code is None:
+                    # 잘못된 이스케이프는 대체 문자로 바꾸고 "\\u" 뒤부터 그대로 읽는다
+                    out.append(REPLACEMENT_CHAR)
+                    pos += 2
+                    continue
+                if 0xD800 <= code <= 0xDBFF:
+                    # 서로게이트 쌍(\\uD83D\\uDE00)은 두 번째 절반까지 기다린다
+                    low = self._low_surrogate(text, pos + 6)
+                    if low == -1:
+                        break
+                    if low is None:
+                        out.append(REPLACEMENT_CHAR)
+                        pos += 6
+                        continue
+                    code = 0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)
+                    pos += 6
+                elif 0xDC00 <= code <= 0xDFFF:
+                    code = ord(REPLACEMENT_CHAR)
+                out.append(chr(code))
+                pos += 6
+            else:
+                out.append(_SIMPLE_ESCAPES.get(esc, esc))
+                pos += 2
+
+        self._answer_pos = pos
+        return "".join(out)
+
+    @staticmethod
+    def _low_surrogate(text, pos):
+        """pos에서 시작하는 \\uDC00-\\uDFFF 값. 아직 모자라면 -1, 아니면 None"""
+        prefix = text[pos:pos + 2]
+        if not "\\u".startswith(prefix):
+            return None
+        if len(prefix) < 2:
+            return -1
+        low = _hex_prefix(text[pos + 2:pos + 6])
+        if low is None or low == -1:
+            return low
+        return low if 0xDC00 <= low <= 0xDFFF else None
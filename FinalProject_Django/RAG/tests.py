@@ -1,10 +1,36 @@
 import json
+import os
+import tempfile
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-from django.core.management import call_command
-from django.test import Client, TestCase
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connections
+from django.test import Client, SimpleTestCase, TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.asyncio import async_unsafe
 
-from RAG.models import EmbeddedData
+from RAG.cache import QueryEmbeddingCache
+from RAG.embeddings import EmbeddingPipeline, FakeEmbeddingClient, build_description
+from RAG.history import ChatHistoryBuffer
+from RAG.hybrid import hybrid_search, parse_query_filters, relaxations
+from RAG.management.commands.vector_index import create_index_sql
+from RAG import semantic_cache
+from RAG.models import ChatAnswerCache, EmbeddedData
+from main.models import ChatHistory
+from RAG.prompting import (
+    build_context, generate_answer, output_stats, system_prompt_cache,
+    usage_stats, validate_response,
+)
+from RAG.retrieval import set_ann_search_params
+from RAG.similar import place_id_for, rerank
+from RAG.streaming import StreamingAnswerParser
+from RAG.waiting import refresh_waiting
 
 
 class RagApiTest(TestCase):
@@ -59,3 +85,473 @@ class RagApiTest(TestCase):
                 print(f"Recommended items exist in DB: {exists}")
 
         print("-" * 50)
+
+
+class EmbeddingPipelineTest(SimpleTestCase):
+    """가짜 임베딩 클라이언트로 배치/재시도 파이프라인 확인 (DB 미사용)"""
+
+    def test_batches_and_retries(self):
+        client = FakeEmbeddingClient(latency=0, rate_limit_ratio=0.2)
+        pipeline = EmbeddingPipeline(
+            client, batch_size=10, workers=3, chunk_size=25,
+            max_retries=20, base_delay=0, write=False,
+        )
+        items = (({'place_id': str(i)}, f'식당 {i}') for i in range(95))
+
+        stats = pipeline.run(items)
+
+        self.assertEqual(stats.rows, 95)
+        self.assertEqual(stats.embedded, 95)
+        self.assertEqual(stats.saved, 95)
+        self.assertEqual(stats.failed, 0)
+        self.assertGreaterEqual(client.calls, 10)
+
+
+class QueryEmbeddingCacheTest(SimpleTestCase):
+    """정규화된 질문 기준 임베딩 캐시 적중 확인"""
+
+    def test_normalized_queries_share_entry(self):
+        cache = QueryEmbeddingCache('test', max_size=2, ttl=60)
+        calls = []
+
+        def embed(text):
+            calls.append(text)
+            return [0.1, 0.2]
+
+        cache.get_or_embed('강남역 근처 맛집 추천해줘', embed)
+        cache.get_or_embed('  강남역  근처 맛집 추천해줘?', embed)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()['hits_local'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_lru_eviction(self):
+        cache = QueryEmbeddingCache('test', max_size=2, ttl=60)
+        for text in ['a', 'b', 'c']:
+            cache.get_or_embed(text, lambda t: [1.0])
+
+        self.assertEqual(cache.stats()['local_size'], 2)
+        cache.get_or_embed('a', lambda t: [1.0])
+        self.assertEqual(cache.stats()['misses'], 4)
+
+
+class StreamingAnswerParserTest(SimpleTestCase):
+    """조각난 JSON 스트림에서 ID/답변 토큰 이벤트 추출 확인"""
+
+    def test_events_from_fenced_chunks(self):
+        body = json.dumps(
+            {'restaurant_ID': [123, 456], 'answer': '바로 입장 가능한 "이곳"\n추천 😀'}
+        )
+        full_text = f'```json\n{body}\n```'
+        parser = StreamingAnswerParser()
+
+        events = []
+        for i in range(0, len(full_text), 3):
+            events.extend(parser.feed(full_text[i:i + 3]))
+
+        ids_events = [payload for event, payload in events if event == 'ids']
+        answer = ''.join(payload['text'] for event, payload in events if event == 'token')
+
+        self.assertEqual(ids_events, [{'restaurant_ID': [123, 456]}])
+        self.assertEqual(answer, '바로 입장 가능한 "이곳"\n추천 😀')
+        self.assertEqual(parser.text, full_text)
+
+    def feed_by_char(self, full_text):
+        parser = StreamingAnswerParser()
+        events = []
+        for ch in full_text:
+            events.extend(parser.feed(ch))
+        return ''.join(payload['text'] for event, payload in events if event == 'token')
+
+    def test_split_and_malformed_unicode_escapes(self):
+        # 한 글자씩 나눠 도착해도 이스케이프와 서로게이트 쌍이 온전히 풀린다
+        self.assertEqual(
+            self.feed_by_char(r'{"answer": "caf\u00e9 \ud83d\ude00!"}'), 'café 😀!'
+        )
+        # 잘못된 \u, 짝 없는 서로게이트는 U+FFFD로 바꾸고 스트림을 계속한다
+        self.assertEqual(
+            self.feed_by_char(r'{"answer": "a\uZZ12b\ud83dc\ude00d\ud83d\u0041e\u12"}'),
+            'a\ufffdZZ12b\ufffdc\ufffdd\ufffdAe\ufffd12',
+        )
+
+
+class QueryFilterParsingTest(SimpleTestCase):
+    """하이브리드 검색용 질문 조건 추출 확인"""
+
+    def test_landmark_and_category(self):
+        filters = parse_query_filters("강남역 근처 파스타 맛집 추천해줘")
+
+        self.assertEqual(filters.landmark, "강남역")
+        self.assertEqual(filters.categories, ["양식", "파스타"])
+        # 조건이 부족하면 카테고리 -> 위치 순으로 완화
+        steps = relaxations(filters)
+        self.assertEqual([s.describe() for s in steps[1:]], ["강남역 1500m", "양식, 파스타"])
+
+    def test_district_is_not_parsed_as_landmark(self):
+        filters = parse_query_filters("강남구 국밥")
+
+        self.assertEqual(filters.districts, ["강남구"])
+        self.assertIsNone(filters.center)
+
+    def test_no_filters(self):
+        self.assertTrue(parse_query_filters("요즘 인기 있는 곳 알려줘").is_empty)
+
+
+class FilteredAnnSearchTest(SimpleTestCase):
+    """조건이 붙은 벡터 검색의 ANN 파라미터와 조건 완화 로그 확인"""
+
+    def ann_params(self, **kwargs):
+        cursor = mock.Mock()
+        set_ann_search_params(cursor, **kwargs)
+        values = cursor.execute.call_args.args[1]
+        return dict(zip(values[::2], values[1::2], strict=True))
+
+    @override_settings(
+        RAG_HNSW_EF_SEARCH=40, RAG_FILTERED_EF_SEARCH=200,
+        RAG_ITERATIVE_SCAN="relaxed_order",
+    )
+    def test_filtered_search_scans_iteratively(self):
+        self.assertEqual(self.ann_params(limit=10)["hnsw.ef_search"], "40")
+        self.assertNotIn("hnsw.iterative_scan", self.ann_params(limit=10))
+
+        params = self.ann_params(limit=10, filtered=True)
+        self.assertEqual(params["hnsw.ef_search"], "200")
+        self.assertEqual(params["hnsw.iterative_scan"], "relaxed_order")
+        self.assertEqual(params["ivfflat.iterative_scan"], "relaxed_order")
+
+    @override_settings(RAG_ITERATIVE_SCAN="")
+    def test_iterative_scan_can_be_disabled(self):
+        self.assertNotIn("hnsw.iterative_scan", self.ann_params(limit=10, filtered=True))
+
+    def test_fallback_to_unfiltered_search_is_logged(self):
+        with mock.patch("RAG.hybrid.search_similar", return_value=[]) as search, \
+                self.assertLogs("RAG.hybrid", "WARNING") as logs:
+            candidates, applied = hybrid_search("강남역 파스타", [0.0])
+
+        self.assertEqual((candidates, applied), ([], None))
+        # 전체 조건 -> 카테고리 제외 -> 위치 제외 -> 필터 없는 검색
+        self.assertEqual(search.call_count, 4)
+        self.assertIn("falling back", logs.output[0])
+
+
+class PromptContextBudgetTest(SimpleTestCase):
+    """참고 정보 압축과 후보 수 조절 확인"""
+
+    def make_restaurant(self, i, distance):
+        r = EmbeddedData(
+            place_id=str(i), name=f"식당{i}", category="음식점 > 한식 > 국밥",
+            address="서울 강남구", rating=4.0, current_waiting_team=1,
+            estimated_waiting_time=10,
+        )
+        r.description = build_description(r.name, r.category, r.address, r.rating)
+        r.distance = distance
+        return r
+
+    def test_description_is_not_repeated(self):
+        context, _ = build_context([self.make_restaurant(1, 0.1)])
+
+        self.assertEqual(context, "1 | 식당1 | 한식>국밥 | 서울 강남구 | 1팀(10분) | 4.0")
+
+    @override_settings(RAG_CONTEXT_MIN_CANDIDATES=3, RAG_CONTEXT_DISTANCE_MARGIN=0.15)
+    def test_candidates_trimmed_by_distance_and_budget(self):
+        restaurants = [self.make_restaurant(i, 0.1 + i * 0.05) for i in range(10)]
+
+        _, info = build_context(restaurants)
+        # 0.10 ~ 0.25 (최상위 대비 0.15 이내)
+        self.assertEqual(len(info), 4)
+
+        # 예산이 작아도 최소 후보 수는 유지
+        _, info = build_context(restaurants, budget_tokens=1)
+        self.assertEqual(len(info), 3)
+
+
+class StructuredAnswerTest(SimpleTestCase):
+    """구조화 출력 검증과 제한된 재시도 확인"""
+
+    recommendations = [
+        {"restaurant_ID": "11", "name": "가"},
+        {"restaurant_ID": "22", "name": "나"},
+        {"restaurant_ID": "33", "name": "다"},
+        {"restaurant_ID": "44", "name": "라"},
+    ]
+
+    class FakeModels:
+        def __init__(self, texts):
+            self.texts = list(texts)
+            self.configs = []
+
+        async def generate_content(self, model, contents, config):
+            self.configs.append(config)
+            return SimpleNamespace(
+                text=self.texts.pop(0),
+                usage_metadata=SimpleNamespace(
+                    prompt_token_count=100, cached_content_token_count=80,
+                    candidates_token_count=20,
+                ),
+            )
+
+    def run_answer(self, texts):
+        models = self.FakeModels(texts)
+        client = SimpleNamespace(aio=SimpleNamespace(models=models))
+        with mock.patch.object(system_prompt_cache, "aname", return_value=None):
+            result = async_to_sync(generate_answer)(
+                client, "prompt", self.recommendations, "context"
+            )
+        return result, models
+
+    def test_unknown_ids_are_dropped(self):
+        self.assertEqual(
+            validate_response(
+                {"restaurant_ID": [22, 99, 22], "answer": "추천"}, {"11", "22"}
+            ),
+            {"restaurant_ID": [22], "answer": "추천"},
+        )
+
+    @override_settings(RAG_LLM_MAX_RETRIES=1)
+    def test_retry_then_success(self):
+        (data, validated), models = self.run_answer([
+            "not json",
+            json.dumps({"restaurant_ID": [33], "answer": "다 추천"}),
+        ])
+
+        self.assertTrue(validated)
+        self.assertEqual(data, {"restaurant_ID": [33], "answer": "다 추천"})
+        self.assertEqual(models.configs[0].response_mime_type, "application/json")
+
+    @override_settings(RAG_LLM_MAX_RETRIES=1)
+    def test_fallback_after_retries(self):
+        (data, validated), _ = self.run_answer([
+            json.dumps({"restaurant_ID": [99], "answer": "없는 식당"}),
+            json.dumps({"restaurant_ID": [98], "answer": "없는 식당"}),
+        ])
+
+        self.assertFalse(validated)
+        self.assertEqual(data["restaurant_ID"], ["11", "22", "33"])
+        self.assertEqual(data["answer"], "없는 식당")
+
+    def test_stats_use_async_cache_api(self):
+        # DatabaseCache처럼 이벤트 루프 안의 동기 호출을 막는 백엔드 흉내
+        cache = caches[settings.RAG_CACHE_ALIAS]
+        guarded = {
+            name: async_unsafe(getattr(cache, name)) for name in ("add", "incr", "set")
+        }
+        before = output_stats()["responses"]
+        usage_before = usage_stats()
+        with mock.patch.multiple(cache, **guarded):
+            (_, validated), _ = self.run_answer([
+                json.dumps({"restaurant_ID": [11], "answer": "가 추천"}),
+            ])
+
+        self.assertTrue(validated)
+        self.assertEqual(output_stats()["responses"], before + 1)
+        usage = usage_stats()
+        self.assertEqual(usage["requests"], usage_before["requests"] + 1)
+        self.assertEqual(usage["cached"], usage_before["cached"] + 80)
+
+
+class ChatHistoryBufferTest(TestCase):
+    """채팅 기록 write-behind 버퍼의 배치 저장과 스풀 재처리 확인"""
+
+    def setUp(self):
+        spool = tempfile.TemporaryDirectory()
+        self.addCleanup(spool.cleanup)
+        self.buffer = ChatHistoryBuffer(
+            batch_size=2, spool_dir=spool.name, background=False
+        )
+
+    def test_flushes_every_batch_size(self):
+        self.buffer.add("질문1", "답변1")
+        self.assertEqual(ChatHistory.objects.count(), 0)
+
+        self.buffer.add("질문2", "답변2")
+        self.assertEqual(ChatHistory.objects.count(), 2)
+
+    def test_spooled_records_are_replayed(self):
+        with mock.patch.object(
+            ChatHistory.objects, "bulk_create", side_effect=DatabaseError("down")
+        ):
+            self.buffer.add("질문1", "답변1")
+            self.buffer.flush()
+        self.assertEqual(ChatHistory.objects.count(), 0)
+        self.assertEqual(len(list(self.buffer.spool_dir.iterdir())), 1)
+
+        # DB가 돌아오면 다음 저장 때 스풀 파일부터 저장
+        self.buffer.add("질문2", "답변2")
+        self.buffer.flush()
+        self.assertEqual(
+            sorted(ChatHistory.objects.values_list("query", flat=True)),
+            ["질문1", "질문2"],
+        )
+        self.assertEqual(list(self.buffer.spool_dir.iterdir()), [])
+
+    def write_spool(self, name, query, age=0):
+        path = self.buffer.spool_dir / name
+        path.write_text(json.dumps(
+            {"query": query, "answer": "답변", "created_at": "2025-01-01T00:00:00+00:00"},
+            ensure_ascii=False,
+        ) + "\n", encoding="utf-8")
+        if age:
+            mtime = path.stat().st_mtime - age
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def test_files_claimed_by_crashed_workers_are_replayed(self):
+        # 재처리 도중 죽은 워커(dead)와, 살아 있지만 PID가 재사용됐을 수 있는 오래된 선점 파일(stale)
+        self.write_spool("chat_history.111.jsonl.replaying.111", "dead")
+        self.write_spool("chat_history.222.jsonl.replaying.222", "stale", age=600)
+        self.write_spool("chat_history.333.jsonl.replaying.333", "busy")
+        alive = {222, 333}
+        with mock.patch("RAG.history._pid_alive", side_effect=lambda pid: pid in alive):
+            self.buffer.flush()
+
+        self.assertEqual(
+            sorted(ChatHistory.objects.values_list("query", flat=True)), ["dead", "stale"]
+        )
+        self.assertEqual(
+            [p.name for p in self.buffer.spool_dir.iterdir()],
+            ["chat_history.333.jsonl.replaying.333"],
+        )
+
+    def test_add_after_close_is_spooled(self):
+        self.buffer.close()
+        self.buffer.add("질문", "답변")
+
+        self.assertEqual(ChatHistory.objects.count(), 0)
+        self.buffer.flush()
+        self.assertEqual(list(ChatHistory.objects.values_list("query", flat=True)), ["질문"])
+
+
+class EmbeddingSimilarityTest(SimpleTestCase):
+    """임베딩 기반 비슷한 식당: ID 매핑, 재정렬, 입력 검증"""
+
+    def test_place_id_mapping(self):
+        self.assertEqual(place_id_for(12345), "12345")
+        self.assertEqual(place_id_for(" 12345"), "12345")
+        with self.assertRaises(ValueError):
+            place_id_for("abc")
+
+    def test_rerank_prefers_high_rec_and_short_wait(self):
+        candidates = [
+            {"restaurant_ID": 1, "similarity": 0.90, "estimated_waiting_time": 60},
+            {"restaurant_ID": 2, "similarity": 0.88, "estimated_waiting_time": 0},
+            {"restaurant_ID": 3, "similarity": 0.89, "estimated_waiting_time": 0},
+        ]
+        ranked = rerank(candidates, {1: 0.5, 2: 0.9, 3: None})
+        self.assertEqual([r["restaurant_ID"] for r in ranked], [2, 3, 1])
+        self.assertEqual(ranked[0]["rec_balanced"], 0.9)
+
+    def test_api_validates_params(self):
+        url = reverse("main:get_embedding_similar_restaurants", args=["abc"])
+        self.assertEqual(Client().get(url).status_code, 400)
+        url = reverse("main:get_embedding_similar_restaurants", args=["1"])
+        self.assertEqual(Client().get(url, {"limit": "0"}).status_code, 400)
+
+
+class RefreshWaitingTest(SimpleTestCase):
+    """실시간 대기 정보 갱신 확인"""
+
+    def test_empty_map_does_not_reset_waiting(self):
+        with mock.patch("RAG.waiting.connections") as conns, \
+                mock.patch("RAG.waiting.semantic_cache.invalidate_stale") as invalidate, \
+                self.assertLogs("RAG.waiting", "WARNING"):
+            self.assertEqual(refresh_waiting({}), 0)
+
+        conns.__getitem__.assert_not_called()
+        invalidate.assert_not_called()
+
+    def test_updates_quoted_table_and_invalidates_cache(self):
+        cursor = mock.MagicMock(rowcount=1)
+        connection = mock.MagicMock()
+        connection.ops.quote_name = lambda name: f'"{name}"'
+        connection.cursor.return_value.__enter__.return_value = cursor
+        with mock.patch("RAG.waiting.connections", {"vectordb": connection}), \
+                mock.patch("RAG.waiting.transaction.atomic"), \
+                mock.patch("RAG.waiting.semantic_cache.invalidate_stale") as invalidate:
+            self.assertEqual(refresh_waiting({"100": 2}), 2)
+
+        statements = [c.args[0] for c in cursor.execute.call_args_list]
+        self.assertEqual(len(statements), 2)
+        for sql in statements:
+            self.assertIn('UPDATE "RAG_embeddeddata"', sql)
+        self.assertEqual(cursor.execute.call_args_list[0].args[1], [10, ["100"], [2]])
+        invalidate.assert_called_once()
+
+
+@skipUnless(
+    connections['vectordb'].vendor == 'postgresql', 'pgvector(PostgreSQL) 벡터 DB 필요'
+)
+@override_settings(
+    RAG_SEMANTIC_CACHE_ENABLED=True, RAG_SEMANTIC_CACHE_THRESHOLD=0.05,
+    RAG_SEMANTIC_CACHE_TTL=600, RAG_SEMANTIC_CACHE_WAIT_TOLERANCE=5,
+)
+class SemanticCacheTest(TestCase):
+    """의미 캐시 적중/미적중과 대기시간 변화에 따른 무효화 확인 (pgvector 필요)"""
+    databases = {'default', 'vectordb'}
+
+    response = {"restaurant_ID": [100], "answer": "국밥집 추천"}
+
+    @staticmethod
+    def vector(axis):
+        values = [0.0] * 768
+        values[axis] = 1.0
+        return values
+
+    def setUp(self):
+        EmbeddedData.objects.create(
+            place_id="100", name="국밥집", address="서울 강남구", category="한식",
+            location="강남", description="국밥집", embedding=self.vector(0),
+            estimated_waiting_time=10,
+        )
+
+    def set_waiting(self, minutes):
+        EmbeddedData.objects.filter(place_id="100").update(estimated_waiting_time=minutes)
+
+    def test_hit_and_miss(self):
+        entry = semantic_cache.store("강남 국밥", self.vector(0), self.response)
+        self.assertEqual(entry.waiting_snapshot, {"100": 10})
+
+        self.assertEqual(semantic_cache.lookup(self.vector(0)), self.response)
+        # 의미가 다른 질문은 미적중
+        self.assertIsNone(semantic_cache.lookup(self.vector(1)))
+        self.assertEqual(ChatAnswerCache.objects.get().hit_count, 1)
+
+    def test_changed_waiting_invalidates_entry(self):
+        semantic_cache.store("강남 국밥", self.vector(0), self.response)
+
+        # 허용치 이내 변화는 유지
+        self.set_waiting(14)
+        self.assertEqual(semantic_cache.invalidate_stale(), 0)
+        self.assertEqual(semantic_cache.lookup(self.vector(0)), self.response)
+
+        self.set_waiting(30)
+        self.assertEqual(semantic_cache.invalidate_stale(), 1)
+        self.assertIsNone(semantic_cache.lookup(self.vector(0)))
+
+    def test_expired_entry_is_not_returned(self):
+        entry = semantic_cache.store("강남 국밥", self.vector(0), self.response)
+        ChatAnswerCache.objects.filter(pk=entry.pk).update(
+            created_at=timezone.now() - timedelta(seconds=601)
+        )
+
+        self.assertIsNone(semantic_cache.lookup(self.vector(0)))
+        self.assertEqual(semantic_cache.invalidate_stale(), 1)
+        self.assertFalse(ChatAnswerCache.objects.exists())
+
+
+class VectorIndexSqlTest(SimpleTestCase):
+    """ANN 인덱스 생성 SQL 확인"""
+
+    def test_mixed_case_table_is_quoted(self):
+        sql = create_index_sql(
+            EmbeddedData._meta.db_table, "rag_embedding_hnsw_idx", "hnsw"
+        )
+        self.assertEqual(
+            sql,
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS "rag_embedding_hnsw_idx" '
+            'ON "RAG_embeddeddata" USING hnsw (embedding vector_cosine_ops) '
+            'WITH (m = 16, ef_construction = 64)',
+        )
+
+    def test_answer_cache_target_is_hnsw_only(self):
+        with self.assertRaisesMessage(CommandError, "answer_cache supports only: hnsw"):
+            call_command("vector_index", "create", "--target", "answer_cache", "--method", "ivfflat")
@@ -1,26 +1,96 @@
 import json
+import logging
 import os
-from datetime import datetime
+import time
 
 import google.genai as genai
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from google.genai import types
-from main.models import ChatHistory
-from pgvector.django import CosineDistance
+from main.cards import get_restaurant_cards
 
+from . import semantic_cache
+from .cache import query_embedding_cache
+from .history import chat_history_buffer
+from .hybrid import hybrid_search
 from .models import EmbeddedData
+from .prompting import (
+    STRUCTURED_OUTPUT, build_context, build_prompt, check_response, filter_ids,
+    generate_answer, generate_stream, output_stats, record_usage, usage_stats,
+)
+from .similar import MAX_LIMIT, place_id_for, similar_places
+from .streaming import StreamingAnswerParser, sse_event
+
+logger = logging.getLogger(__name__)
 
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
 client = genai.Client(api_key=GEMINI_API_KEY) if GEMINI_API_KEY else None
 
+NO_RESULT_ANSWER = "죄송합니다. 조건에 맞는 맛집을 찾을 수 없습니다."
+
+
+async def embed_query(text):
+    """사용자 질문 임베딩 (Gemini async 클라이언트 호출)"""
+    embedding_response = await client.aio.models.embed_content(
+        model="text-embedding-004",
+        contents=text,
+        config=types.EmbedContentConfig(
+            task_type="retrieval_query",
+        ),
+    )
+    return embedding_response.embeddings[0].values
+
+
+def save_chat_history(query, answer):
+    """채팅 기록 저장 예약 (write-behind 버퍼가 모아서 저장, 응답 경로에서 DB 왕복 없음)"""
+    chat_history_buffer.add(query, answer)
+
+
+async def store_semantic_cache(user_message, user_embedding, response_data):
+    """정상 파싱된 응답만 의미 캐시에 저장"""
+    try:
+        await sync_to_async(semantic_cache.store)(
+            user_message, user_embedding, response_data
+        )
+    except Exception:
+        logger.warning("Semantic cache store failed", exc_info=True)
+
+
+def candidate_cards(similar_restaurants):
+    """Restaurant 테이블에 없는 추천 ID를 채울 검색 후보 카드 (place_id 기준)"""
+    return {
+        str(r.place_id): {
+            "restaurant_ID": r.place_id,
+            "name": r.name,
+            "category": r.category,
+            "rating": r.rating,
+            "image_url": r.img_url,
+            "x": r.x,
+            "y": r.y,
+        }
+        for r in similar_restaurants
+    }
+
+
+async def with_cards(response_data, candidates=None):
+    """
+    추천 식당 카드(이름, 카테고리, 평점, 이미지, 좌표)를 응답에 함께 담는다.
+    클라이언트가 ID마다 이름 API를 호출하지 않도록 한 번의 쿼리로 조회.
+    """
+    ids = response_data.get("restaurant_ID") or []
+    cards = await sync_to_async(get_restaurant_cards)(ids, candidates) if ids else []
+    return dict(response_data, restaurants=cards)
+
 
 @csrf_exempt
 @require_http_methods(["POST"])
-def rag_chat_api(request):
+async def rag_chat_api(request):
     """
     RAG 기반 맛집 추천 채팅 API
+    Gemini 호출 동안 워커를 점유하지 않도록 async 뷰로 동작 (ASGI)
     """
     try:
         data = json.loads(request.body)
@@ -29,10 +99,6 @@ def rag_chat_api(request):
         if not user_message:
             return JsonResponse({"error": "메시지가 비어있습니다."}, status=400)
 
-        # 1. 현재 서버 시간 구하기
-        now = datetime.now()
-        current_time_str = now.strftime("%H:%M")
-
         # ---------------------------------------------------------
         # Step 1. Retrieval (검색)
         # ---------------------------------------------------------
@@ -41,175 +107,214 @@ def rag_chat_api(request):
                 {"error": "GEMINI_API_KEY가 설정되지 않았습니다."}, status=500
             )
 
-        # 1-1. 사용자 질문 벡터화
+        # 1-1. 사용자 질문 벡터화 (정규화된 질문 기준 캐시)
         try:
-            embedding_response = client.models.embed_content(
-                model="text-embedding-004",
-                contents=user_message,
-                config=types.EmbedContentConfig(
-                    task_type="retrieval_query",
-                ),
+            user_embedding = await query_embedding_cache.aget_or_embed(
+                user_message, embed_query
             )
-            user_embedding = embedding_response.embeddings[0].values
 
         except Exception as e:
             return JsonResponse(
                 {"error": f"임베딩 생성 실패: {str(e)}"}, status=500
             )
 
-        # 1-2. DB 검색
-        similar_restaurants = EmbeddedData.objects.annotate(
-            distance=CosineDistance("embedding", user_embedding)
-        ).order_by("distance")[:30]
+        # 1-2. 의미적으로 비슷한 최근 질문의 응답 재사용
+        cached_response = await sync_to_async(semantic_cache.lookup)(user_embedding)
+        if cached_response is not None:
+            save_chat_history(user_message, cached_response.get('answer', ''))
+            return JsonResponse(await with_cards(cached_response))
 
-        if not similar_restaurants:
-            return JsonResponse(
-                {"answer": "죄송합니다. 조건에 맞는 맛집을 찾을 수 없습니다."}
-            )
+        # 1-3. DB 검색: 질문의 위치/카테고리 조건으로 후보를 좁힌 뒤 벡터 유사도 정렬
+        # (HNSW/IVFFlat 인덱스, ef_search/probes는 settings에서 조정)
+        similar_restaurants, _ = await sync_to_async(hybrid_search)(
+            user_message, user_embedding
+        )
 
-        # 1-3. Context 생성
-        context_list = []
-        recommendations_info = []
-
-        for r in similar_restaurants:
-            wait_min = r.estimated_waiting_time
-
-            info = (
-                f"- ID: {r.place_id}\n"
-                f"  이름: {r.name}\n"
-                f"  카테고리: {r.category}\n"
-                f"  위치: {r.address}\n"
-                f"  예상 대기시간: {wait_min}분\n"
-                f"  평점: {r.rating}\n"
-                f"  특징: {r.description}\n"
-            )
-            context_list.append(info)
-            recommendations_info.append({"restaurant_ID": r.place_id, "name": r.name})
+        if not similar_restaurants:
+            return JsonResponse({"answer": NO_RESULT_ANSWER})
 
-        context_text = "\n".join(context_list)
+        # 1-4. Context 생성
+        context_text, recommendations_info = build_context(similar_restaurants)
 
         # ---------------------------------------------------------
         # Step 2. Generation (생성): 프롬프트 엔지니어링
         # ---------------------------------------------------------
-
-        system_instruction = (
-            f"당신은 '효율'과 '미식'의 균형을 완벽하게 맞추는 "
-            f"스마트 맛집 가이드입니다.\n"
-            f"현재 시각은 **{current_time_str}** 입니다.\n\n"
-
-            "사용자의 질문과 [참고 정보]를 분석하여 최적의 맛집을 "
-            "**최소 1개에서 최대 3개까지만** 추천하세요.\n"
-            "기본 우선순위는 **'대기시간 >= 카테고리 >= 평점'**이지만, "
-            "기계적인 판단이 아닌 유연한 추천을 해야 합니다.\n\n"
-
-            "**[핵심 판단 기준: '10분의 미학']**\n"
-            "1. **대기 시간 (Primary):** "
-            "기본적으로 대기 시간이 짧을수록 좋습니다. "
-            "하지만 '0분'만 고집하지 마세요.\n"
-            "2. **가치 판단 (The Trade-off):** "
-            "**대기 시간이 10분 내외(5~15분)**라면, "
-            "평점을 확인하세요.\n"
-            "   - **Case A:** "
-            "대기 0분, 평점 3.5점 vs **대기 10분, 평점 4.5점**\n"
-            "     -> **후자(대기 10분)를 강력 추천하세요.** "
-            "10분은 맛있는 음식을 위해 충분히 투자할 만한 시간입니다.\n"
-            "   - **Case B:** "
-            "대기 0분, 평점 4.0점 vs 대기 10분, 평점 4.1점\n"
-            "     -> **전자(대기 0분)를 추천하세요.** "
-            "평점 차이가 크지 않다면 빠른 입장이 낫습니다.\n"
-            "3. **카테고리 (Filter):** "
-            "위 시간/평점 비교는 사용자가 원하는 메뉴(카테고리) 내에서 "
-            "이루어져야 합니다. 엉뚱한 메뉴를 추천하지 마세요.\n\n"
-
-            "**[추천 시나리오 로직]**\n\n"
-            "**시나리오 A: '지금', '바로' 식사 희망**\n"
-            "   - 1순위: 대기 없음(0분) + 고평점(4.0 이상)인 완벽한 곳.\n"
-            "   - 2순위: **대기 약간(10분 내외) + "
-            "초고평점(4.5 이상)인 '기다릴 가치가 있는 곳'.**\n"
-            "   - 3순위: 대기 없음 + 평점 무난(3.0 후반).\n"
-            "   - **주의:** 대기가 30분 이상 넘어가는 곳은 "
-            "사용자가 특별히 '유명한 곳'을 찾지 않는 한 "
-            "후순위로 미루세요.\n\n"
-
-            "**시나리오 B: '미래 시간'(예: 6시) 언급**\n"
-            "   - 도착 시점 기준, **'바로 입장'** 또는 "
-            "**'10분 이내 대기'**가 예상되는 곳을 찾으세요.\n"
-            "   - 여유 시간이 넉넉하다면, "
-            "평소 웨이팅이 있는 인기 맛집을 추천하며 "
-            "'가시는 동안 대기가 빠져서 금방 들어가실 수 있을 거예요'"
-            "라고 제안하세요.\n\n"
-
-            "**[응답 형식 (JSON 포맷 엄수)]**\n"
-            "반드시 아래 JSON 형식으로만 응답하세요. "
-            "다른 말은 덧붙이지 마세요.\n"
-            "{\n"
-            '  "restaurant_ID": [추천 식당 ID 리스트 (정수형, 1~3개)],\n'
-            '  "answer": "합리적인 추천 멘트. '
-            "선정 이유를 설득력 있게 설명할 것. "
-            "(예: '이곳은 10분 정도 대기가 있지만, "
-            "평점이 4.8로 워낙 좋아 기다리실 만한 가치가 있어 "
-            "1순위로 추천드려요!' 또는 "
-            "'배고프실 텐데 바로 입장 가능한 이곳은 어떠세요?').\"\n"
-            "}"
-        )
-
-        full_prompt = (
-            f"{system_instruction}\n\n"
-            f"[참고 정보]\n{context_text}\n\n"
-            f"사용자 질문: {user_message}"
-        )
+        full_prompt = build_prompt(user_message, context_text)
 
         try:
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=full_prompt,
+            # 구조화 출력(JSON 스키마) + 추천 ID 검증, 실패 시 제한된 재시도 후 백업 응답
+            response_data, validated = await generate_answer(
+                client, full_prompt, recommendations_info, context_text
             )
-
-            response_text = response.text.strip()
-
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.startswith("```"):
-                response_text = response_text[3:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-
-            response_text = response_text.strip()
-
-            response_data = json.loads(response_text)
-
-            # 채팅 기록 저장
-            try:
-                ChatHistory.objects.create(
-                    query=user_message,
-                    answer=response_data.get('answer', '')
-                )
-            except Exception as save_error:
-                # 저장 실패해도 응답은 반환
-                print(f"채팅 기록 저장 실패: {save_error}")
-
-            return JsonResponse(response_data)
-
-        except json.JSONDecodeError:
-            backup_ids = [r["restaurant_ID"] for r in recommendations_info[:3]]
-            backup_response = {"restaurant_ID": backup_ids, "answer": response.text}
-
-            # 채팅 기록 저장
-            try:
-                ChatHistory.objects.create(
-                    query=user_message,
-                    answer=backup_response.get('answer', '')
-                )
-            except Exception as save_error:
-                print(f"채팅 기록 저장 실패: {save_error}")
-
-            return JsonResponse(backup_response)
         except Exception as e:
             return JsonResponse(
                 {"error": f"LLM 생성 오류: {str(e)}"}, status=500
             )
 
+        if validated:
+            await store_semantic_cache(user_message, user_embedding, response_data)
+        save_chat_history(user_message, response_data.get('answer', ''))
+
+        return JsonResponse(
+            await with_cards(response_data, candidate_cards(similar_restaurants))
+        )
+
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "잘못된 요청 형식입니다."}, status=400)
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def rag_chat_stream_api(request):
+    """
+    RAG 기반 맛집 추천 채팅 API (Server-Sent Events 스트리밍)
+    이벤트 순서: ids(추천 식당 ID) -> token(답변 조각)* -> done(최종 응답)
+    """
+    try:
+        data = json.loads(request.body)
     except json.JSONDecodeError:
         return JsonResponse({"error": "잘못된 요청 형식입니다."}, status=400)
+
+    user_message = data.get("message", "")
+    if not user_message:
+        return JsonResponse({"error": "메시지가 비어있습니다."}, status=400)
+
+    if not client:
+        return JsonResponse(
+            {"error": "GEMINI_API_KEY가 설정되지 않았습니다."}, status=500
+        )
+
+    response = StreamingHttpResponse(
+        _chat_event_stream(user_message), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # nginx 프록시 버퍼링 끄기 (토큰이 도착하는 즉시 전달)
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+async def _chat_event_stream(user_message):
+    try:
+        user_embedding = await query_embedding_cache.aget_or_embed(
+            user_message, embed_query
+        )
+    except Exception as e:
+        yield sse_event("error", {"error": f"임베딩 생성 실패: {str(e)}"})
+        return
+
+    cached_response = await sync_to_async(semantic_cache.lookup)(user_embedding)
+    if cached_response is not None:
+        cached_response = await with_cards(cached_response)
+        yield sse_event("ids", {
+            "restaurant_ID": cached_response.get("restaurant_ID", []),
+            "restaurants": cached_response["restaurants"],
+        })
+        yield sse_event("token", {"text": cached_response.get("answer", "")})
+        yield sse_event("done", cached_response)
+        save_chat_history(user_message, cached_response.get('answer', ''))
+        return
+
+    similar_restaurants, _ = await sync_to_async(hybrid_search)(
+        user_message, user_embedding
+    )
+    if not similar_restaurants:
+        yield sse_event("done", {"restaurant_ID": [], "answer": NO_RESULT_ANSWER})
+        return
+
+    context_text, recommendations_info = build_context(similar_restaurants)
+    full_prompt = build_prompt(user_message, context_text)
+    candidates = candidate_cards(similar_restaurants)
+
+    allowed_ids = {str(r["restaurant_ID"]) for r in recommendations_info}
+    parser = StreamingAnswerParser()
+    sent_ids = None
+    usage = None
+    try:
+        started = time.perf_counter()
+        stream = await generate_stream(client, full_prompt, **STRUCTURED_OUTPUT)
+        async for chunk in stream:
+            # 토큰 사용량은 마지막 청크에 담겨 온다
+            usage = chunk.usage_metadata or usage
+            for event, payload in parser.feed(chunk.text or ""):
+                if event == "ids":
+                    # 검색 후보에 없는 ID는 버튼으로 보내지 않는다
+                    ids = filter_ids(payload["restaurant_ID"], allowed_ids)
+                    if not ids:
+                        continue
+                    payload = await with_cards({"restaurant_ID": ids}, candidates)
+                    sent_ids = ids
+                yield sse_event(event, payload)
+    except Exception as e:
+        yield sse_event("error", {"error": f"LLM 생성 오류: {str(e)}"})
+        return
+    await record_usage(
+        usage, started, len(recommendations_info), context_text, streamed=True
+    )
+
+    response_data, parsed = await check_response(parser.text, allowed_ids)
+    validated = response_data is not None
+    if not validated:
+        # 스트리밍 응답이 검증에 실패하면 일반 호출로 재시도 (최종 본문은 done 이벤트로 교체)
+        try:
+            response_data, validated = await generate_answer(
+                client, full_prompt, recommendations_info, context_text,
+                attempts=settings.RAG_LLM_MAX_RETRIES,
+                last_text=parser.text, last_data=parsed,
+            )
+        except Exception as e:
+            yield sse_event("error", {"error": f"LLM 생성 오류: {str(e)}"})
+            return
+
+    if validated:
+        await store_semantic_cache(user_message, user_embedding, response_data)
+
+    response_data = await with_cards(response_data, candidates)
+    if sent_ids is None:
+        yield sse_event("ids", {
+            "restaurant_ID": response_data.get("restaurant_ID", []),
+            "restaurants": response_data["restaurants"],
+        })
+    yield sse_event("done", response_data)
+    save_chat_history(user_message, response_data.get('answer', ''))
+
+
+@require_http_methods(["GET"])
+def rag_cache_stats_api(request):
+    """RAG 캐시 적중률/토큰 사용량 조회 API (질문 임베딩 캐시는 현재 워커 기준)"""
+    return JsonResponse({
+        'query_embedding_cache': query_embedding_cache.stats(),
+        'semantic_cache': semantic_cache.stats(),
+        'token_usage': usage_stats(),
+        'llm_output': output_stats(),
+    })
+
+
+@require_http_methods(["GET"])
+def similar_restaurants_api(request, restaurant_id):
+    """
+    임베딩 기반 비슷한 식당 API (?limit=5&rerank=1)
+    rerank=1이면 rec_balanced와 예상 대기시간을 반영해 다시 정렬
+    """
+    try:
+        limit = int(request.GET.get("limit", 5))
+    except ValueError:
+        return JsonResponse({"error": "limit은 정수여야 합니다."}, status=400)
+    if not 1 <= limit <= MAX_LIMIT:
+        return JsonResponse(
+            {"error": f"limit은 1~{MAX_LIMIT} 사이여야 합니다."}, status=400
+        )
+    rerank = request.GET.get("rerank") in ("1", "true")
+    try:
+        place_id_for(restaurant_id)
+    except ValueError:
+        return JsonResponse({"error": "잘못된 레스토랑 ID입니다."}, status=400)
+
+    try:
+        results = similar_places(restaurant_id, limit=limit, rerank_results=rerank)
+        return JsonResponse({"similar_restaurants": results})
+    except EmbeddedData.DoesNotExist:
+        return JsonResponse({"error": "임베딩 데이터가 없는 레스토랑입니다."}, status=404)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
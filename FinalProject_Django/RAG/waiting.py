@@ -0,0 +1,65 @@
+import logging
+
+from django.db import connections, transaction
+
+from . import semantic_cache
+from .models import EmbeddedData
+
+logger = logging.getLogger(__name__)
+
+# 대기 1팀당 예상 대기시간(분)
+MINUTES_PER_TEAM = 10
+
+
+def estimate_waiting_time(waiting_count):
+    return waiting_count * MINUTES_PER_TEAM
+
+
+def refresh_waiting(waiting_map):
+    """
+    place_id -> 대기 팀 수 매핑으로 EmbeddedData의 실시간 대기 정보를 갱신한다.
+    벡터는 건드리지 않고, 값이 바뀐 행만 두 번의 UPDATE로 처리한다.
+    매핑에 없는 식당은 대기 0팀으로 초기화한다.
+    매핑이 비어 있으면 (원천 조회 실패 등) 전체를 0으로 만들지 않도록 아무것도 하지 않는다.
+    반환값: 갱신된 행 수
+    """
+    if not waiting_map:
+        logger.warning("Empty waiting map, skipping waiting refresh")
+        return 0
+
+    # 테이블명(RAG_embeddeddata)에 대문자가 있어 따옴표 없이 쓰면 PostgreSQL에서 찾지 못한다
+    table = connections["vectordb"].ops.quote_name(EmbeddedData._meta.db_table)
+    place_ids = list(waiting_map)
+    counts = [int(waiting_map[pid]) for pid in place_ids]
+
+    with transaction.atomic(using="vectordb"):
+        with connections["vectordb"].cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {table} AS e
+                SET current_waiting_team = v.waiting,
+                    estimated_waiting_time = v.waiting * %s
+                FROM unnest(%s::varchar[], %s::int[]) AS v(place_id, waiting)
+                WHERE e.place_id = v.place_id
+                  AND e.current_waiting_team IS DISTINCT FROM v.waiting
+                """,  # noqa: S608
+                [MINUTES_PER_TEAM, place_ids, counts],
+            )
+            updated = cursor.rowcount
+
+            cursor.execute(
+                f"""
+                UPDATE {table}
+                SET current_waiting_team = 0, estimated_waiting_time = 0
+                WHERE current_waiting_team <> 0
+                  AND NOT (place_id = ANY(%s::varchar[]))
+                """,  # noqa: S608
+                [place_ids],
+            )
+            updated += cursor.rowcount
+
+    # 대기 정보가 바뀌었으니 그에 기반한 캐시 응답도 함께 정리
+    if updated:
+        semantic_cache.invalidate_stale()
+
+    return updated
@@ -0,0 +1,91 @@
+import math
+from typing import NamedTuple
+
+from django.db.models import Avg, Count, F, Sum
+from django.db.models.functions import Floor
+
+# 격자 셀 크기(도). 위도 0.01도 ≈ 1.1km
+GRID_SIZE = 0.01
+EARTH_RADIUS_M = 6_371_000
+METERS_PER_DEGREE = 111_320
+
+# 카카오맵 레벨(1~14, 클수록 넓게 보임)이 이 값 이상이면 클러스터로 응답
+CLUSTER_MIN_LEVEL = 6
+# 마커 모드라도 결과가 이보다 많으면 클러스터로 응답
+MAX_MARKERS = 500
+
+
+class BoundingBox(NamedTuple):
+    min_x: float
+    min_y: float
+    max_x: float
+    max_y: float
+
+
+def grid_cell(x, y):
+    """좌표 -> (cell_x, cell_y). 좌표가 없으면 (None, None)"""
+    if x is None or y is None:
+        return None, None
+    return math.floor(x / GRID_SIZE), math.floor(y / GRID_SIZE)
+
+
+def bbox_from_radius(x, y, radius_m):
+    """중심(경도 x, 위도 y)과 반경(m)을 감싸는 사각 영역"""
+    dy = radius_m / METERS_PER_DEGREE
+    dx = radius_m / (METERS_PER_DEGREE * max(math.cos(math.radians(y)), 1e-6))
+    return BoundingBox(x - dx, y - dy, x + dx, y + dy)
+
+
+def haversine_m(x1, y1, x2, y2):
+    """두 좌표(경도, 위도) 사이 거리(m)"""
+    lat1, lat2 = math.radians(y1), math.radians(y2)
+    dlat = lat2 - lat1
+    dlng = math.radians(x2 - x1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def within_bbox(queryset, bbox):
+    """
+    영역 안의 레스토랑만 남긴다.
+    (cell_y, cell_x) 인덱스로 후보 셀을 먼저 좁히고, 경계 셀은 실제 좌표로 거른다.
+    """
+    min_cx, min_cy = grid_cell(bbox.min_x, bbox.min_y)
+    max_cx, max_cy = grid_cell(bbox.max_x, bbox.max_y)
+    return queryset.filter(
+        cell_y__range=(min_cy, max_cy),
+        cell_x__range=(min_cx, max_cx),
+        x__range=(bbox.min_x, bbox.max_x),
+        y__range=(bbox.min_y, bbox.max_y),
+    )
+
+
+def cluster_cell_size(level):
+    """지도 레벨에 따른 클러스터 셀 크기(도). 레벨이 1 오를 때마다 두 배"""
+    return GRID_SIZE * 2 ** (level - CLUSTER_MIN_LEVEL + 1)
+
+
+def cluster(queryset, cell_size):
+    """셀 단위로 묶어 (중심 좌표, 레스토랑 수, 대기 합계) 목록을 반환"""
+    rows = (
+        queryset.annotate(
+            gx=Floor(F('x') / cell_size), gy=Floor(F('y') / cell_size)
+        )
+        .values('gx', 'gy')
+        .annotate(
+            count=Count('restaurant_ID'),
+            cx=Avg('x'),
+            cy=Avg('y'),
+            total_waiting=Sum('waiting'),
+        )
+        .order_by('-count')
+    )
+    return [
+        {
+            'x': row['cx'],
+            'y': row['cy'],
+            'count': row['count'],
+            'waiting': row['total_waiting'] or 0,
+        }
+        for row in rows
+    ]
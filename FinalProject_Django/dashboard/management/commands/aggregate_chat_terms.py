@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dashboard.wordcloud import aggregate_chat_terms
+
+
+class Command(BaseCommand):
+    help = "Tokenize new chat queries and add their nouns to the daily word-cloud counts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = aggregate_chat_terms(batch_size=options["batch_size"])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Aggregated terms from {count} new chat queries ({elapsed:.2f}s)"
+            )
+        )
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dashboard.map_search import aggregate_map_searches, prune_map_search_events
+
+
+class Command(BaseCommand):
+    help = "Fold new MapSearchHistory rows into the per-restaurant search aggregate"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--purge", action="store_true",
+            help="Delete MapSearchHistory rows once they are aggregated",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = aggregate_map_searches(
+            batch_size=options["batch_size"], purge=options["purge"]
+        )
+        pruned = prune_map_search_events()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Aggregated {count} map searches, pruned {pruned} old events "
+                f"({elapsed:.2f}s)"
+            )
+        )
@@ -0,0 +1,147 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from dashboard import queries
+from dashboard.geo import BoundingBox, grid_cell, within_bbox
+from dashboard.models import UnifiedRestaurant
+
+REGIONS = {
+    "서울": ["강남구", "마포구", "종로구", "송파구", "성동구", "용산구"],
+    "경기": ["성남시", "수원시", "고양시", "용인시"],
+    "부산": ["해운대구", "부산진구", "수영구"],
+}
+CATEGORIES = [
+    "한식", "일식", "중식", "양식", "카페", "술집", "분식", "고기", "국밥", "치킨",
+    "피자", "버거", "초밥", "라멘", "베이커리", "해산물",
+]
+
+
+class Rollback(Exception):
+    """합성 데이터를 남기지 않도록 트랜잭션을 되돌린다"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic unified restaurants, then check EXPLAIN plans and latency "
+        "of every dashboard endpoint query (rolled back afterwards)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--max-ms", type=float, default=50.0,
+            help="Fail if a query's median latency exceeds this (ms)",
+        )
+        parser.add_argument("--show-plans", action="store_true")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        failures = []
+        try:
+            with transaction.atomic():
+                self._seed(options["rows"], options["seed"])
+                self.stdout.write("-" * 78)
+                self.stdout.write(
+                    f"{'query':<34} {'index':<30} {'median ms':>10} {'p95 ms':>8}  result"
+                )
+                for name, index, queryset in self._cases():
+                    failures.extend(self._check(name, index, queryset, options))
+                raise Rollback
+        except Rollback:
+            pass
+
+        if failures:
+            raise CommandError("Query plan/latency regressions:\n  " + "\n  ".join(failures))
+        self.stdout.write(self.style.SUCCESS("All dashboard queries use their indexes"))
+
+    def _seed(self, rows, seed):
+        rng = random.Random(seed)  # noqa: S311
+        # 실제 데이터와 겹치지 않는 ID 구간 사용
+        start = (UnifiedRestaurant.objects.aggregate(m=Max("restaurant_ID"))["m"] or 0) + 1
+        now = timezone.now()
+        objs = []
+        for i in range(rows):
+            region = rng.choice(list(REGIONS))
+            x, y = 126.8 + rng.random() * 0.4, 37.4 + rng.random() * 0.3
+            cell_x, cell_y = grid_cell(x, y)
+            objs.append(UnifiedRestaurant(
+                restaurant_ID=start + i,
+                name=f"식당{i}",
+                category=rng.choice(CATEGORIES),
+                region=region,
+                city=rng.choice(REGIONS[region]),
+                x=x, y=y, cell_x=cell_x, cell_y=cell_y,
+                # 실제 데이터처럼 대기/추천도가 없는 행을 섞는다
+                waiting=rng.randint(0, 50) if rng.random() < 0.3 else None,
+                rec_quality=rng.random() if rng.random() < 0.5 else None,
+                rec_balanced=rng.random() if rng.random() < 0.5 else None,
+                rec_convenience=rng.random() if rng.random() < 0.5 else None,
+                source="restaurant",
+                refreshed_at=now,
+            ))
+        self.stdout.write(f"Seeding {rows} synthetic unified restaurants...")
+        UnifiedRestaurant.objects.bulk_create(objs, batch_size=2000)
+        with connection.cursor() as cursor:
+            # 플래너 통계 갱신 (행 수가 바뀐 직후라 없으면 seq scan을 고를 수 있음)
+            cursor.execute(f"ANALYZE {UnifiedRestaurant._meta.db_table}")
+
+    def _cases(self):
+        """(이름, 사용해야 하는 인덱스, 엔드포인트와 같은 쿼리). 인덱스 None은 지연만 확인"""
+        viewport = BoundingBox(126.97, 37.49, 127.03, 37.53)
+        cases = [
+            ("top_restaurants", "unified_waiting_idx", queries.top_waiting()),
+            ("top_categories", None, queries.top_categories()),
+        ]
+        for rec_type, field in queries.REC_FIELDS.items():
+            cases.append((
+                f"top_by_recommendation:{rec_type}", f"unified_{field}_idx",
+                queries.top_by_recommendation(field),
+            ))
+        cases += [
+            (
+                "filter_restaurants",
+                "unified_region_city_cat_idx",
+                queries.filtered("서울", "강남구", "한식")
+                .order_by("restaurant_ID").values("restaurant_ID", "name")[:201],
+            ),
+            (
+                "viewport_restaurants",
+                "unified_cell_idx",
+                within_bbox(UnifiedRestaurant.objects.all(), viewport)
+                .values("restaurant_ID", "x", "y")[:501],
+            ),
+        ]
+        return cases
+
+    def _check(self, name, index, queryset, options):
+        plan = queryset.explain()
+        if options["show_plans"]:
+            self.stdout.write(f"[{name}]\n{plan}\n")
+
+        latencies = []
+        for _ in range(options["repeat"]):
+            started = time.perf_counter()
+            list(queryset.all())
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        median = statistics.median(latencies)
+        p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+
+        failures = []
+        if index is not None and index not in plan:
+            failures.append(f"{name}: plan does not use {index}")
+        if median > options["max_ms"]:
+            failures.append(f"{name}: median {median:.1f}ms > {options['max_ms']}ms")
+
+        result = self.style.ERROR("FAIL") if failures else self.style.SUCCESS("ok")
+        self.stdout.write(
+            f"{name:<34} {index or '-':<30} {median:10.2f} {p95:8.2f}  {result}"
+        )
+        return failures
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dashboard.unified import refresh_unified_restaurants
+
+
+class Command(BaseCommand):
+    help = "Rebuild the unified restaurant table used by dashboard APIs"
+
+    def handle(self, *args, **kwargs):
+        started = time.perf_counter()
+        count = refresh_unified_restaurants()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Refreshed {count} unified restaurants ({elapsed:.2f}s)"
+            )
+        )
@@ -0,0 +1,125 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import (
+    AggregationWatermark, MapSearchAggregate, MapSearchEvent, MapSearchHistory,
+)
+
+WATERMARK_NAME = 'map_searches'
+
+SEARCH_FIELDS = ('restaurant_ID', 'name', 'category', 'region', 'city', 'x', 'y', 'waiting')
+# 다시 검색되면 최신 값으로 덮어쓰는 식당 정보
+LATEST_FIELDS = ('name', 'category', 'region', 'city', 'x', 'y', 'waiting', 'last_seen')
+# upsert 한 문장에 담는 식당 수 (DB 바인드 파라미터 수 제한)
+UPSERT_CHUNK_SIZE = 200
+
+
+def record_map_searches(searches, searched_at=None):
+    """
+    지도 검색 목록(SEARCH_FIELDS dict, 오래된 순)을 집계 테이블에 upsert한다.
+    같은 식당은 한 행으로 합쳐 search_count를 더하고 식당 정보는 최신 값으로 바꾼다.
+    MAP_SEARCH_EVENT_LOG면 원본 이벤트도 남긴다. 반환값: 갱신된 식당 수
+    """
+    searched_at = searched_at or timezone.now()
+    merged = {}
+    for search in searches:
+        row = merged.get(search['restaurant_ID'])
+        count = row['search_count'] if row else 0
+        merged[search['restaurant_ID']] = dict(
+            {field: search[field] for field in SEARCH_FIELDS},
+            search_count=count + 1,
+        )
+    if not merged:
+        return 0
+
+    rows = list(merged.values())
+    with transaction.atomic():
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            _upsert(rows[start:start + UPSERT_CHUNK_SIZE], searched_at)
+        if settings.MAP_SEARCH_EVENT_LOG:
+            MapSearchEvent.objects.bulk_create([
+                MapSearchEvent(
+                    restaurant_ID=search['restaurant_ID'],
+                    waiting=search['waiting'],
+                    day=timezone.localdate(searched_at),
+                    searched_at=searched_at,
+                )
+                for search in searches
+            ], batch_size=1000)
+    return len(merged)
+
+
+def _upsert(rows, searched_at):
+    """
+    INSERT ... ON CONFLICT DO UPDATE로 한 번에 반영 (PostgreSQL, SQLite 공통 문법).
+    search_count는 기존 값에 더하므로 동시에 호출돼도 누락되지 않는다.
+    """
+    qn = connection.ops.quote_name
+    table = qn(MapSearchAggregate._meta.db_table)
+    columns = [*SEARCH_FIELDS, 'search_count', 'first_seen', 'last_seen']
+    seen = connection.ops.adapt_datetimefield_value(searched_at)
+
+    values, params = [], []
+    for row in rows:
+        values.append('(' + ', '.join(['%s'] * len(columns)) + ')')
+        params.extend(row[field] for field in SEARCH_FIELDS)
+        params.extend([row['search_count'], seen, seen])
+
+    updates = [f'{qn(f)} = excluded.{qn(f)}' for f in LATEST_FIELDS]
+    updates.append(
+        f'{qn("search_count")} = {table}.{qn("search_count")} + excluded.{qn("search_count")}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({", ".join(qn(c) for c in columns)}) '  # noqa: S608
+            f'VALUES {", ".join(values)} '
+            f'ON CONFLICT ({qn("restaurant_ID")}) DO UPDATE SET {", ".join(updates)}',
+            params,
+        )
+
+
+def aggregate_map_searches(batch_size=1000, purge=False):
+    """
+    워터마크 이후의 MapSearchHistory 행을 집계 테이블에 더한다.
+    배치마다 upsert와 워터마크 이동을 한 트랜잭션으로 처리해 중복 집계를 막고,
+    purge면 처리한 원본 행을 지워 로그가 계속 커지지 않게 한다.
+    (MapSearchHistory에는 시각이 없으므로 집계 시각을 검색 시각으로 쓴다)
+    반환값: 처리한 검색 행 수
+    """
+    processed = 0
+    while True:
+        with transaction.atomic():
+            watermark, _ = AggregationWatermark.objects.select_for_update().get_or_create(
+                name=WATERMARK_NAME
+            )
+            searches = list(
+                MapSearchHistory.objects.filter(id__gt=watermark.last_id)
+                .order_by('id')
+                .values('id', *SEARCH_FIELDS)[:batch_size]
+            )
+            if not searches:
+                break
+
+            record_map_searches(searches)
+
+            last_id = searches[-1]['id']
+            if purge:
+                MapSearchHistory.objects.filter(id__lte=last_id).delete()
+            watermark.last_id = last_id
+            watermark.save(update_fields=['last_id', 'updated_at'])
+
+        processed += len(searches)
+
+    return processed
+
+
+def prune_map_search_events(retention_days=None):
+    """보관 기간이 지난 날짜의 이벤트를 삭제. 반환값: 삭제된 행 수"""
+    if retention_days is None:
+        retention_days = settings.MAP_SEARCH_EVENT_RETENTION_DAYS
+    cutoff = timezone.localdate() - timedelta(days=retention_days)
+    deleted, _ = MapSearchEvent.objects.filter(day__lt=cutoff).delete()
+    return deleted
@@ -1,9 +1,13 @@
 # Create your models here.
 from django.db import models
+from django.db.models import Q
 
 
 class MapSearchHistory(models.Model):
-    """지도 검색 기록 모델"""
+    """
+    지도 검색 기록 모델 (외부 적재용 원본 입력).
+    aggregate_map_searches가 MapSearchAggregate로 옮기며, --purge 시 처리된 행은 삭제된다.
+    """
     restaurant_ID = models.IntegerField() # 주로 조회하는 값이니 char보다는 int로 수정
     name = models.CharField(max_length=200)
     category = models.CharField(max_length=20)
@@ -15,3 +19,159 @@ class MapSearchHistory(models.Model):
 
     def __str__(self):
             return f"{self.name} ({self.region})"
+
+
+class MapSearchAggregate(models.Model):
+    """
+    지도 검색 집계 (식당당 1행). MapSearchHistory 원본 로그 대신 대시보드가 읽는다.
+    aggregate_map_searches / record_map_searches가 upsert로 검색 횟수를 더한다.
+    """
+    restaurant_ID = models.IntegerField(primary_key=True)
+    # 가장 최근 검색 시점의 식당 정보
+    name = models.CharField(max_length=200)
+    category = models.CharField(max_length=20, blank=True)
+    region = models.CharField(max_length=20, blank=True)
+    city = models.CharField(max_length=15, blank=True)
+    x = models.FloatField(null=True, blank=True)
+    y = models.FloatField(null=True, blank=True)
+    waiting = models.IntegerField(null=True, blank=True)
+    search_count = models.PositiveIntegerField(default=0)
+    first_seen = models.DateTimeField()
+    last_seen = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} ({self.search_count}회)"
+
+
+class MapSearchEvent(models.Model):
+    """
+    지도 검색 원본 이벤트 (선택, settings.MAP_SEARCH_EVENT_LOG).
+    식당 정보는 집계 테이블에만 두고 ID/대기/시각만 남기며,
+    MAP_SEARCH_EVENT_RETENTION_DAYS가 지난 날짜 구간은 통째로 지운다.
+    """
+    id = models.BigAutoField(primary_key=True)
+    restaurant_ID = models.IntegerField()
+    waiting = models.IntegerField(null=True, blank=True)
+    day = models.DateField()
+    searched_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['day', 'restaurant_ID'], name='map_search_event_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.restaurant_ID} @ {self.searched_at}"
+
+
+class UnifiedRestaurant(models.Model):
+    """
+    대시보드 조회용 통합 레스토랑 테이블 (Restaurant + MapSearchAggregate).
+    refresh_unified_restaurants 커맨드가 주기적으로 다시 만든다.
+    """
+    restaurant_ID = models.IntegerField(primary_key=True)
+    name = models.CharField(max_length=200)
+    category = models.CharField(max_length=20, blank=True)
+    region = models.CharField(max_length=20, blank=True)
+    city = models.CharField(max_length=15, blank=True)
+    x = models.FloatField(null=True, blank=True)
+    y = models.FloatField(null=True, blank=True)
+    # 좌표 격자 셀 (dashboard.geo.GRID_SIZE 단위). 지도 영역 조회용 B-tree 인덱스
+    cell_x = models.IntegerField(null=True, blank=True)
+    cell_y = models.IntegerField(null=True, blank=True)
+    waiting = models.IntegerField(null=True, blank=True)
+    rating = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True)
+    rec_quality = models.FloatField(null=True, blank=True)
+    rec_balanced = models.FloatField(null=True, blank=True)
+    rec_convenience = models.FloatField(null=True, blank=True)
+    # 지도 검색 횟수 (MapSearchAggregate)
+    search_count = models.PositiveIntegerField(default=0)
+    # 'restaurant' 또는 'map_search' (어느 원본에서 왔는지)
+    source = models.CharField(max_length=20)
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        # 인덱스 이름은 benchmark_dashboard_queries 커맨드가 실행 계획 확인에 사용
+        indexes = [
+            models.Index(
+                fields=['region', 'city', 'category'], name='unified_region_city_cat_idx'
+            ),
+            models.Index(fields=['category'], name='unified_category_idx'),
+            models.Index(fields=['cell_y', 'cell_x'], name='unified_cell_idx'),
+            # 대기/추천도 Top N: 값이 있는 행만 담은 내림차순 부분 인덱스
+            models.Index(
+                fields=['-waiting'], name='unified_waiting_idx',
+                condition=Q(waiting__isnull=False),
+            ),
+            models.Index(
+                fields=['-rec_quality'], name='unified_rec_quality_idx',
+                condition=Q(rec_quality__isnull=False),
+            ),
+            models.Index(
+                fields=['-rec_balanced'], name='unified_rec_balanced_idx',
+                condition=Q(rec_balanced__isnull=False),
+            ),
+            models.Index(
+                fields=['-rec_convenience'], name='unified_rec_convenience_idx',
+                condition=Q(rec_convenience__isnull=False),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.restaurant_ID})"
+
+
+class DataGeneration(models.Model):
+    """
+    대시보드 원본 데이터 세대 번호.
+    Restaurant/MapSearchHistory 변경이나 통합 테이블 갱신 시 증가하며,
+    캐시된 응답의 무효화와 ETag 생성에 사용한다.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} (gen {self.value})"
+
+
+class DashboardSnapshot(models.Model):
+    """미리 계산해 둔 대시보드 API 응답 (key별 최신 1개)"""
+    key = models.CharField(max_length=50, primary_key=True)
+    generation = models.PositiveBigIntegerField()
+    payload = models.JSONField()
+    generated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.key} (gen {self.generation})"
+
+
+class AggregationWatermark(models.Model):
+    """증분 집계 작업이 마지막으로 처리한 원본 행 id"""
+    name = models.CharField(max_length=50, primary_key=True)
+    last_id = models.BigIntegerField(default=0)
+    # last_id 아래에서 건너뛴 id -> 처음 발견한 시각(epoch 초).
+    # 아직 커밋되지 않은 다른 트랜잭션의 행일 수 있어 일정 시간 동안 다시 확인한다
+    gaps = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} (last id {self.last_id})"
+
+
+class ChatTermDaily(models.Model):
+    """채팅 질문 명사의 일별 빈도 (워드클라우드용)"""
+    day = models.DateField(verbose_name="날짜")
+    term = models.CharField(max_length=100, verbose_name="단어")
+    count = models.PositiveIntegerField(default=0, verbose_name="빈도")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'term'], name='chat_term_daily_day_term_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.term} ({self.count})"
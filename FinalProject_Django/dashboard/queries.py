@@ -0,0 +1,61 @@
+from django.db.models import Sum
+
+from .models import UnifiedRestaurant
+
+# 추천도 타입 -> 정렬 필드
+REC_FIELDS = {
+    'quality': 'rec_quality',
+    'balanced': 'rec_balanced',
+    'convenience': 'rec_convenience',
+}
+
+
+def top_waiting(limit=5):
+    """대기 인원 상위 레스토랑 (unified_waiting_idx)"""
+    return UnifiedRestaurant.objects.filter(
+        waiting__isnull=False
+    ).order_by('-waiting').values(
+        'name', 'waiting', 'category', 'restaurant_ID'
+    )[:limit]
+
+
+def top_categories(limit=5):
+    """카테고리별 대기 인원 합산 상위"""
+    return UnifiedRestaurant.objects.filter(
+        waiting__isnull=False
+    ).exclude(category='').values('category').annotate(
+        total_waiting=Sum('waiting')
+    ).order_by('-total_waiting')[:limit]
+
+
+def top_by_recommendation(order_field, limit=5):
+    """추천도 상위 레스토랑 (unified_<field>_idx)"""
+    return UnifiedRestaurant.objects.filter(
+        **{f'{order_field}__isnull': False}
+    ).order_by(f'-{order_field}')[:limit]
+
+
+def recommendation_rows(order_field, limit=5):
+    """추천도 상위 레스토랑 응답 행"""
+    return [
+        {
+            'restaurant_ID': r.restaurant_ID,
+            'name': r.name,
+            'category': r.category,
+            'rating': float(r.rating) if r.rating else 0,
+            'rec_value': float(getattr(r, order_field)) if getattr(r, order_field) else 0,
+        }
+        for r in top_by_recommendation(order_field, limit)
+    ]
+
+
+def filtered(region=None, city=None, category=None):
+    """좌표가 있는 레스토랑을 지역/도시/카테고리로 필터링 (unified_region_city_cat_idx)"""
+    queryset = UnifiedRestaurant.objects.filter(x__isnull=False, y__isnull=False)
+    if region:
+        queryset = queryset.filter(region=region)
+    if city:
+        queryset = queryset.filter(city=city)
+    if category:
+        queryset = queryset.filter(category=category)
+    return queryset
@@ -0,0 +1,50 @@
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DashboardSnapshot, DataGeneration
+
+DASHBOARD_GENERATION = 'dashboard'
+
+
+def current_generation(name=DASHBOARD_GENERATION):
+    value = DataGeneration.objects.filter(name=name).values_list(
+        'value', flat=True
+    ).first()
+    return value or 0
+
+
+def bump_generation(name=DASHBOARD_GENERATION):
+    """세대 번호를 1 증가시켜 이전 세대의 스냅샷/ETag를 모두 무효화"""
+    updated = DataGeneration.objects.filter(name=name).update(
+        value=F('value') + 1, updated_at=timezone.now()
+    )
+    if not updated:
+        DataGeneration.objects.get_or_create(name=name, defaults={'value': 1})
+
+
+def generation_etag(key):
+    return f'"{key}-{current_generation()}"'
+
+
+def refresh_snapshot(key, builder, generation=None):
+    """builder()로 응답을 다시 계산해 현재 세대의 스냅샷으로 저장"""
+    if generation is None:
+        generation = current_generation()
+    snapshot, _ = DashboardSnapshot.objects.update_or_create(
+        key=key,
+        defaults={
+            'generation': generation,
+            'payload': builder(),
+            'generated_at': timezone.now(),
+        },
+    )
+    return snapshot
+
+
+def get_snapshot(key, builder):
+    """현재 세대의 스냅샷을 반환하고, 없거나 오래됐으면 다시 계산"""
+    generation = current_generation()
+    snapshot = DashboardSnapshot.objects.filter(key=key).first()
+    if snapshot is None or snapshot.generation != generation:
+        snapshot = refresh_snapshot(key, builder, generation)
+    return snapshot
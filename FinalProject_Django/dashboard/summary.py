@@ -0,0 +1,52 @@
+from . import queries
+from .models import UnifiedRestaurant
+
+FILTER_OPTIONS_KEY = 'filter_options'
+SUMMARY_KEY = 'summary'
+
+
+def build_rankings():
+    """대기 인원, 카테고리 대기 합계, 추천도 3종 Top 5"""
+    return {
+        'top_restaurants': list(queries.top_waiting()),
+        'top_categories': list(queries.top_categories()),
+        'top_by_recommendation': {
+            rec_type: queries.recommendation_rows(field)
+            for rec_type, field in queries.REC_FIELDS.items()
+        },
+    }
+
+
+def build_summary():
+    """대시보드 요약 스냅샷 (순위 + 필터 옵션)"""
+    return {
+        **build_rankings(),
+        'filter_options': build_filter_options(),
+    }
+
+
+def build_filter_options():
+    """필터 옵션(지역, 지역별 도시, 카테고리) 응답 생성"""
+    # 지역별 도시 매핑 생성 (region, city 쌍을 한 번에 조회)
+    region_cities = {}
+    region_city_pairs = UnifiedRestaurant.objects.exclude(
+        region=''
+    ).values_list('region', 'city').distinct().order_by('region', 'city')
+    for region, city in region_city_pairs:
+        cities = region_cities.setdefault(region, [])
+        if city:
+            cities.append(city)
+
+    all_categories = list(
+        UnifiedRestaurant.objects.exclude(category='').values_list(
+            'category', flat=True
+        ).distinct().order_by('category')
+    )
+
+    return {
+        'regions': list(region_cities),
+        'region_cities': {
+            region: cities for region, cities in region_cities.items() if cities
+        },
+        'categories': all_categories,
+    }
@@ -1,2 +1,306 @@
-
 # Create your tests here.
+import json
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from main.models import ChatHistory, Restaurant
+
+from .map_search import aggregate_map_searches, prune_map_search_events
+from .models import (
+    AggregationWatermark, ChatTermDaily, MapSearchAggregate, MapSearchEvent,
+    MapSearchHistory, UnifiedRestaurant,
+)
+from .tokenizer import KoreanTokenizer, filter_terms, warm_up_if_enabled
+from .unified import refresh_unified_restaurants
+from .wordcloud import aggregate_chat_terms
+
+
+class UnifiedRestaurantTest(TestCase):
+    """Restaurant + MapSearchHistory 통합 테이블 기반 대시보드 API 확인"""
+
+    def setUp(self):
+        Restaurant.objects.create(
+            restaurant_ID=1, name='국밥집', category='한식', region='서울',
+            city='강남구', x=127.02, y=37.49, waiting=3, rec_quality=0.9,
+        )
+        Restaurant.objects.create(
+            restaurant_ID=2, name='스시집', category='일식', region='서울',
+            city='마포구', x=126.92, y=37.55, waiting=None,
+        )
+        # 같은 식당이 여러 번 검색된 기록 (가장 최근 값 사용)
+        for waiting in (1, 7):
+            MapSearchHistory.objects.create(
+                restaurant_ID=2, name='스시집', category='일식', region='서울',
+                city='마포구', x=126.92, y=37.55, waiting=waiting,
+            )
+        MapSearchHistory.objects.create(
+            restaurant_ID=3, name='파스타집', category='양식', region='경기',
+            city='성남시', x=127.10, y=37.40, waiting=5,
+        )
+        refresh_unified_restaurants()
+
+    def test_top_restaurants_are_deduplicated(self):
+        response = self.client.get(reverse('dashboard:get_top_restaurants'))
+
+        ids = [r['restaurant_ID'] for r in response.json()['top_restaurants']]
+        self.assertEqual(ids, [2, 3, 1])
+
+    def test_top_categories(self):
+        response = self.client.get(reverse('dashboard:get_top_categories'))
+
+        self.assertEqual(
+            response.json()['top_categories'][0],
+            {'category': '일식', 'total_waiting': 7},
+        )
+
+    def test_filter_options_and_filter(self):
+        options = self.client.get(reverse('dashboard:get_filter_options')).json()
+        self.assertEqual(options['regions'], ['경기', '서울'])
+        self.assertEqual(options['region_cities']['서울'], ['강남구', '마포구'])
+
+        response = self.client.post(
+            reverse('dashboard:filter_restaurants'),
+            data=json.dumps({'region': '서울'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()['count'], 2)
+
+    def test_summary_returns_all_widgets_from_snapshot(self):
+        url = reverse('dashboard:get_dashboard_summary')
+        with self.assertNumQueries(4):
+            # 세대 조회 + 스냅샷 조회 + 워드클라우드 집계 2회 (순위는 다시 계산하지 않음)
+            summary = self.client.get(url).json()
+
+        self.assertEqual(
+            [r['restaurant_ID'] for r in summary['top_restaurants']], [2, 3, 1]
+        )
+        self.assertEqual(summary['top_categories'][0]['category'], '일식')
+        self.assertEqual(set(summary['top_by_recommendation']), {'quality', 'balanced', 'convenience'})
+        self.assertEqual(summary['top_by_recommendation']['quality'][0]['restaurant_ID'], 1)
+        self.assertEqual(summary['filter_options']['regions'], ['경기', '서울'])
+        self.assertIn('words', summary['wordcloud'])
+        self.assertIn('generated_at', summary)
+
+    def test_filter_keyset_pages_and_stream(self):
+        url = reverse('dashboard:filter_restaurants')
+
+        def post(body):
+            return self.client.post(url, data=json.dumps(body), content_type='application/json')
+
+        first = post({'limit': 2}).json()
+        self.assertEqual([r['restaurant_ID'] for r in first['restaurants']], [1, 2])
+        self.assertEqual(first['total'], 3)
+        self.assertEqual(first['bounds']['max_x'], 127.10)
+
+        second = post({'limit': 2, 'cursor': first['next_cursor']}).json()
+        self.assertEqual([r['restaurant_ID'] for r in second['restaurants']], [3])
+        self.assertIsNone(second['next_cursor'])
+        self.assertNotIn('total', second)
+
+        self.assertEqual(post({'limit': 0}).status_code, 400)
+
+    @mock.patch('dashboard.views.FILTER_STREAM_CHUNK_SIZE', 1)
+    async def test_filter_stream_is_consumed_incrementally(self):
+        response = await self.async_client.post(
+            reverse('dashboard:filter_restaurants'),
+            data=json.dumps({'region': '서울', 'stream': True}),
+            content_type='application/json',
+        )
+        # async 이터레이터여야 ASGI 핸들러가 전체 결과를 모으지 않고 조각마다 보낸다
+        self.assertTrue(response.is_async)
+
+        parts = aiter(response.streaming_content)
+        self.assertEqual(await anext(parts), b'[')
+        first = json.loads(await anext(parts))
+        self.assertEqual(first['restaurant_ID'], 1)
+
+        rest = [part async for part in parts]
+        rows = json.loads(b'[' + json.dumps(first).encode() + b''.join(rest))
+        self.assertEqual([r['restaurant_ID'] for r in rows], [1, 2])
+        self.assertEqual(rows[1]['waiting'], 7)
+
+    def test_viewport_markers_and_clusters(self):
+        url = reverse('dashboard:get_viewport_restaurants')
+        seoul = {'sw_lat': 37.45, 'sw_lng': 126.9, 'ne_lat': 37.6, 'ne_lng': 127.05}
+
+        markers = self.client.get(url, dict(seoul, level=3)).json()
+        self.assertEqual(markers['mode'], 'markers')
+        self.assertEqual(
+            sorted(r['restaurant_ID'] for r in markers['restaurants']), [1, 2]
+        )
+
+        # 강남 국밥집 중심 반경 1km
+        nearby = self.client.get(
+            url, {'lat': 37.49, 'lng': 127.02, 'radius': 1000, 'level': 3}
+        ).json()
+        self.assertEqual([r['restaurant_ID'] for r in nearby['restaurants']], [1])
+
+        clusters = self.client.get(
+            url, {'sw_lat': 37.0, 'sw_lng': 126.5, 'ne_lat': 38.0, 'ne_lng': 127.5, 'level': 12}
+        ).json()
+        self.assertEqual(clusters['mode'], 'clusters')
+        self.assertEqual(clusters['count'], 3)
+
+        self.assertEqual(self.client.get(url, {'level': 3}).status_code, 400)
+
+    def test_filter_options_etag_revalidation(self):
+        url = reverse('dashboard:get_filter_options')
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # 원본 행 저장만으로는 스냅샷이 바뀌지 않는다 (대시보드는 통합 테이블만 읽음)
+        Restaurant.objects.filter(restaurant_ID=1).first().save()
+        MapSearchHistory.objects.create(
+            restaurant_ID=1, name='국밥집', category='한식', region='서울',
+            city='강남구', x=127.02, y=37.49, waiting=9,
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # 통합 테이블을 다시 채우면 세대가 올라가 ETag가 달라진다
+        refresh_unified_restaurants()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class MapSearchAggregationTest(TestCase):
+    """지도 검색 로그 -> 식당별 집계 upsert 확인"""
+
+    def search(self, restaurant_id, waiting):
+        MapSearchHistory.objects.create(
+            restaurant_ID=restaurant_id, name=f'식당{restaurant_id}', category='한식',
+            region='서울', city='강남구', x=127.0, y=37.5, waiting=waiting,
+        )
+
+    def test_counts_are_added_once_with_latest_values(self):
+        for waiting in (1, 4):
+            self.search(1, waiting)
+        self.search(2, 0)
+        self.assertEqual(aggregate_map_searches(batch_size=2), 3)
+
+        self.search(1, 9)
+        aggregate_map_searches()
+        # 이미 처리한 행은 다시 집계하지 않는다
+        self.assertEqual(aggregate_map_searches(), 0)
+
+        first = MapSearchAggregate.objects.get(restaurant_ID=1)
+        self.assertEqual((first.search_count, first.waiting), (3, 9))
+        self.assertEqual(MapSearchAggregate.objects.get(restaurant_ID=2).search_count, 1)
+
+        refresh_unified_restaurants()
+        self.assertEqual(UnifiedRestaurant.objects.get(restaurant_ID=1).search_count, 3)
+
+    @override_settings(MAP_SEARCH_EVENT_LOG=True, MAP_SEARCH_EVENT_RETENTION_DAYS=7)
+    def test_purge_and_event_log(self):
+        self.search(1, 2)
+        self.search(1, 3)
+        aggregate_map_searches(purge=True)
+
+        self.assertFalse(MapSearchHistory.objects.exists())
+        self.assertEqual(MapSearchEvent.objects.count(), 2)
+
+        MapSearchEvent.objects.update(day=timezone.localdate() - timedelta(days=8))
+        self.assertEqual(prune_map_search_events(), 2)
+
+
+class ChatTermAggregationTest(TestCase):
+    """채팅 질문 명사의 증분 집계와 기간별 워드클라우드 조회 확인"""
+
+    @staticmethod
+    def tokenize(texts):
+        # 테스트에서는 JVM 없이 공백 단위로 자른다
+        return [text.split() for text in texts]
+
+    def test_incremental_aggregation_and_windows(self):
+        old = ChatHistory.objects.create(query='강남 파스타 맛집', answer='')
+        ChatHistory.objects.filter(pk=old.pk).update(
+            created_at=timezone.now() - timedelta(days=3)
+        )
+        ChatHistory.objects.create(query='강남 국밥', answer='')
+
+        self.assertEqual(aggregate_chat_terms(tokenize=self.tokenize), 2)
+        # 이미 집계한 질문은 다시 처리하지 않는다
+        self.assertEqual(aggregate_chat_terms(tokenize=self.tokenize), 0)
+
+        ChatHistory.objects.create(query='강남 파스타', answer='')
+        self.assertEqual(aggregate_chat_terms(tokenize=self.tokenize), 1)
+
+        url = reverse('dashboard:get_wordcloud_data')
+        words = {w['x']: w['value'] for w in self.client.get(url).json()['words']}
+        # 불용어('맛집')는 제외
+        self.assertEqual(words, {'강남': 3, '파스타': 2, '국밥': 1})
+
+        recent = self.client.get(url, {'window': '24h'}).json()
+        self.assertEqual(
+            {w['x']: w['value'] for w in recent['words']},
+            {'강남': 2, '파스타': 1, '국밥': 1},
+        )
+        self.assertEqual(recent['total_count'], 4)
+
+        self.assertEqual(self.client.get(url, {'window': '1y'}).status_code, 400)
+
+    def test_late_committed_lower_ids_are_counted_once(self):
+        ChatHistory.objects.create(id=1, query='강남 국밥', answer='')
+        self.assertEqual(aggregate_chat_terms(tokenize=self.tokenize), 1)
+
+        # 다른 워커의 배치(id 2)가 커밋되기 전에 id 3이 먼저 집계된다
+        ChatHistory.objects.create(id=3, query='홍대 라멘', answer='')
+        self.assertEqual(aggregate_chat_terms(tokenize=self.tokenize), 1)
+
+        ChatHistory.objects.create(id=2, query='성수 파스타', answer='')
+        self.assertEqual(aggregate_chat_terms(tokenize=self.tokenize), 1)
+        self.assertEqual(aggregate_chat_terms(tokenize=self.tokenize), 0)
+        self.assertEqual(
+            dict(ChatTermDaily.objects.values_list('term', 'count')),
+            {'강남': 1, '국밥': 1, '홍대': 1, '라멘': 1, '성수': 1, '파스타': 1},
+        )
+
+    def test_expired_gaps_are_dropped(self):
+        ChatHistory.objects.create(id=1, query='강남 국밥', answer='')
+        aggregate_chat_terms(tokenize=self.tokenize)
+        ChatHistory.objects.create(id=3, query='홍대 라멘', answer='')
+        aggregate_chat_terms(tokenize=self.tokenize)
+        self.assertEqual(list(AggregationWatermark.objects.get(name='chat_terms').gaps), ['2'])
+
+        with mock.patch('dashboard.wordcloud.time.time', return_value=time.time() + 3600):
+            aggregate_chat_terms(tokenize=self.tokenize)
+        self.assertEqual(AggregationWatermark.objects.get(name='chat_terms').gaps, {})
+
+
+class KoreanTokenizerTest(SimpleTestCase):
+    """공용 형태소 분석기의 지연 초기화와 메모 캐시 확인"""
+
+    def test_okt_created_once_and_results_memoized(self):
+        tok = KoreanTokenizer(memo_size=2)
+        with mock.patch('dashboard.tokenizer.Okt') as okt_cls:
+            okt_cls.return_value.nouns.side_effect = lambda text: text.split()
+
+            self.assertEqual(
+                tok.nouns(['강남 파스타', '홍대 국밥', '강남 파스타']),
+                [['강남', '파스타'], ['홍대', '국밥'], ['강남', '파스타']],
+            )
+            tok.nouns(['홍대 국밥'])
+
+        okt_cls.assert_called_once()
+        self.assertEqual(okt_cls.return_value.nouns.call_count, 2)
+
+    def test_warm_up_respects_flag_and_survives_missing_jvm(self):
+        with mock.patch('dashboard.tokenizer.tokenizer.warm_up') as warm_up:
+            with override_settings(KONLPY_WARMUP=False):
+                self.assertFalse(warm_up_if_enabled())
+            warm_up.assert_not_called()
+
+            warm_up.side_effect = OSError('JVM not found')
+            with override_settings(KONLPY_WARMUP=True), self.assertLogs('dashboard.tokenizer'):
+                self.assertFalse(warm_up_if_enabled())
+
+    def test_filter_terms(self):
+        self.assertEqual(filter_terms(['맛집', '파스타', '집', '강']), ['파스타'])
@@ -0,0 +1,86 @@
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from konlpy.tag import Okt
+
+logger = logging.getLogger(__name__)
+
+# 맛집 추천 서비스 특성상 의미 없는 단어나 너무 뻔한 단어 제외
+DEFAULT_STOP_WORDS = frozenset({
+    '저', '요', '것', '집', '곳', '좀', '수', '등', '나', '추천', '맛집', '오늘', '내일',
+    '근처', '어디', '알려',
+})
+STOP_WORDS = DEFAULT_STOP_WORDS | frozenset(settings.WORDCLOUD_EXTRA_STOP_WORDS)
+
+
+class KoreanTokenizer:
+    """
+    워커 프로세스 단위로 공유하는 Okt 형태소 분석기.
+    Okt 생성(JVM 기동, 클래스 로딩)은 처음 사용할 때 한 번만 하고,
+    같은 문장의 명사 추출 결과는 LRU 메모 캐시에 보관한다.
+    """
+
+    def __init__(self, memo_size=4096):
+        self.memo_size = memo_size
+        self._okt = None
+        self._init_lock = threading.Lock()
+        # Okt 호출과 메모 캐시를 함께 보호 (JVM 쪽 분석기를 스레드 간 공유하지 않음)
+        self._lock = threading.Lock()
+        self._memo = OrderedDict()
+
+    def _get_okt(self):
+        if self._okt is None:
+            with self._init_lock:
+                if self._okt is None:
+                    self._okt = Okt()
+        return self._okt
+
+    def warm_up(self):
+        """JVM 기동과 사전 로딩을 첫 요청 전에 미리 끝낸다"""
+        self.nouns(['강남역 근처 파스타 맛집 추천해줘'])
+
+    def nouns(self, texts):
+        """문장 목록의 명사 목록을 같은 순서로 반환"""
+        okt = self._get_okt()
+        results = []
+        with self._lock:
+            for text in texts:
+                nouns = self._memo.get(text)
+                if nouns is None:
+                    nouns = tuple(okt.nouns(text))
+                    self._memo[text] = nouns
+                    while len(self._memo) > self.memo_size:
+                        self._memo.popitem(last=False)
+                else:
+                    self._memo.move_to_end(text)
+                results.append(list(nouns))
+        return results
+
+    def clear(self):
+        with self._lock:
+            self._memo.clear()
+
+
+def filter_terms(nouns):
+    """불용어와 한 글자 단어 제외"""
+    return [word for word in nouns if word not in STOP_WORDS and len(word) > 1]
+
+
+tokenizer = KoreanTokenizer()
+
+
+def warm_up_if_enabled():
+    """
+    KONLPY_WARMUP이 켜져 있을 때만 Okt(JVM)를 미리 띄운다.
+    JDK가 없는 등 실패해도 워커 기동은 막지 않고 로그만 남긴다 (첫 사용 때 다시 시도).
+    """
+    if not settings.KONLPY_WARMUP:
+        return False
+    try:
+        tokenizer.warm_up()
+    except Exception:
+        logger.exception("KoNLPy warm-up failed")
+        return False
+    return True
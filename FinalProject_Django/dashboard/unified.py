@@ -0,0 +1,71 @@
+from django.db import transaction
+from django.utils import timezone
+
+from main.models import Restaurant
+
+from .geo import grid_cell
+from .map_search import aggregate_map_searches
+from .models import MapSearchAggregate, UnifiedRestaurant
+from .snapshots import bump_generation, refresh_snapshot
+from .summary import FILTER_OPTIONS_KEY, SUMMARY_KEY, build_filter_options, build_summary
+
+
+RESTAURANT_FIELDS = (
+    'restaurant_ID', 'name', 'category', 'region', 'city', 'x', 'y', 'waiting',
+    'rating', 'rec_quality', 'rec_balanced', 'rec_convenience',
+)
+MAP_SEARCH_FIELDS = (
+    'restaurant_ID', 'name', 'category', 'region', 'city', 'x', 'y', 'waiting',
+    'search_count',
+)
+
+
+def build_unified_rows():
+    """
+    Restaurant와 지도 검색 집계를 restaurant_ID 기준으로 합친다.
+    Restaurant 값이 우선이며, 대기 인원이 없으면 가장 최근 지도 검색 값을 쓴다.
+    """
+    # 집계 테이블은 식당당 1행 (가장 최근 검색 값 + 검색 횟수)
+    rows = {
+        m['restaurant_ID']: dict(m, source='map_search')
+        for m in MapSearchAggregate.objects.values(*MAP_SEARCH_FIELDS).iterator()
+    }
+
+    for r in Restaurant.objects.values(*RESTAURANT_FIELDS).iterator():
+        searched = rows.get(r['restaurant_ID'])
+        r['search_count'] = searched['search_count'] if searched else 0
+        if r['waiting'] is None and searched is not None:
+            r['waiting'] = searched['waiting']
+        for field in ('region', 'city', 'category', 'x', 'y'):
+            if not r[field] and searched is not None:
+                r[field] = searched[field]
+        rows[r['restaurant_ID']] = dict(r, source='restaurant')
+
+    return rows.values()
+
+
+def refresh_unified_restaurants(batch_size=1000):
+    """통합 테이블을 한 트랜잭션 안에서 다시 채운다. 반환값: 적재된 행 수"""
+    # 아직 집계되지 않은 지도 검색 기록부터 반영
+    aggregate_map_searches()
+
+    now = timezone.now()
+    objs = []
+    for row in build_unified_rows():
+        cell_x, cell_y = grid_cell(row['x'], row['y'])
+        objs.append(
+            UnifiedRestaurant(**row, cell_x=cell_x, cell_y=cell_y, refreshed_at=now)
+        )
+
+    with transaction.atomic():
+        UnifiedRestaurant.objects.all().delete()
+        UnifiedRestaurant.objects.bulk_create(objs, batch_size=batch_size)
+        # 대시보드 스냅샷/ETag는 통합 테이블만 읽으므로 세대는 여기서만 올린다
+        bump_generation()
+
+    # 새 세대의 필터 옵션과 대시보드 순위를 미리 계산해 둔다
+    refresh_snapshot(FILTER_OPTIONS_KEY, build_filter_options)
+    refresh_snapshot(SUMMARY_KEY, build_summary)
+
+    return len(objs)
+
@@ -5,6 +5,7 @@ from . import views
 app_name = 'dashboard'
 urlpatterns = [
     path('', views.dashboard, name='dashboard'),
+    path('api/summary/', views.get_dashboard_summary, name='get_dashboard_summary'),
     path('api/top-restaurants/', views.get_top_restaurants, name='get_top_restaurants'),
     path('api/top-categories/', views.get_top_categories, name='get_top_categories'),
     path(
@@ -16,6 +17,11 @@ urlpatterns = [
     path(
         'api/filter-restaurants/', views.filter_restaurants, name='filter_restaurants'
     ),
+    path(
+        'api/viewport-restaurants/',
+        views.get_viewport_restaurants,
+        name='get_viewport_restaurants',
+    ),
     path('api/wordcloud/', views.get_wordcloud_data, name='get_wordcloud_data'),
     path('api/wordcloud/local/', views.get_local_wordcloud_data, name='get_local_wordcloud_data'),
 ]
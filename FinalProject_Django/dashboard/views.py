@@ -1,15 +1,31 @@
 import csv
+import json
 import os
 from django.conf import settings
-from django.http import JsonResponse
+from django.db.models import Count, Max, Min
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
-from django.views.decorators.http import require_http_methods
-from konlpy.tag import Okt
+from django.views.decorators.http import condition, require_http_methods
 from collections import Counter
 
-from main.models import Restaurant
-from main.models import ChatHistory
-from .models import MapSearchHistory
+from . import queries
+from .geo import (
+    CLUSTER_MIN_LEVEL, MAX_MARKERS, BoundingBox, bbox_from_radius, cluster,
+    cluster_cell_size, haversine_m, within_bbox,
+)
+from .models import UnifiedRestaurant
+from .snapshots import generation_etag, get_snapshot
+from .summary import FILTER_OPTIONS_KEY, SUMMARY_KEY, build_filter_options, build_summary
+from .tokenizer import filter_terms, tokenizer
+from .wordcloud import WINDOWS as WORDCLOUD_WINDOWS, top_terms
+
+FILTER_FIELDS = (
+    'restaurant_ID', 'name', 'category', 'region', 'city', 'x', 'y', 'waiting'
+)
+# 필터 결과 페이지 크기 (기본/최대)와 스트리밍 시 DB에서 한 번에 가져올 행 수
+FILTER_PAGE_SIZE = 200
+FILTER_MAX_PAGE_SIZE = 2000
+FILTER_STREAM_CHUNK_SIZE = 2000
 
 
 def dashboard(request):
@@ -24,40 +40,8 @@ def dashboard(request):
 def get_top_restaurants(request):
     """대기 인원 수 기반 Top 5 레스토랑 조회 API"""
     try:
-        # Restaurant와 MapSearchHistory 모두에서 조회
-
-        # Restaurant 모델에서 대기 인원이 있는 레스토랑
-        restaurant_top = Restaurant.objects.filter(
-            waiting__isnull=False
-        ).order_by('-waiting')[:5]
-
-        # MapSearchHistory 모델에서 대기 인원이 있는 레스토랑
-        map_top = MapSearchHistory.objects.filter(
-            waiting__isnull=False
-        ).order_by('-waiting')[:5]
-
-        # 두 모델의 데이터를 합쳐서 정렬
-        all_restaurants = []
-
-        for r in restaurant_top:
-            all_restaurants.append({
-                'name': r.name,
-                'waiting': r.waiting,
-                'category': r.category,
-                'restaurant_ID': r.restaurant_ID
-            })
-
-        for m in map_top:
-            all_restaurants.append({
-                'name': m.name,
-                'waiting': m.waiting,
-                'category': m.category,
-                'restaurant_ID': m.restaurant_ID
-            })
-
-        # 대기 인원 수로 정렬하고 상위 5개만 선택
-        all_restaurants.sort(key=lambda x: x['waiting'], reverse=True)
-        top_5 = all_restaurants[:5]
+        # 통합 테이블(Restaurant + MapSearchHistory)에서 한 번에 조회
+        top_5 = list(queries.top_waiting())
 
         return JsonResponse({
             'top_restaurants': top_5
@@ -70,43 +54,8 @@ def get_top_restaurants(request):
 def get_top_categories(request):
     """카테고리별 대기 인원 합산 Top 5 조회 API"""
     try:
-        from collections import defaultdict
-
-        from django.db.models import Sum
-
-        category_waiting = defaultdict(int)
-
-        # Restaurant 모델에서 카테고리별 대기 인원 합산
-        restaurant_categories = Restaurant.objects.filter(
-            waiting__isnull=False,
-            category__isnull=False
-        ).exclude(category='').values('category').annotate(
-            total_waiting=Sum('waiting')
-        )
-
-        for item in restaurant_categories:
-            category_waiting[item['category']] += item['total_waiting']
-
-        # MapSearchHistory 모델에서 카테고리별 대기 인원 합산
-        map_categories = MapSearchHistory.objects.filter(
-            waiting__isnull=False,
-            category__isnull=False
-        ).exclude(category='').values('category').annotate(
-            total_waiting=Sum('waiting')
-        )
-
-        for item in map_categories:
-            category_waiting[item['category']] += item['total_waiting']
-
-        # 딕셔너리를 리스트로 변환하고 정렬
-        category_list = [
-            {'category': category, 'total_waiting': total}
-            for category, total in category_waiting.items()
-        ]
-        category_list.sort(key=lambda x: x['total_waiting'], reverse=True)
-
-        # Top 5만 선택
-        top_5_categories = category_list[:5]
+        # 카테고리별 대기 인원 합산 후 DB에서 정렬
+        top_5_categories = list(queries.top_categories())
 
         return JsonResponse({
             'top_categories': top_5_categories
@@ -122,29 +71,10 @@ def get_top_by_recommendation(request):
         rec_type = request.GET.get('type', 'quality')
 
         # 추천도 타입에 따라 정렬 필드 결정
-        field_mapping = {
-            'quality': 'rec_quality',
-            'balanced': 'rec_balanced',
-            'convenience': 'rec_convenience'
-        }
-
-        order_field = field_mapping.get(rec_type, 'rec_quality')
-
-        # Restaurant 모델에서 추천도 기준으로 상위 5개 조회
-        top_restaurants = Restaurant.objects.filter(
-            **{f'{order_field}__isnull': False}
-        ).order_by(f'-{order_field}')[:5]
+        order_field = queries.REC_FIELDS.get(rec_type, 'rec_quality')
 
-        results = []
-        for r in top_restaurants:
-            rec_value = getattr(r, order_field, 0)
-            results.append({
-                'restaurant_ID': r.restaurant_ID,
-                'name': r.name,
-                'category': r.category,
-                'rating': float(r.rating) if r.rating else 0,
-                'rec_value': float(rec_value) if rec_value else 0
-            })
+        # 통합 테이블에서 추천도 기준으로 상위 5개 조회
+        results = queries.recommendation_rows(order_field)
 
         return JsonResponse({
             'top_restaurants': results,
@@ -155,168 +85,220 @@ def get_top_by_recommendation(request):
 
 
 @require_http_methods(["GET"])
-def get_filter_options(request):
-    """필터 옵션 조회 API"""
+def get_dashboard_summary(request):
+    """
+    대시보드 첫 화면 위젯을 한 번에 반환하는 API
+    순위(대기, 카테고리, 추천도 3종)와 필터 옵션은 데이터 세대별 스냅샷에서 읽고,
+    채팅 워드클라우드만 일별 집계 테이블에서 조회한다.
+    """
     try:
-        # Restaurant 모델과 MapSearchHistory 모델 모두에서 조회
-        restaurant_regions = Restaurant.objects.values_list(
-            'region', flat=True
-        ).distinct()
-        map_regions = MapSearchHistory.objects.values_list(
-            'region', flat=True
-        ).distinct()
-        all_regions = sorted(set(list(restaurant_regions) + list(map_regions)))
-        all_regions = [r for r in all_regions if r]
-
-        # 지역별 도시 매핑 생성
-        region_cities = {}
-
-        # Restaurant 모델에서 지역-도시 매핑
-        for r in Restaurant.objects.values('region', 'city').distinct():
-            if r['region'] and r['city']:
-                if r['region'] not in region_cities:
-                    region_cities[r['region']] = set()
-                region_cities[r['region']].add(r['city'])
-
-        # MapSearchHistory 모델에서 지역-도시 매핑
-        for m in MapSearchHistory.objects.values('region', 'city').distinct():
-            if m['region'] and m['city']:
-                if m['region'] not in region_cities:
-                    region_cities[m['region']] = set()
-                region_cities[m['region']].add(m['city'])
-
-        # set을 sorted list로 변환
-        region_cities = {
-            region: sorted(list(cities))
-            for region, cities in region_cities.items()
-        }
-
-        restaurant_categories = Restaurant.objects.values_list(
-            'category', flat=True
-        ).distinct()
-        map_categories = MapSearchHistory.objects.values_list(
-            'category', flat=True
-        ).distinct()
-        all_categories = sorted(set(list(restaurant_categories) + list(map_categories)))
-        all_categories = [cat for cat in all_categories if cat]
-
+        snapshot = get_snapshot(SUMMARY_KEY, build_summary)
+        top_words, total_count = top_terms('all', limit=50)
         return JsonResponse({
-            'regions': all_regions,
-            'region_cities': region_cities,
-            'categories': all_categories
+            **snapshot.payload,
+            'wordcloud': {
+                'words': [{'x': word, 'value': freq} for word, freq in top_words],
+                'total_count': total_count,
+                'window': 'all',
+            },
+            'generation': snapshot.generation,
+            'generated_at': snapshot.generated_at.isoformat(),
         })
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
 
+@require_http_methods(["GET"])
+@condition(etag_func=lambda request: generation_etag(FILTER_OPTIONS_KEY))
+def get_filter_options(request):
+    """
+    필터 옵션 조회 API
+    데이터 세대별로 미리 계산된 스냅샷을 반환하며, If-None-Match가 맞으면 304
+    """
+    try:
+        snapshot = get_snapshot(FILTER_OPTIONS_KEY, build_filter_options)
+        return JsonResponse(snapshot.payload)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
 @require_http_methods(["POST"])
 def filter_restaurants(request):
-    """레스토랑 필터링 API"""
-    import json
+    """
+    레스토랑 필터링 API
+    기본: restaurant_ID 기준 키셋 페이지네이션 (limit, cursor -> next_cursor)
+    첫 페이지에는 전체 개수(total)와 지도 범위(bounds)를 함께 담는다.
+    stream=true면 조건에 맞는 전체 목록을 JSON 배열로 나눠 전송 (워커 메모리 일정)
+    """
     try:
         data = json.loads(request.body)
         region = data.get('region')
         city = data.get('city')
         category = data.get('category')
+        cursor = data.get('cursor')
+        limit = data.get('limit')
+        limit = FILTER_PAGE_SIZE if limit is None else int(limit)
+        if cursor is not None:
+            cursor = int(cursor)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': '잘못된 요청 형식입니다.'}, status=400)
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'limit, cursor는 정수여야 합니다.'}, status=400)
+    if not 1 <= limit <= FILTER_MAX_PAGE_SIZE:
+        return JsonResponse(
+            {'error': f'limit은 1~{FILTER_MAX_PAGE_SIZE} 사이여야 합니다.'}, status=400
+        )
+
+    try:
+        # 통합 테이블에서 좌표가 있는 레스토랑만 필터링
+        queryset = queries.filtered(region, city, category)
+
+        rows = queryset.order_by('restaurant_ID').values(*FILTER_FIELDS)
+
+        if data.get('stream'):
+            # ASGI에서 동기 이터레이터는 전체를 모은 뒤 전송되므로 async 제너레이터로 넘긴다
+            return StreamingHttpResponse(
+                _json_array(rows), content_type='application/json'
+            )
+
+        if cursor is not None:
+            rows = rows.filter(restaurant_ID__gt=cursor)
+        page = [_with_waiting(r) for r in rows[:limit + 1]]
+        has_next = len(page) > limit
+        page = page[:limit]
+
+        response = {
+            'restaurants': page,
+            'count': len(page),
+            'next_cursor': page[-1]['restaurant_ID'] if has_next else None,
+        }
+        if cursor is None:
+            summary = queryset.aggregate(
+                total=Count('restaurant_ID'),
+                min_x=Min('x'), min_y=Min('y'), max_x=Max('x'), max_y=Max('y'),
+            )
+            response['total'] = summary.pop('total')
+            response['bounds'] = summary if response['total'] else None
+        return JsonResponse(response)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
 
-        # Restaurant 모델에서 필터링
-        restaurant_queryset = Restaurant.objects.all()
-        if region:
-            restaurant_queryset = restaurant_queryset.filter(region=region)
-        if city:
-            restaurant_queryset = restaurant_queryset.filter(city=city)
-        if category:
-            restaurant_queryset = restaurant_queryset.filter(category=category)
-
-        # MapSearchHistory 모델에서 필터링
-        map_queryset = MapSearchHistory.objects.all()
-        if region:
-            map_queryset = map_queryset.filter(region=region)
-        if city:
-            map_queryset = map_queryset.filter(city=city)
-        if category:
-            map_queryset = map_queryset.filter(category=category)
-
-        # Restaurant 모델 결과 변환
-        restaurant_results = []
-        for r in restaurant_queryset:
-            if r.x and r.y:  # 좌표가 있는 경우만 포함
-                restaurant_results.append({
-                    'restaurant_ID': r.restaurant_ID,
-                    'name': r.name,
-                    'category': r.category,
-                    'region': r.region,
-                    'city': r.city,
-                    'x': r.x,
-                    'y': r.y,
-                    'waiting': r.waiting if r.waiting is not None else 0
-                })
 
-        # MapSearchHistory 모델 결과 변환
-        map_results = list(map_queryset.values(
-            'restaurant_ID', 'name', 'category', 'region', 'city', 'x', 'y', 'waiting'
-        ))
+def _with_waiting(row):
+    if row['waiting'] is None:
+        row['waiting'] = 0
+    return row
 
-        # 두 결과 합치기
-        all_restaurants = restaurant_results + map_results
 
+async def _json_array(rows):
+    """쿼리셋을 청크 단위로 읽으며 JSON 배열 조각으로 내보낸다"""
+    yield '['
+    separator = ''
+    async for row in rows.aiterator(chunk_size=FILTER_STREAM_CHUNK_SIZE):
+        yield separator + json.dumps(_with_waiting(row), ensure_ascii=False)
+        separator = ','
+    yield ']'
+
+
+@require_http_methods(["GET"])
+def get_viewport_restaurants(request):
+    """
+    지도 영역 내 레스토랑 조회 API
+    영역: sw_lat, sw_lng, ne_lat, ne_lng (사각 영역) 또는 lat, lng, radius(m)
+    필터: region, city, category / level: 카카오맵 레벨
+    넓게 보는 레벨이거나 결과가 많으면 격자 단위 클러스터로 응답
+    """
+    params = request.GET
+    try:
+        radius = None
+        if 'radius' in params:
+            center_x, center_y = float(params['lng']), float(params['lat'])
+            radius = float(params['radius'])
+            bbox = bbox_from_radius(center_x, center_y, radius)
+        else:
+            bbox = BoundingBox(
+                float(params['sw_lng']), float(params['sw_lat']),
+                float(params['ne_lng']), float(params['ne_lat']),
+            )
+        level = int(params.get('level', 1))
+    except (KeyError, ValueError):
+        return JsonResponse({'error': '지도 영역 파라미터가 올바르지 않습니다.'}, status=400)
+
+    try:
+        queryset = within_bbox(UnifiedRestaurant.objects.all(), bbox)
+        for field in ('region', 'city', 'category'):
+            if params.get(field):
+                queryset = queryset.filter(**{field: params[field]})
+
+        if level < CLUSTER_MIN_LEVEL:
+            restaurants = list(
+                queryset.values(
+                    'restaurant_ID', 'name', 'category', 'region', 'city',
+                    'x', 'y', 'waiting'
+                )[:MAX_MARKERS + 1]
+            )
+            if len(restaurants) <= MAX_MARKERS:
+                if radius is not None:
+                    restaurants = [
+                        r for r in restaurants
+                        if haversine_m(center_x, center_y, r['x'], r['y']) <= radius
+                    ]
+                for r in restaurants:
+                    if r['waiting'] is None:
+                        r['waiting'] = 0
+                return JsonResponse({
+                    'mode': 'markers',
+                    'restaurants': restaurants,
+                    'count': len(restaurants),
+                })
+
+        # 반경 조회의 클러스터는 원을 감싸는 사각 영역 기준
+        clusters = cluster(queryset, cluster_cell_size(max(level, CLUSTER_MIN_LEVEL)))
         return JsonResponse({
-            'restaurants': all_restaurants,
-            'count': len(all_restaurants)
+            'mode': 'clusters',
+            'clusters': clusters,
+            'count': sum(c['count'] for c in clusters),
         })
-    except json.JSONDecodeError:
-        return JsonResponse({'error': '잘못된 요청 형식입니다.'}, status=400)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+
 @require_http_methods(["GET"])
 def get_wordcloud_data(request):
     """
     채팅 기록을 분석하여 워드클라우드용 단어 빈도수 데이터를 반환하는 API
+    질문은 aggregate_chat_terms 명령이 한 번씩만 형태소 분석해 일별 빈도로 쌓아 두고,
+    여기서는 기간(window=24h|7d|all) 내 빈도 합계만 조회한다.
     """
-    try:
-        # 1. RDS에서 모든 사용자 질문(query) 가져오기
-        # values_list를 사용하여 쿼리 최적화 (필요한 필드만 가져옴)
-        queries = ChatHistory.objects.values_list('query', flat=True)
-        
-        if not queries:
-            return JsonResponse({'words': []})
-
-        # 2. 텍스트 합치기
-        full_text = " ".join(queries)
-
-        # 3. 자연어 처리 (형태소 분석)
-        # Okt (Open Korean Text) 분석기 사용
-        okt = Okt()
-        nouns = okt.nouns(full_text)  # 명사만 추출
-
-        # 4. 불용어 처리 (제외하고 싶은 단어들)
-        # 맛집 추천 서비스 특성상 의미 없는 단어나 너무 뻔한 단어 제외
-        stop_words = ['저', '요', '것', '집', '곳', '좀', '수', '등', '나', '추천', '맛집', '오늘', '내일']
-        filtered_nouns = [word for word in nouns if word not in stop_words and len(word) > 1]
+    window = request.GET.get('window', 'all')
+    if window not in WORDCLOUD_WINDOWS:
+        return JsonResponse(
+            {'error': f"window는 {', '.join(WORDCLOUD_WINDOWS)} 중 하나여야 합니다."},
+            status=400,
+        )
 
-        # 5. 빈도수 계산
-        count = Counter(filtered_nouns)
-        
-        # 상위 50개 단어만 추출
-        top_words = count.most_common(50)
+    try:
+        # 상위 50개 단어
+        top_words, total_count = top_terms(window, limit=50)
 
-        # 6. 프론트엔드에서 쓰기 편한 리스트(딕셔너리) 형태로 변환
+        # 프론트엔드에서 쓰기 편한 리스트(딕셔너리) 형태로 변환
         # 예: [{'x': '파스타', 'value': 10}, {'x': '강남', 'value': 5}, ...]
         # AnyChart나 WordCloud 라이브러리들이 보통 {x: "단어", value: 빈도} 형태를 선호함
         word_data = [
-            {'x': word, 'value': frequency} 
+            {'x': word, 'value': frequency}
             for word, frequency in top_words
         ]
 
         return JsonResponse({
             'words': word_data,
-            'total_count': len(filtered_nouns)
+            'total_count': total_count,
+            'window': window,
         })
 
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+
 @require_http_methods(["GET"])
 def get_local_wordcloud_data(request):
     """
@@ -326,7 +308,7 @@ def get_local_wordcloud_data(request):
         # 1. CSV 파일 경로 설정 (manage.py가 있는 폴더 기준)
         csv_path = os.path.join(settings.BASE_DIR, 'dummy_chat_data.csv')
         
-        queries = []
+        chat_queries = []
         
         # 2. CSV 파일 읽기
         if os.path.exists(csv_path):
@@ -335,29 +317,26 @@ def get_local_wordcloud_data(request):
                 for row in reader:
                     # 'query' 컬럼이 있는지 확인하고 데이터 수집
                     if 'query' in row:
-                        queries.append(row['query'])
+                        chat_queries.append(row['query'])
         else:
             return JsonResponse({'error': f'파일을 찾을 수 없습니다: {csv_path}'}, status=404)
 
-        if not queries:
+        if not chat_queries:
             return JsonResponse({'words': []})
 
-        # 3. 텍스트 합치기
-        full_text = " ".join(queries)
+        # 3. 자연어 처리 (형태소 분석 - 명사 추출, 워커 공용 분석기 사용)
+        nouns_list = tokenizer.nouns(chat_queries)
 
-        # 4. 자연어 처리 (형태소 분석 - 명사 추출)
-        okt = Okt()
-        nouns = okt.nouns(full_text)
-
-        # 5. 불용어 처리
-        stop_words = ['저', '요', '것', '집', '곳', '좀', '수', '등', '나', '추천', '맛집', '오늘', '내일', '근처', '어디', '알려']
-        filtered_nouns = [word for word in nouns if word not in stop_words and len(word) > 1]
+        # 4. 불용어 처리
+        filtered_nouns = [
+            word for nouns in nouns_list for word in filter_terms(nouns)
+        ]
 
-        # 6. 빈도수 계산 (Top 50)
+        # 5. 빈도수 계산 (Top 50)
         count = Counter(filtered_nouns)
         top_words = count.most_common(50)
 
-        # 7. 데이터 포맷 변환 (AnyChart 호환)
+        # 6. 데이터 포맷 변환 (AnyChart 호환)
         word_data = [
             {'x': word, 'value': frequency} 
             for word, frequency in top_words
@@ -0,0 +1,146 @@
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from main.models import ChatHistory
+
+from .models import AggregationWatermark, ChatTermDaily
+from .tokenizer import STOP_WORDS, tokenizer
+
+WATERMARK_NAME = 'chat_terms'
+# 워커마다 write-behind 배치를 따로 bulk_create하므로 작은 id가 큰 id보다 늦게 커밋될 수 있다.
+# 워터마크가 건너뛴 id는 이 시간(초) 동안 다시 확인하고, 그 뒤에는 롤백된 id로 보고 버린다
+GAP_RETRY_SECONDS = 600
+# id가 크게 건너뛴 경우(시퀀스 재설정 등) 추적할 최대 개수
+MAX_TRACKED_GAPS = 10_000
+
+# 조회 기간 파라미터 -> 기간 (None이면 전체). 일 단위로 집계하므로 경계는 날짜 기준
+WINDOWS = {
+    '24h': timedelta(hours=24),
+    '7d': timedelta(days=7),
+    'all': None,
+}
+
+
+def aggregate_chat_terms(tokenize=tokenizer.nouns, batch_size=500):
+    """
+    워터마크 이후의 ChatHistory 질문만 명사 추출해 일별 빈도 테이블에 더한다.
+    워터마크 아래에서 비어 있던 id(늦게 커밋되는 배치)는 GAP_RETRY_SECONDS 동안 다시 확인해 더한다.
+    배치마다 빈도 반영과 워터마크 이동을 한 트랜잭션으로 처리해
+    중간에 실패해도 같은 질문이 두 번 집계되지 않는다.
+    불용어는 조회 시 제외하므로 설정을 바꿔도 다시 집계할 필요가 없다.
+    tokenize: 문장 목록 -> 명사 목록의 목록
+    반환값: 처리한 질문 수
+    """
+    processed = 0
+    while True:
+        with transaction.atomic():
+            watermark, _ = AggregationWatermark.objects.select_for_update().get_or_create(
+                name=WATERMARK_NAME
+            )
+            gaps = _live_gaps(watermark.gaps)
+            late = list(_chat_rows(id__in=[int(chat_id) for chat_id in gaps]))
+            for chat_id, _, _ in late:
+                del gaps[str(chat_id)]
+
+            new = list(_chat_rows(id__gt=watermark.last_id)[:batch_size])
+            if new:
+                _track_gaps(gaps, watermark.last_id, [chat_id for chat_id, _, _ in new])
+                watermark.last_id = new[-1][0]
+
+            chats = late + new
+            if not chats:
+                if gaps != watermark.gaps:
+                    watermark.gaps = gaps
+                    watermark.save(update_fields=['gaps', 'updated_at'])
+                break
+
+            counts = Counter()
+            nouns_list = tokenize([query for _, query, _ in chats])
+            for (_, _, created_at), nouns in zip(chats, nouns_list, strict=True):
+                day = timezone.localdate(created_at)
+                for term in nouns:
+                    if len(term) > 1:
+                        counts[(day, term)] += 1
+
+            _add_counts(counts)
+
+            watermark.gaps = gaps
+            watermark.save(update_fields=['last_id', 'gaps', 'updated_at'])
+
+        processed += len(chats)
+
+    return processed
+
+
+def _chat_rows(**filters):
+    return (
+        ChatHistory.objects.filter(**filters)
+        .order_by('id')
+        .values_list('id', 'query', 'created_at')
+    )
+
+
+def _live_gaps(gaps):
+    """GAP_RETRY_SECONDS가 지나지 않은 건너뛴 id만 남긴다"""
+    cutoff = time.time() - GAP_RETRY_SECONDS
+    return {chat_id: seen for chat_id, seen in gaps.items() if seen >= cutoff}
+
+
+def _track_gaps(gaps, last_id, ids):
+    """last_id 다음부터 이번 배치의 마지막 id 사이에서 비어 있는 id를 기록"""
+    if not last_id:
+        # 첫 집계에서는 이전에 삭제된 id까지 모두 빈칸으로 보이므로 추적하지 않는다
+        return
+    present = set(ids)
+    missing = [i for i in range(last_id + 1, ids[-1]) if i not in present]
+    if len(gaps) + len(missing) > MAX_TRACKED_GAPS:
+        return
+    now = time.time()
+    for chat_id in missing:
+        gaps[str(chat_id)] = now
+
+
+def _add_counts(counts):
+    """(day, term) -> 빈도를 기존 행에 더하고, 없는 행은 새로 만든다"""
+    if not counts:
+        return
+
+    days = {day for day, _ in counts}
+    terms = {term for _, term in counts}
+    existing = {
+        (row.day, row.term): row
+        for row in ChatTermDaily.objects.filter(day__in=days, term__in=terms)
+    }
+
+    to_update, to_create = [], []
+    for (day, term), count in counts.items():
+        row = existing.get((day, term))
+        if row is None:
+            to_create.append(ChatTermDaily(day=day, term=term, count=count))
+        else:
+            row.count += count
+            to_update.append(row)
+
+    ChatTermDaily.objects.bulk_update(to_update, ['count'], batch_size=1000)
+    ChatTermDaily.objects.bulk_create(to_create, batch_size=1000)
+
+
+def top_terms(window='all', limit=50):
+    """기간 내 상위 단어와 전체 단어 수. 반환값: ([(단어, 빈도), ...], 전체 빈도)"""
+    qs = ChatTermDaily.objects.exclude(term__in=STOP_WORDS)
+    period = WINDOWS[window]
+    if period is not None:
+        qs = qs.filter(day__gte=timezone.localdate(timezone.now() - period))
+
+    totals = qs.values('term').annotate(total=Sum('count'))
+    top = [
+        (row['term'], row['total'])
+        for row in totals.order_by('-total', 'term')[:limit]
+    ]
+    total_count = qs.aggregate(total=Sum('count'))['total'] or 0
+    return top, total_count
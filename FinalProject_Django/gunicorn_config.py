@@ -7,17 +7,36 @@ workers = multiprocessing.cpu_count() * 2 + 1
 # 바인딩할 주소 (localhost:8000)
 bind = '127.0.0.1:8000'
 
-# 워커 클래스
-worker_class = 'sync'
+# ASGI 앱 (RAG 채팅 뷰는 async로 동작하므로 Gemini 대기 중에도 워커가 막히지 않음)
+# 실행: gunicorn -c gunicorn_config.py DE7FP_Django.asgi:application
+wsgi_app = 'DE7FP_Django.asgi:application'
+
+# 워커 클래스 (uvicorn-worker 패키지)
+worker_class = 'uvicorn_worker.UvicornWorker'
 
 # 최대 요청 수 (메모리 누수 방지)
 max_requests = 1000
 max_requests_jitter = 50
 
-# 타임아웃
+# 타임아웃 (async 워커에서는 요청 처리 시간이 아닌 워커 heartbeat 기준)
 timeout = 30
 
 # 로그
 accesslog = '-'  # stdout으로 출력
 errorlog = '-'
 loglevel = 'info'
+
+
+def post_worker_init(worker):
+    """
+    워커가 앱을 불러온 직후 형태소 분석기(JVM)를 미리 띄워 첫 요청 지연을 없앤다.
+    KONLPY_WARMUP=True일 때만 실행하며, 실패해도 워커는 그대로 뜬다.
+    """
+    from dashboard.tokenizer import warm_up_if_enabled
+    warm_up_if_enabled()
+
+
+def worker_exit(server, worker):
+    """워커 종료 시 버퍼에 남은 채팅 기록을 DB(또는 스풀 파일)에 저장"""
+    from RAG.history import chat_history_buffer
+    chat_history_buffer.close()
@@ -0,0 +1,50 @@
+from .models import Restaurant
+
+CARD_FIELDS = ('restaurant_ID', 'name', 'category', 'rating', 'image_url', 'x', 'y')
+MAX_CARDS = 50
+
+
+def _card(restaurant_ID, name, category='', rating=None, image_url='', x=None, y=None):
+    return {
+        'restaurant_ID': restaurant_ID,
+        'name': name,
+        'category': category,
+        'rating': float(rating) if rating else 0,
+        'image_url': image_url,
+        'x': x,
+        'y': y,
+    }
+
+
+def _to_int(restaurant_id):
+    try:
+        return int(restaurant_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_restaurant_cards(restaurant_ids, fallback=None):
+    """
+    추천 버튼/카드에 필요한 식당 정보를 한 번의 restaurant_ID__in 쿼리로 조회.
+    요청한 순서를 유지하며, Restaurant에 없는 ID는 fallback(place_id -> 카드 dict)이나
+    기본 이름('레스토랑 {id}')으로 채운다.
+    """
+    ids = [_to_int(restaurant_id) for restaurant_id in restaurant_ids[:MAX_CARDS]]
+    found = {
+        r['restaurant_ID']: r
+        for r in Restaurant.objects.filter(
+            restaurant_ID__in=[i for i in ids if i is not None]
+        ).values(*CARD_FIELDS)
+    }
+    fallback = fallback or {}
+
+    cards = []
+    for raw_id, restaurant_id in zip(restaurant_ids, ids, strict=False):
+        row = found.get(restaurant_id)
+        if row is not None:
+            cards.append(_card(**row))
+        elif str(raw_id) in fallback:
+            cards.append(fallback[str(raw_id)])
+        else:
+            cards.append(_card(raw_id, f'레스토랑 {raw_id}'))
+    return cards
@@ -0,0 +1,97 @@
+import copy
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.utils import load_backend
+
+# 비교할 연결 방식: 요청마다 새 연결 / 영속 연결 / 커넥션 풀
+MODES = ("connect", "persistent", "pool")
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure per-request DB latency with a new connection per request, "
+        "persistent connections and a psycopg 3 pool (PostgreSQL aliases only)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--alias", action="append", dest="aliases",
+            help="Database alias (repeatable, default: every PostgreSQL alias)",
+        )
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument(
+            "--queries", type=int, default=3,
+            help="Queries per simulated request",
+        )
+        parser.add_argument("--pool-size", type=int, default=4)
+
+    def handle(self, *args, **options):
+        aliases = options["aliases"] or [
+            alias for alias in connections
+            if "postgresql" in (connections.settings[alias]["ENGINE"] or "")
+        ]
+        if not aliases:
+            raise CommandError("PostgreSQL 데이터베이스 설정이 없습니다.")
+
+        for alias in aliases:
+            settings_dict = connections.settings[alias]
+            if "postgresql" not in (settings_dict["ENGINE"] or ""):
+                raise CommandError(f"{alias}: PostgreSQL 별칭만 측정할 수 있습니다.")
+
+            self.stdout.write(
+                f"[{alias}] {settings_dict['HOST'] or 'localhost'}:"
+                f"{settings_dict['PORT'] or 5432}/{settings_dict['NAME']}, "
+                f"{options['requests']} requests x {options['queries']} queries"
+            )
+            self.stdout.write(
+                f"  {'mode':<12} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'saved ms':>9}"
+            )
+            baseline = None
+            for mode in MODES:
+                latencies = self._run(alias, settings_dict, mode, options)
+                mean = statistics.mean(latencies)
+                if baseline is None:
+                    baseline = mean
+                latencies.sort()
+                p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+                self.stdout.write(
+                    f"  {mode:<12} {mean:8.2f} {statistics.median(latencies):8.2f} "
+                    f"{p95:8.2f} {baseline - mean:9.2f}"
+                )
+
+    def _run(self, alias, settings_dict, mode, options):
+        """요청 처리와 같은 순서로 연결 -> 쿼리 -> 요청 종료 처리를 반복한다"""
+        settings_dict = copy.deepcopy(settings_dict)
+        settings_dict["CONN_HEALTH_CHECKS"] = True
+        settings_dict["OPTIONS"].pop("pool", None)
+        if mode == "connect":
+            settings_dict["CONN_MAX_AGE"] = 0
+        elif mode == "persistent":
+            settings_dict["CONN_MAX_AGE"] = None
+        else:
+            settings_dict["CONN_MAX_AGE"] = 0
+            settings_dict["OPTIONS"]["pool"] = {
+                "min_size": 1, "max_size": options["pool_size"],
+            }
+
+        backend = load_backend(settings_dict["ENGINE"])
+        wrapper = backend.DatabaseWrapper(settings_dict, alias=f"bench_{mode}_{alias}")
+        latencies = []
+        try:
+            for _ in range(options["requests"]):
+                started = time.perf_counter()
+                with wrapper.cursor() as cursor:
+                    for _ in range(options["queries"]):
+                        cursor.execute("SELECT 1")
+                        cursor.fetchone()
+                # request_finished 시그널의 close_old_connections와 같은 처리
+                wrapper.close_if_unusable_or_obsolete()
+                latencies.append((time.perf_counter() - started) * 1000)
+        finally:
+            wrapper.close()
+            if mode == "pool":
+                wrapper.close_pool()
+        return latencies
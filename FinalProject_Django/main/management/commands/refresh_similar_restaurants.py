@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from main.similar import SIMILAR_LIMIT, refresh_similar_restaurants
+
+
+class Command(BaseCommand):
+    help = "Precompute top restaurants per cluster for the similar-restaurants API"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=SIMILAR_LIMIT)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = refresh_similar_restaurants(limit=options["limit"])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Refreshed top restaurants for {count} clusters ({elapsed:.2f}s)"
+            )
+        )
@@ -54,6 +54,31 @@ class Restaurant(models.Model):
         verbose_name = "레스토랑"
         verbose_name_plural = "레스토랑"
         #ordering = ['-created_at']
+        indexes = [
+            # 같은 클러스터의 추천 점수 상위 식당 조회 (비슷한 식당 API)
+            models.Index(
+                fields=['cluster', '-rec_balanced'],
+                name='restaurant_cluster_rec_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.restaurant_ID})"
+
+
+class ClusterTopRestaurants(models.Model):
+    """
+    클러스터별 rec_balanced 상위 식당 목록 (비슷한 식당 API용 사전 계산 결과).
+    클러스터링 결과 적재 후 refresh_similar_restaurants 커맨드로 다시 만든다.
+    """
+    cluster = models.IntegerField(primary_key=True, verbose_name="클러스터")
+    # 응답 형태 그대로의 식당 목록 (rec_balanced 내림차순, 최대 SIMILAR_LIMIT + 1개)
+    restaurants = models.JSONField(default=list, verbose_name="상위 식당")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="갱신 시간")
+
+    class Meta:
+        verbose_name = "클러스터 상위 식당"
+        verbose_name_plural = "클러스터 상위 식당"
+
+    def __str__(self):
+        return f"cluster {self.cluster} ({len(self.restaurants)})"
@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import ClusterTopRestaurants, Restaurant
+
+# 상세 페이지에 보여줄 비슷한 식당 수
+SIMILAR_LIMIT = 5
+SIMILAR_FIELDS = ('restaurant_ID', 'name', 'category', 'rating', 'rec_balanced', 'cluster')
+
+
+def _similar_row(row):
+    return {
+        'restaurant_ID': row['restaurant_ID'],
+        'name': row['name'],
+        'category': row['category'],
+        'rating': float(row['rating']) if row['rating'] else 0,
+        'rec_balanced': float(row['rec_balanced']) if row['rec_balanced'] else 0,
+    }
+
+
+def _ranked(queryset):
+    return queryset.filter(
+        cluster__isnull=False, rec_balanced__isnull=False
+    ).order_by('cluster', '-rec_balanced')
+
+
+def refresh_similar_restaurants(limit=SIMILAR_LIMIT):
+    """
+    클러스터마다 rec_balanced 상위 limit + 1개를 계산해 ClusterTopRestaurants를 다시 채운다.
+    (자기 자신을 빼도 limit개가 남도록 하나 더 보관) 반환값: 클러스터 수
+    """
+    top = {}
+    for row in _ranked(Restaurant.objects.all()).values(*SIMILAR_FIELDS).iterator():
+        rows = top.setdefault(row['cluster'], [])
+        if len(rows) <= limit:
+            rows.append(_similar_row(row))
+
+    with transaction.atomic():
+        ClusterTopRestaurants.objects.all().delete()
+        ClusterTopRestaurants.objects.bulk_create([
+            ClusterTopRestaurants(cluster=cluster, restaurants=rows)
+            for cluster, rows in top.items()
+        ])
+    return len(top)
+
+
+def _cluster_top(cluster, limit):
+    """사전 계산 결과가 없으면 (cluster, -rec_balanced) 인덱스로 바로 조회"""
+    materialized = ClusterTopRestaurants.objects.filter(cluster=cluster).values_list(
+        'restaurants', flat=True
+    ).first()
+    if materialized is not None:
+        return materialized
+    rows = _ranked(Restaurant.objects.filter(cluster=cluster)).values(*SIMILAR_FIELDS)
+    return [_similar_row(row) for row in rows[:limit + 1]]
+
+
+def get_similar_restaurants(restaurant_id, limit=SIMILAR_LIMIT):
+    """
+    같은 클러스터의 rec_balanced 상위 식당 (자기 자신 제외).
+    결과는 식당별로 SIMILAR_RESTAURANTS_CACHE_TTL초 동안 캐시한다.
+    식당이 없으면 Restaurant.DoesNotExist
+    """
+    key = f'main:similar:{restaurant_id}:{limit}'
+    results = cache.get(key)
+    if results is not None:
+        return results
+
+    cluster = Restaurant.objects.values_list('cluster', flat=True).get(
+        restaurant_ID=restaurant_id
+    )
+    results = []
+    if cluster is not None:
+        results = [
+            row for row in _cluster_top(cluster, limit)
+            if str(row['restaurant_ID']) != str(restaurant_id)
+        ][:limit]
+
+    cache.set(key, results, settings.SIMILAR_RESTAURANTS_CACHE_TTL)
+    return results
@@ -1,2 +1,88 @@
-
 # Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .cards import MAX_CARDS, get_restaurant_cards
+from .models import ClusterTopRestaurants, Restaurant
+from .similar import refresh_similar_restaurants
+
+
+class RestaurantCardsTest(TestCase):
+    """추천 버튼용 레스토랑 카드 일괄 조회 확인"""
+
+    def setUp(self):
+        Restaurant.objects.create(
+            restaurant_ID=1, name='국밥집', category='한식', rating=4.5,
+            x=127.02, y=37.49,
+        )
+        Restaurant.objects.create(
+            restaurant_ID=2, name='스시집', category='일식', x=126.92, y=37.55,
+        )
+
+    def test_cards_keep_order_in_single_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            cards = get_restaurant_cards(['2', '1', '99'])
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual([c['name'] for c in cards], ['스시집', '국밥집', '레스토랑 99'])
+        self.assertEqual(cards[1]['rating'], 4.5)
+
+    def test_missing_ids_use_fallback_cards(self):
+        fallback = {'99': {'restaurant_ID': '99', 'name': '파스타집'}}
+        cards = get_restaurant_cards(['1', '99'], fallback)
+        self.assertEqual([c['name'] for c in cards], ['국밥집', '파스타집'])
+
+    def test_cards_api(self):
+        url = reverse('main:get_restaurant_cards')
+        response = self.client.get(url, {'ids': '1,2'})
+        self.assertEqual(response.status_code, 200)
+        names = [c['name'] for c in response.json()['restaurants']]
+        self.assertEqual(names, ['국밥집', '스시집'])
+
+        self.assertEqual(self.client.get(url).status_code, 400)
+        too_many = ','.join(str(i) for i in range(MAX_CARDS + 1))
+        self.assertEqual(self.client.get(url, {'ids': too_many}).status_code, 400)
+
+
+class SimilarRestaurantsTest(TestCase):
+    """클러스터별 상위 식당 사전 계산 및 비슷한 식당 API 확인"""
+
+    def setUp(self):
+        cache.clear()
+        for i in range(1, 9):
+            Restaurant.objects.create(
+                restaurant_ID=i, name=f'식당{i}', cluster=0 if i <= 7 else 1,
+                rec_balanced=i / 10,
+            )
+        Restaurant.objects.create(restaurant_ID=9, name='미분류')
+
+    def test_refresh_keeps_limit_plus_one_per_cluster(self):
+        self.assertEqual(refresh_similar_restaurants(limit=5), 2)
+        top = ClusterTopRestaurants.objects.get(cluster=0).restaurants
+        self.assertEqual([r['restaurant_ID'] for r in top], [7, 6, 5, 4, 3, 2])
+
+    def test_api_excludes_self_and_caches(self):
+        refresh_similar_restaurants()
+        url = reverse('main:get_similar_restaurants', args=['7'])
+        response = self.client.get(url)
+        ids = [r['restaurant_ID'] for r in response.json()['similar_restaurants']]
+        self.assertEqual(ids, [6, 5, 4, 3, 2])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertEqual(len(queries), 0)
+
+    def test_api_without_materialized_rows(self):
+        url = reverse('main:get_similar_restaurants', args=['8'])
+        self.assertEqual(response_ids(self.client.get(url)), [])
+        url = reverse('main:get_similar_restaurants', args=['1'])
+        self.assertEqual(response_ids(self.client.get(url)), [7, 6, 5, 4, 3])
+        url = reverse('main:get_similar_restaurants', args=['404'])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+def response_ids(response):
+    return [r['restaurant_ID'] for r in response.json()['similar_restaurants']]
@@ -12,14 +12,34 @@ urlpatterns = [
         name='restaurant_detail',
     ),
     path('api/ragchat/', rag_views.rag_chat_api, name='rag_api'),
+    path(
+        'api/ragchat/stream/',
+        rag_views.rag_chat_stream_api,
+        name='rag_stream_api',
+    ),
+    path(
+        'api/ragchat/cache-stats/',
+        rag_views.rag_cache_stats_api,
+        name='rag_cache_stats',
+    ),
     path(
         'api/restaurant/<str:restaurant_id>/name/',
         main_views.get_restaurant_name,
         name='get_restaurant_name',
     ),
+    path(
+        'api/restaurants/cards/',
+        main_views.get_restaurant_cards_api,
+        name='get_restaurant_cards',
+    ),
     path(
         'api/restaurant/<str:restaurant_id>/similar/',
         main_views.get_similar_restaurants,
         name='get_similar_restaurants',
     ),
+    path(
+        'api/restaurant/<str:restaurant_id>/similar/embedding/',
+        rag_views.similar_restaurants_api,
+        name='get_embedding_similar_restaurants',
+    ),
 ]
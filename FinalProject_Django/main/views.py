@@ -2,6 +2,8 @@ from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, render
 from django.views.decorators.http import require_http_methods
 
+from . import similar
+from .cards import MAX_CARDS, get_restaurant_cards
 from .models import Restaurant
 
 
@@ -30,39 +32,28 @@ def get_restaurant_name(request, restaurant_id):
 
 
 @require_http_methods(["GET"])
-def get_similar_restaurants(request, restaurant_id):
-    """비슷한 식당 추천 API"""
-    try:
-        # 현재 레스토랑 정보 가져오기
-        current_restaurant = Restaurant.objects.get(restaurant_ID=restaurant_id)
+def get_restaurant_cards_api(request):
+    """레스토랑 카드 일괄 조회 API (?ids=1,2,3)"""
+    ids = [i for i in request.GET.get('ids', '').split(',') if i.strip()]
+    if not ids:
+        return JsonResponse({'error': 'ids가 비어있습니다.'}, status=400)
+    if len(ids) > MAX_CARDS:
+        return JsonResponse(
+            {'error': f'한 번에 최대 {MAX_CARDS}개까지 조회할 수 있습니다.'}, status=400
+        )
 
-        # 클러스터가 없으면 빈 리스트 반환
-        if current_restaurant.cluster is None:
-            return JsonResponse({'similar_restaurants': []})
-
-        # 같은 클러스터에 속하면서 현재 레스토랑이 아닌 식당들을
-        # rec_balanced 기준으로 정렬
-        similar_restaurants = Restaurant.objects.filter(
-            cluster=current_restaurant.cluster,
-            rec_balanced__isnull=False
-        ).exclude(
-            restaurant_ID=restaurant_id
-        ).order_by('-rec_balanced')[:5]
+    try:
+        return JsonResponse({'restaurants': get_restaurant_cards(ids)})
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
 
-        results = []
-        for restaurant in similar_restaurants:
-            results.append({
-                'restaurant_ID': restaurant.restaurant_ID,
-                'name': restaurant.name,
-                'category': restaurant.category,
-                'rating': float(restaurant.rating) if restaurant.rating else 0,
-                'rec_balanced': (
-                    float(restaurant.rec_balanced)
-                    if restaurant.rec_balanced
-                    else 0
-                )
-            })
 
+@require_http_methods(["GET"])
+def get_similar_restaurants(request, restaurant_id):
+    """비슷한 식당 추천 API"""
+    try:
+        # 같은 클러스터의 rec_balanced 상위 식당 (사전 계산 + 캐시)
+        results = similar.get_similar_restaurants(restaurant_id)
         return JsonResponse({'similar_restaurants': results})
     except Restaurant.DoesNotExist:
         return JsonResponse({'error': '레스토랑을 찾을 수 없습니다.'}, status=404)
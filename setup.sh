@@ -103,8 +103,7 @@ import multiprocessing
 # Gunicorn 설정
 bind = "127.0.0.1:8000"
 workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "sync"
-worker_connections = 1000
+worker_class = "uvicorn_worker.UvicornWorker"
 timeout = 30
 keepalive = 2
 
@@ -138,7 +137,7 @@ WorkingDirectory=/home/$USER/CatchData-Django/FinalProject_Django
 Environment="PATH=/home/$USER/CatchData-Django/venv/bin"
 ExecStart=/home/$USER/CatchData-Django/venv/bin/gunicorn \\
     --config /home/$USER/CatchData-Django/gunicorn_config.py \\
-    DE7FP_Django.wsgi:application
+    DE7FP_Django.asgi:application
 
 [Install]
 WantedBy=multi-user.target